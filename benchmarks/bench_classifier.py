@@ -0,0 +1,85 @@
+# benchmarks/bench_classifier.py
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from benchmarks.synthetic_corpus import SUPPLIER_TEMPLATES, make_document
+from supplier_configs.classifier import AUTOMATON_MIN_MARKERS, SupplierClassifier
+from supplier_configs.supplier_configs import SupplierConfig, SupplierConfigManager
+
+MARKER_COUNTS = [16, 32, 64, 128, 192, 256, 288, 320, 352, 384, 512, 1024, 2048]
+
+
+def make_pages(count: int, page_chars: int, seed: int = 0) -> list:
+    """Synthetic invoice pages of about page_chars characters each"""
+    codes = list(SUPPLIER_TEMPLATES)
+    pages = []
+    for n in range(count):
+        lines = []
+        while sum(len(line) + 1 for line in lines) < page_chars:
+            lines += make_document(codes[(n + len(lines)) % len(codes)], n, seed)['lines']
+        pages.append('\n'.join(lines)[:page_chars])
+    return pages
+
+
+def with_extra_suppliers(configs: dict, markers: int, seed: int = 0) -> dict:
+    """Add made-up suppliers, two validation markers each, until there are about this many markers"""
+    rng = random.Random(seed)
+    configs = dict(configs)
+    existing = len(SupplierClassifier(configs).markers)
+    for n in range(max(0, markers - existing) // 2):
+        code = f"BENCH{n:04d}"
+        configs[code] = SupplierConfig(code=code, name=code, sheet_identifier=code,
+                                       validation_markers=[f"{code} LIMITED", f"VAT Reg {rng.randint(10**8, 10**9)}"],
+                                       exclusion_markers=[], patterns={})
+    return configs
+
+
+def time_find(classifier: SupplierClassifier, pages: list, repeat: int) -> float:
+    """Mean microseconds per page for one marker search"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for page in pages:
+            classifier.find_markers(page)
+    return (time.perf_counter() - start) / (repeat * len(pages)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find where the marker automaton overtakes substring search")
+    parser.add_argument("--pages", type=int, default=50, help="Synthetic pages to search (default 50)")
+    parser.add_argument("--page-chars", type=int, default=2000, help="Characters per page (default 2,000)")
+    parser.add_argument("--repeat", type=int, default=20, help="Passes over the pages per measurement")
+    args = parser.parse_args()
+
+    pages = make_pages(args.pages, args.page_chars)
+    base_configs = SupplierConfigManager().configs
+    print(f"Configured suppliers use {len(SupplierClassifier(base_configs).markers)} distinct markers; "
+          f"the automaton is used from {AUTOMATON_MIN_MARKERS}")
+
+    print("\n" + "=" * 60)
+    print("MARKER SEARCH BENCHMARK (us per page)")
+    print("=" * 60)
+    print(f"{'markers':>8s} {'substring':>12s} {'automaton':>12s}")
+    crossover = None
+    for markers in MARKER_COUNTS:
+        configs = with_extra_suppliers(base_configs, markers)
+        substring = time_find(SupplierClassifier(configs, use_automaton=False), pages, args.repeat)
+        automaton = time_find(SupplierClassifier(configs, use_automaton=True), pages, args.repeat)
+        count = len(SupplierClassifier(configs).markers)
+        print(f"{count:8d} {substring:12.1f} {automaton:12.1f}")
+        if crossover is None and automaton < substring:
+            crossover = count
+    if crossover is None:
+        print("Substring search was faster at every marker count")
+    else:
+        print(f"The automaton is faster from about {crossover} markers")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# benchmarks/bench_export.py
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+sys.path.append(str(project_root / 'src'))
+
+from benchmarks.bench_rebuild import make_ledger
+from utils.ledger import COLUMN_WIDTHS, OPENPYXL, SUMMARY_WIDTHS, XLSXWRITER, xlsxwriter
+
+
+def legacy_export(ledger, excel_path: Path):
+    """The previous create_invoice_summary write, kept here for comparison.
+
+    Every sheet is read into a DataFrame, written through pandas into an
+    ordinary openpyxl workbook and given its column widths afterwards, so
+    all cells are held in memory until the save.
+    """
+    with pd.ExcelWriter(excel_path, engine='openpyxl') as writer:
+        ledger.summary().to_excel(writer, sheet_name='Summary', index=False)
+        for sheet_name in ledger.sheet_names():
+            ledger.read_sheet(sheet_name).to_excel(writer, sheet_name=sheet_name, index=False)
+            worksheet = writer.sheets[sheet_name]
+            for col_letter, width in COLUMN_WIDTHS.items():
+                worksheet.column_dimensions[col_letter].width = width
+        worksheet = writer.sheets['Summary']
+        for col_letter, width in SUMMARY_WIDTHS.items():
+            worksheet.column_dimensions[col_letter].width = width
+
+
+def measure(write, excel_path: Path) -> tuple:
+    """Return the seconds one write takes and the peak Python memory of a second one"""
+    start = time.perf_counter()
+    write(excel_path)
+    seconds = time.perf_counter() - start
+
+    # A separate run, as tracing allocations slows the write down
+    tracemalloc.start()
+    write(excel_path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare workbook writers on a synthetic ledger")
+    parser.add_argument("--rows", type=int, default=100_000, help="Total ledger rows (default 100,000)")
+    parser.add_argument("--sheets", type=int, default=20, help="Number of supplier sheets")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        print(f"Building a {args.rows:,}-row ledger across {args.sheets} sheets...")
+        ledger, _ = make_ledger(tmp / 'bench.ledger.sqlite', args.rows, args.sheets)
+        writers = [
+            ('pandas + openpyxl (before)', lambda path: legacy_export(ledger, path)),
+            ('openpyxl write-only', lambda path: ledger.export_workbook(path, OPENPYXL))
+        ]
+        if xlsxwriter is not None:
+            writers.append(('xlsxwriter constant memory', lambda path: ledger.export_workbook(path, XLSXWRITER)))
+        else:
+            print("XlsxWriter is not installed; skipping its writer")
+
+        results = []
+        for number, (label, write) in enumerate(writers):
+            excel_path = tmp / f"{number}.xlsx"
+            seconds, peak = measure(write, excel_path)
+            results.append((label, seconds, peak, excel_path.stat().st_size))
+        ledger.close()
+
+    print("\n" + "=" * 78)
+    print("WORKBOOK EXPORT BENCHMARK")
+    print("=" * 78)
+    before = results[0][1]
+    for label, seconds, peak, size in results:
+        print(f"{label:28s} {seconds:7.2f}s  {args.rows / seconds:9,.0f} rows/s  {seconds / before:5.2f}x  "
+              f"peak {peak / (1024 * 1024):7.1f} MB  file {size / (1024 * 1024):5.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
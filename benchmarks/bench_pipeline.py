@@ -0,0 +1,184 @@
+# benchmarks/bench_pipeline.py
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+sys.path.append(str(project_root / 'src'))
+
+from benchmarks.synthetic_corpus import MANIFEST_NAME, generate_corpus, load_manifest
+from excel_build import build_supplier_sheet, clean_sheet_name
+from main_script import (COLUMN_MAPPING, collect_pending, find_supplier_sheet, match_invoice_text,
+                         new_sheet_stats, prepare_sheet, record_result, save_sheets)
+from supplier_configs.supplier_configs import SupplierConfigManager
+from utils.ledger import InvoiceLedger
+from utils.scan_manifest import ScanManifest
+from utils.text_cache import PageTextCache
+
+STAGES = ['scanning', 'extraction', 'matching', 'excel writing']
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+
+def get_corpus(work_dir: Path, count: int, seed: int, workers: int) -> Path:
+    """Return a synthetic share of count PDFs, generating it unless work_dir already has it"""
+    corpus_dir = work_dir / f"corpus_{count}_seed{seed}"
+    if (corpus_dir / MANIFEST_NAME).exists():
+        print(f"Reusing corpus at {corpus_dir}")
+        return corpus_dir
+    shutil.rmtree(corpus_dir, ignore_errors=True)
+    print(f"Generating {count:,} synthetic PDFs in {corpus_dir}...")
+    start = time.perf_counter()
+    generate_corpus(corpus_dir, count, seed, workers=workers)
+    print(f"Generated in {time.perf_counter() - start:.1f}s")
+    return corpus_dir
+
+
+def run_benchmark(corpus_dir: Path, run_dir: Path) -> dict:
+    """Time each pipeline stage over one corpus, using the default supplier configs.
+
+    The ledger, page text cache and workbook are created fresh in run_dir, so
+    extraction runs against a cold cache as it would for new invoices.
+    """
+    configs = SupplierConfigManager()._get_default_configs()
+    timings = dict.fromkeys(STAGES, 0.0)
+    run_dir.mkdir(parents=True, exist_ok=True)
+    excel_path = run_dir / 'Invoice_Summary.xlsx'
+
+    # Scanning: list the share and build the ledger sheets, as excel_build does
+    start = time.perf_counter()
+    ledger = InvoiceLedger.for_workbook(excel_path, create=True)
+    manifest = ScanManifest(ledger.conn)
+    sheets, supplier_names = {}, {}
+    for code_number, supplier_folder in enumerate(sorted(corpus_dir.iterdir()), start=1):
+        if supplier_folder.is_dir():
+            sheet_name = clean_sheet_name(supplier_folder.name)
+            scan = manifest.scan(supplier_folder)
+            sheets[sheet_name] = build_supplier_sheet(scan.files, None, f"SUP{code_number:04d}")
+            supplier_names[sheet_name] = supplier_folder.name
+    ledger.replace_all(sheets, supplier_names)
+    timings['scanning'] = time.perf_counter() - start
+
+    cache = PageTextCache(run_dir / 'page_text.sqlite')
+    expected = load_manifest(corpus_dir)
+    outcomes = {'updated': 0, 'invalid': 0, 'excluded': 0, 'low_confidence': 0, 'error': 0}
+    field_hits = field_total = 0
+    updated_sheets = {}
+    for config in configs.values():
+        sheet_name = find_supplier_sheet(ledger.sheet_names(), config)
+        if not sheet_name:
+            continue
+        df = prepare_sheet(ledger.read_sheet(sheet_name))
+        stats = new_sheet_stats(len(df))
+        config_dict = config.to_dict()
+        for index, file_path in collect_pending(df, stats):
+            # Extraction: open the PDF and read its page text
+            start = time.perf_counter()
+            try:
+                text, region_texts = cache.get_texts(file_path, clips=config_dict.get('field_regions'))
+            except Exception as e:
+                text = None
+                result = {'file_path': file_path, 'status': 'error', 'data': {},
+                          'confidence_score': 0.0, 'error': str(e)}
+            timings['extraction'] += time.perf_counter() - start
+
+            # Matching: markers, patterns and the DataFrame update
+            start = time.perf_counter()
+            if text is not None:
+                result = match_invoice_text(file_path, text, config_dict, region_texts=region_texts)
+            outcomes[record_result(df, index, result, config, stats)] += 1
+            timings['matching'] += time.perf_counter() - start
+
+            for field, value in expected[file_path]['expected'].items():
+                field_total += 1
+                field_hits += df.at[index, COLUMN_MAPPING[field]] == value
+        updated_sheets[sheet_name] = df
+    cache.close()
+
+    # Excel writing: store the updated sheets and export the workbook
+    start = time.perf_counter()
+    save_sheets(ledger, excel_path, updated_sheets)
+    ledger.close()
+    timings['excel writing'] = time.perf_counter() - start
+
+    total_files = len(expected)
+    total_time = sum(timings.values())
+    return {
+        'files': total_files,
+        'timings': timings,
+        'total_seconds': total_time,
+        'files_per_second': total_files / total_time if total_time else 0.0,
+        'outcomes': outcomes,
+        'field_accuracy': (field_hits / field_total) * 100 if field_total else 0.0
+    }
+
+
+def print_report(results: list):
+    print("\n" + "=" * 78)
+    print("PIPELINE BENCHMARK")
+    print("=" * 78)
+    header = f"{'Files':>8}  " + "  ".join(f"{stage:>13}" for stage in STAGES) + f"  {'Total':>8}  {'Files/s':>8}"
+    print(header)
+    for result in results:
+        stage_times = "  ".join(f"{result['timings'][stage]:12.2f}s" for stage in STAGES)
+        print(f"{result['files']:>8,}  {stage_times}  {result['total_seconds']:7.2f}s  "
+              f"{result['files_per_second']:8.1f}")
+    print("\nFiles/second per stage:")
+    for result in results:
+        rates = "  ".join(f"{stage} {result['files'] / result['timings'][stage]:,.0f}"
+                          for stage in STAGES if result['timings'][stage] > 0)
+        print(f"{result['files']:>8,}  {rates}")
+    print("\nOutcomes and field accuracy against the generated values:")
+    for result in results:
+        outcomes = ", ".join(f"{name} {count}" for name, count in result['outcomes'].items())
+        print(f"{result['files']:>8,}  {outcomes}, accuracy {result['field_accuracy']:.2f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline throughput benchmark on synthetic supplier invoices")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="Corpus sizes to run (default: 1000 10000 100000)")
+    parser.add_argument("--work-dir", type=Path,
+                        help="Keep generated corpora here and reuse them on later runs (default: temporary)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the synthetic corpus")
+    parser.add_argument("--gen-workers", type=int, default=4, help="Processes used to generate PDFs")
+    parser.add_argument("--json", type=Path, help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    temp_dir = None
+    if args.work_dir:
+        work_dir = args.work_dir
+        work_dir.mkdir(parents=True, exist_ok=True)
+    else:
+        temp_dir = tempfile.TemporaryDirectory()
+        work_dir = Path(temp_dir.name)
+
+    results = []
+    try:
+        for size in args.sizes:
+            corpus_dir = get_corpus(work_dir, size, args.seed, args.gen_workers)
+            run_dir = work_dir / f"run_{size}"
+            shutil.rmtree(run_dir, ignore_errors=True)
+            print(f"Running pipeline over {size:,} files...")
+            results.append(run_benchmark(corpus_dir, run_dir))
+            shutil.rmtree(run_dir, ignore_errors=True)
+    finally:
+        if temp_dir is not None:
+            temp_dir.cleanup()
+
+    print_report(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'run_date': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                       'seed': args.seed, 'results': results}, f, indent=4)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
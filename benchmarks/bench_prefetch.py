@@ -0,0 +1,104 @@
+# benchmarks/bench_prefetch.py
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+sys.path.append(str(project_root / 'src'))
+
+from benchmarks.synthetic_corpus import generate_corpus, load_manifest
+from main_script import (DEFAULT_PREFETCH_THREADS, DEFAULT_READ_AHEAD_BYTES, extract_invoice_text,
+                         extraction_stages, match_invoice, new_pipeline_item, prefetch_invoice)
+from supplier_configs.supplier_configs import SupplierConfigManager
+from utils.pipeline import run_pipeline
+from utils.text_cache import CACHE_PATH_ENV
+
+
+class SlowShareReader:
+    """Reads files from a local folder as if it were the network share.
+
+    Each read waits latency seconds before returning, like opening a file
+    from a SharePoint/OneDrive-synced share.
+    """
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def __call__(self, file_path: str) -> bytes:
+        time.sleep(self.latency)
+        with open(file_path, 'rb') as f:
+            return f.read()
+
+
+def run_serial(tasks, reader) -> float:
+    """Read, extract and match one file at a time, as before read-ahead"""
+    start = time.perf_counter()
+    for file_path, config_dict in tasks:
+        item = prefetch_invoice(new_pipeline_item(file_path, config_dict), reader)
+        match_invoice(extract_invoice_text(item))
+    return time.perf_counter() - start
+
+
+def run_read_ahead(tasks, reader, args) -> tuple:
+    """Run the extraction pipeline; return wall time and the peak read-ahead bytes"""
+    stages = extraction_stages(args.workers, args.prefetch, read_ahead_bytes=args.read_ahead_mb * 1024 * 1024,
+                               reader=reader)
+    items = (new_pipeline_item(file_path, config_dict) for file_path, config_dict in tasks)
+    start = time.perf_counter()
+    for _ in run_pipeline(items, stages):
+        pass
+    return time.perf_counter() - start, stages[0].budget.peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare read-ahead against serial reads from a slow share")
+    parser.add_argument("--count", type=int, default=300, help="Synthetic PDFs to read (default 300)")
+    parser.add_argument("--latency", type=float, default=0.05,
+                        help="Seconds added to each file read (default 0.05)")
+    parser.add_argument("--prefetch", type=int, default=DEFAULT_PREFETCH_THREADS * 4,
+                        help=f"Read-ahead threads (default {DEFAULT_PREFETCH_THREADS * 4})")
+    parser.add_argument("--read-ahead-mb", type=int, default=DEFAULT_READ_AHEAD_BYTES // (1024 * 1024),
+                        help="Read-ahead byte budget in MB")
+    parser.add_argument("--workers", type=int, default=1, help="Extraction processes (default 1)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the synthetic corpus")
+    args = parser.parse_args()
+
+    configs = {code: config.to_dict() for code, config in SupplierConfigManager()._get_default_configs().items()}
+    with tempfile.TemporaryDirectory() as work_dir:
+        share = Path(work_dir) / 'share'
+        print(f"Generating {args.count:,} synthetic PDFs...")
+        generate_corpus(share, args.count, args.seed)
+        tasks = [(file_path, configs[entry['supplier_code']])
+                 for file_path, entry in load_manifest(share).items()]
+
+        # Every run starts from an empty page text cache so each file is read
+        runs = [
+            ("local, serial (CPU only)", lambda: (run_serial(tasks, SlowShareReader(0)), None)),
+            (f"share +{args.latency * 1000:.0f}ms, serial", lambda: (run_serial(tasks, SlowShareReader(args.latency)), None)),
+            (f"share +{args.latency * 1000:.0f}ms, read-ahead x{args.prefetch}",
+             lambda: run_read_ahead(tasks, SlowShareReader(args.latency), args))
+        ]
+        results = []
+        for number, (label, run) in enumerate(runs):
+            os.environ[CACHE_PATH_ENV] = str(Path(work_dir) / f"cache_{number}.sqlite")
+            seconds, peak = run()
+            results.append((label, seconds, peak))
+        os.environ.pop(CACHE_PATH_ENV)
+
+    print("\n" + "=" * 78)
+    print("READ-AHEAD BENCHMARK")
+    print("=" * 78)
+    cpu_only = results[0][1]
+    for label, seconds, peak in results:
+        peak_text = f", peak read-ahead {peak / 1024:.0f} KB" if peak is not None else ""
+        print(f"{label:40s} {seconds:7.2f}s  {args.count / seconds:7.1f} files/s  "
+              f"{seconds / cpu_only:5.2f}x CPU-only{peak_text}")
+
+
+if __name__ == "__main__":
+    main()
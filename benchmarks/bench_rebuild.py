@@ -0,0 +1,141 @@
+# benchmarks/bench_rebuild.py
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+sys.path.append(str(project_root / 'src'))
+
+from excel_build import EDITABLE_COLUMNS, build_supplier_sheet
+from utils.ledger import InvoiceLedger, LEDGER_COLUMNS
+
+
+def make_ledger(db_path: Path, rows: int, sheets: int, seed: int = 0):
+    """Fill a ledger with synthetic supplier sheets, half of them with extracted values"""
+    rng = random.Random(seed)
+    ledger = InvoiceLedger(db_path)
+    all_dfs, supplier_names, all_files = {}, {}, {}
+    per_sheet = rows // sheets
+    for s in range(sheets):
+        sheet_name = f"SUPPLIER {s:02d}"
+        folder = os.path.join(os.sep, 'share', sheet_name)
+        paths = [os.path.join(folder, f"P{i % 12 + 1:02d}", f"inv{i:06d}.pdf") for i in range(per_sheet)]
+        filled = [rng.random() < 0.5 for _ in paths]
+        all_dfs[sheet_name] = pd.DataFrame({
+            'Invoice File': [os.path.basename(p) for p in paths],
+            'Invoice Date': ['01/02/2024' if f else None for f in filled],
+            'Invoice/Tax Point Number': [f"INV{i}" if f else None for i, f in enumerate(filled)],
+            'Reference Number': [f"REF{i}" if f else None for i, f in enumerate(filled)],
+            'Pre-VAT Total': ['1,000.00' if f else None for f in filled],
+            'Total Amount': ['1,200.00' if f else None for f in filled],
+            'Period Folder': [os.path.basename(os.path.dirname(p)) for p in paths],
+            'File Size (KB)': 100.0,
+            'Full Path': paths,
+            'Supplier Code': f"SUP{s + 1:04d}"
+        }, columns=LEDGER_COLUMNS)
+        supplier_names[sheet_name] = sheet_name
+        # The share has lost 1% of the files and gained 1% new ones since the last build
+        files = {p: (rng.randint(50_000, 500_000), 0) for p in paths if rng.random() >= 0.01}
+        for i in range(per_sheet, per_sheet + per_sheet // 100):
+            files[os.path.join(folder, 'P13', f"inv{i:06d}.pdf")] = (100_000, 0)
+        all_files[sheet_name] = files
+    ledger.replace_all(all_dfs, supplier_names)
+    return ledger, all_files
+
+
+def legacy_read_existing(ledger, sheet_name):
+    """The previous row-by-row implementation, kept here for comparison"""
+    sheet_data = {}
+    for _, row in ledger.read_sheet(sheet_name).iterrows():
+        if pd.notna(row['Full Path']):
+            sheet_data[row['Full Path']] = {column: row[column] for column in EDITABLE_COLUMNS}
+    return sheet_data
+
+
+def legacy_build_supplier_sheet(files, existing_sheet_data, supplier_code):
+    existing_paths = [path for path in existing_sheet_data if path in files]
+    new_paths = [path for path in files if path not in existing_sheet_data]
+    invoice_data = []
+    for path in existing_paths + new_paths:
+        existing_values = existing_sheet_data.get(path, {})
+        invoice_data.append({
+            'Invoice File': os.path.basename(path),
+            **{column: existing_values.get(column, '') for column in EDITABLE_COLUMNS},
+            'Period Folder': os.path.basename(os.path.dirname(path)),
+            'File Size (KB)': round(files[path][0] / 1024, 2),
+            'Full Path': path,
+            'Supplier Code': supplier_code
+        })
+    return pd.DataFrame(invoice_data, columns=LEDGER_COLUMNS)
+
+
+def time_rebuild(ledger, all_files, read_existing, build_sheet):
+    """Time reading the ledger, merging existing values and storing the result.
+
+    Each supplier's sheet is read just before it is rebuilt, as excel_build does.
+    """
+    read_time = merge_time = 0.0
+    all_dfs = {}
+    for s, (sheet_name, files) in enumerate(all_files.items()):
+        start = time.perf_counter()
+        existing = read_existing(ledger, sheet_name)
+        read_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        all_dfs[sheet_name] = build_sheet(files, existing, f"SUP{s + 1:04d}")
+        merge_time += time.perf_counter() - start
+
+    start = time.perf_counter()
+    ledger.replace_all(all_dfs, {name: name for name in all_dfs})
+    store_time = time.perf_counter() - start
+    return read_time, merge_time, store_time, all_dfs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the excel_build existing-data merge on a synthetic ledger")
+    parser.add_argument("--rows", type=int, default=50_000, help="Total ledger rows (default 50,000)")
+    parser.add_argument("--sheets", type=int, default=20, help="Number of supplier sheets")
+    parser.add_argument("--export", action="store_true", help="Also time writing the workbook")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        print(f"Building a {args.rows:,}-row ledger across {args.sheets} sheets...")
+        results = {}
+        for label, read_existing, build_sheet in (
+                ('row-by-row (before)', legacy_read_existing, legacy_build_supplier_sheet),
+                ('columnar join (after)', InvoiceLedger.read_sheet, build_supplier_sheet)):
+            ledger, all_files = make_ledger(tmp / f"{len(results)}.ledger.sqlite", args.rows, args.sheets)
+            read_time, merge_time, store_time, all_dfs = time_rebuild(ledger, all_files, read_existing, build_sheet)
+            results[label] = all_dfs
+            line = (f"{label:24s} read {read_time:6.2f}s  merge {merge_time:6.2f}s  "
+                    f"store {store_time:6.2f}s  total {read_time + merge_time + store_time:6.2f}s")
+            if args.export:
+                start = time.perf_counter()
+                ledger.export_workbook(tmp / f"{len(results)}.xlsx")
+                line += f"  export {time.perf_counter() - start:6.2f}s"
+            print(line)
+            ledger.close()
+
+        # Both versions must produce the same sheets (blank cells compare equal)
+        before, after = results.values()
+        for sheet_name in before:
+            left = before[sheet_name].replace('', None).astype(object)
+            right = after[sheet_name].astype(object)
+            left, right = left.where(left.notna(), None), right.where(right.notna(), None)
+            if not left.equals(right):
+                print(f"MISMATCH on sheet {sheet_name}")
+                sys.exit(1)
+        print("Both versions produced identical sheets")
+
+
+if __name__ == "__main__":
+    main()
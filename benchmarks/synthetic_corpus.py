@@ -0,0 +1,290 @@
+# benchmarks/synthetic_corpus.py
+import argparse
+import json
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import fitz
+
+MONTHS = ['January', 'February', 'March', 'April', 'May', 'June', 'July',
+          'August', 'September', 'October', 'November', 'December']
+PERIOD_FOLDERS = [f"{month[:3].upper()} 24" for month in MONTHS]
+
+# Supplier folders as they appear on the share; each contains its config's sheet_identifier
+SUPPLIER_FOLDERS = {
+    'ABBOTT': 'ABBOTT LABORATORIES',
+    'AJBELL': 'AJ BELL',
+    'ADEPT': 'ADEPT COMPUTER SUPPORT',
+    'ASH_WASTE': 'ASH WASTE SERVICES',
+    'ALLIANCE': 'ALLIANCE HEALTHCARE',
+    'VALLEY': 'VALLEY NORTHERN'
+}
+
+# Share of documents that fail a validation marker or hit an exclusion marker
+INVALID_RATE = 0.03
+EXCLUDED_RATE = 0.02
+
+MANIFEST_NAME = 'corpus.jsonl'
+
+
+def _money(rng: random.Random) -> tuple:
+    net = rng.randint(1000, 900000) / 100
+    return f"{net:.2f}", f"{net * 1.2:.2f}"
+
+
+def _abbott(n: int, rng: random.Random) -> tuple:
+    net, total = _money(rng)
+    expected = {
+        'invoice_number': f"{7000000 + n:07d}",
+        'invoice_date': f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2024",
+        'reference_number': str(rng.randint(1000, 99999)),
+        'pre_vat_total': net,
+        'total_amount': total
+    }
+    lines = [
+        "ABBOTT LABORATORIES LIMITED",
+        "Abbott House, Vanwall Business Park, Maidenhead",
+        "INVOICE",
+        f"Invoice No. {expected['invoice_number']}",
+        f"Invoice Date {expected['invoice_date']}",
+        f"Account Ref No. {expected['reference_number']}",
+        "Qty  Description                    Unit Price",
+        "12   FreeStyle Libre 2 Sensor       35.00",
+        f"Total Net Amount {net}",
+        f"Invoice Total {total}"
+    ]
+    return f"ABB{n:07d}.pdf", lines, expected
+
+
+def _ajbell(n: int, rng: random.Random) -> tuple:
+    net, total = _money(rng)
+    expected = {
+        'invoice_number': f"{rng.randint(10, 99)}/{rng.randint(10, 99)}/{n % 1000:03d}",
+        'invoice_date': f"{rng.randint(1, 28)} {rng.choice(MONTHS)} 2024",
+        'reference_number': f"CORN{n % 10000:04d}",
+        'pre_vat_total': net,
+        'total_amount': total
+    }
+    lines = [
+        "AJ Bell Business Solutions Limited",
+        "FEE INVOICE",
+        f"Invoice Number: {expected['invoice_number']}",
+        f"Date: {expected['invoice_date']}",
+        f"Our Ref: {expected['reference_number']}",
+        "SIPP administration fee",
+        f"Total Fee: £{net}",
+        f"Total Invoice: £{total}"
+    ]
+    return f"AJB{n:07d}.pdf", lines, expected
+
+
+def _adept(n: int, rng: random.Random) -> tuple:
+    net, total = _money(rng)
+    expected = {
+        'invoice_number': f"{10000 + n % 90000:05d}",
+        'invoice_date': f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2024",
+        'reference_number': f"ITACS{n % 10000:04d}",
+        'pre_vat_total': net,
+        'total_amount': total
+    }
+    lines = [
+        "Adept Computer Support Ltd",
+        "Invoice",
+        "Invoice No  Date",
+        f"{expected['invoice_number']} {expected['invoice_date']}",
+        f"Serial: {expected['reference_number']}",
+        "Monthly IT support contract",
+        f"Sub Total {net}",
+        f"Invoice Total {total}"
+    ]
+    return f"ADE{n:07d}.pdf", lines, expected
+
+
+def _ash_waste(n: int, rng: random.Random) -> tuple:
+    net, total = _money(rng)
+    vat = f"{float(total) - float(net):.2f}"
+    expected = {
+        'invoice_number': str(100000 + n),
+        'invoice_date': f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2024",
+        'reference_number': str(n % 1000),
+        'pre_vat_total': vat,
+        'total_amount': total
+    }
+    lines = [
+        "ASH Waste Services Ltd",
+        f"Date {expected['invoice_date']}",
+        f"VAT £{vat}",
+        "Trade waste collection",
+        f"£{net} £{vat} £{total}"
+    ]
+    filename = f"INV{expected['invoice_number']}_{expected['reference_number']}.pdf"
+    return filename, lines, expected
+
+
+def _alliance(n: int, rng: random.Random) -> tuple:
+    net, total = _money(rng)
+    day = rng.randint(1, 28)
+    reference = str(4000000 + n)
+    expected = {
+        'invoice_number': reference,
+        'invoice_date': f"{day:02d}APR24",
+        'reference_number': reference,
+        'pre_vat_total': net,
+        'total_amount': total
+    }
+    lines = [
+        "Alliance Healthcare (Distribution) Ltd",
+        "STATEMENT OF ACCOUNT",
+        f"{expected['invoice_date']} 1 INVOICE {rng.randint(100000, 999999)}",
+        f"PAGE TOTAL {net}",
+        f"INVOICE TOTAL {total}"
+    ]
+    return f"{reference}_AH{n % 100:02d}_{day:02d}-04-2024.pdf", lines, expected
+
+
+def _valley(n: int, rng: random.Random) -> tuple:
+    net, total = _money(rng)
+    expected = {
+        'invoice_number': f"{200000 + n % 800000:06d}",
+        'invoice_date': f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2024",
+        'reference_number': f"VN-{n % 100000:05d}",
+        'pre_vat_total': net,
+        'total_amount': total
+    }
+    lines = [
+        "Valley Northern Ltd",
+        "INVOICE FOR Cornwells Chemists Limited",
+        "Invoice Date Invoice No",
+        f"{expected['invoice_date']} {expected['invoice_number']}",
+        f"Customer Order Number ({expected['reference_number']})",
+        f"Sub Total {net}",
+        f"TOTAL DUE (£) {total}"
+    ]
+    return f"VN{n:07d}.pdf", lines, expected
+
+
+SUPPLIER_TEMPLATES = {
+    'ABBOTT': _abbott,
+    'AJBELL': _ajbell,
+    'ADEPT': _adept,
+    'ASH_WASTE': _ash_waste,
+    'ALLIANCE': _alliance,
+    'VALLEY': _valley
+}
+
+# Text that breaks validation, or adds an exclusion marker, per supplier
+INVALID_EDITS = {
+    'ABBOTT': ("INVOICE", "CREDIT NOTE"),
+    'AJBELL': ("FEE INVOICE", "FEE SUMMARY"),
+    'ADEPT': ("Invoice", "Quotation"),
+    'ASH_WASTE': ("ASH Waste Services Ltd", "ASH Skip Hire Ltd"),
+    'ALLIANCE': ("STATEMENT OF ACCOUNT", "ACCOUNT SUMMARY"),
+    'VALLEY': ("INVOICE FOR", "ORDER FOR")
+}
+EXCLUSION_LINES = {
+    'ABBOTT': "REMITTANCE ADVICE",
+    'AJBELL': "REMITTANCE",
+    'ADEPT': "Statement",
+    'ASH_WASTE': "Statement",
+    'ALLIANCE': "NO OUTSTANDING ITEMS",
+    'VALLEY': "CREDIT NOTE"
+}
+
+
+def make_document(supplier_code: str, n: int, seed: int = 0) -> dict:
+    """Describe synthetic document n for a supplier; the same seed gives the same document"""
+    rng = random.Random(f"{seed}:{supplier_code}:{n}")
+    filename, lines, expected = SUPPLIER_TEMPLATES[supplier_code](n, rng)
+    kind = 'valid'
+    roll = rng.random()
+    if roll < INVALID_RATE:
+        old, new = INVALID_EDITS[supplier_code]
+        lines = [line.replace(old, new) for line in lines]
+        kind = 'invalid'
+    elif roll < INVALID_RATE + EXCLUDED_RATE:
+        lines = lines + [EXCLUSION_LINES[supplier_code]]
+        kind = 'excluded'
+    return {
+        'supplier_code': supplier_code,
+        'relative_path': str(Path(SUPPLIER_FOLDERS[supplier_code]) / PERIOD_FOLDERS[n % 12] / filename),
+        'lines': lines,
+        'kind': kind,
+        'expected': expected if kind == 'valid' else {}
+    }
+
+
+def write_pdf(path: Path, lines: List[str]):
+    doc = fitz.open()
+    page = doc.new_page()
+    y = 72
+    for line in lines:
+        page.insert_text((50, y), line, fontsize=10)
+        y += 16
+    doc.save(str(path))
+    doc.close()
+
+
+def _write_batch(root: str, documents: List[dict]):
+    for document in documents:
+        path = Path(root) / document['relative_path']
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_pdf(path, document['lines'])
+
+
+def generate_corpus(root: Path, count: int, seed: int = 0, suppliers: Optional[List[str]] = None,
+                    workers: int = 1) -> List[dict]:
+    """Write count synthetic invoices under root, split evenly across suppliers.
+
+    Files go to root/<supplier folder>/<period folder>/, like the invoice
+    share. A corpus.jsonl manifest with each document's kind and expected
+    field values is written alongside.
+    """
+    root = Path(root)
+    suppliers = suppliers or list(SUPPLIER_TEMPLATES)
+    documents = [make_document(suppliers[i % len(suppliers)], i // len(suppliers), seed)
+                 for i in range(count)]
+
+    batches = [documents[i:i + 500] for i in range(0, len(documents), 500)]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(_write_batch, [str(root)] * len(batches), batches))
+    else:
+        for batch in batches:
+            _write_batch(str(root), batch)
+
+    with open(root / MANIFEST_NAME, 'w', encoding='utf-8') as f:
+        for document in documents:
+            entry = {key: document[key] for key in ('supplier_code', 'relative_path', 'kind', 'expected')}
+            f.write(json.dumps(entry) + "\n")
+    return documents
+
+
+def load_manifest(root: Path) -> Dict[str, dict]:
+    """Return manifest entries keyed by absolute file path"""
+    root = Path(root)
+    entries = {}
+    with open(root / MANIFEST_NAME, 'r', encoding='utf-8') as f:
+        for line in f:
+            entry = json.loads(line)
+            entries[str(root / entry['relative_path'])] = entry
+    return entries
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write synthetic supplier invoices for offline benchmarking")
+    parser.add_argument("output", type=Path, help="Folder to write the synthetic share into")
+    parser.add_argument("--count", type=int, default=1000, help="Number of PDFs (default 1000)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the generated values")
+    parser.add_argument("--suppliers", nargs="+", choices=list(SUPPLIER_TEMPLATES),
+                        help="Supplier codes to generate (default: all)")
+    parser.add_argument("--workers", type=int, default=1, help="Processes used to write PDFs")
+    args = parser.parse_args()
+
+    if args.output.exists() and any(args.output.iterdir()):
+        print(f"Error: {args.output} is not empty")
+        sys.exit(1)
+    documents = generate_corpus(args.output, args.count, args.seed, args.suppliers, args.workers)
+    print(f"Wrote {len(documents)} PDFs to {args.output}")
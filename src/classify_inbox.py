@@ -0,0 +1,86 @@
+import sys
+import argparse
+from pathlib import Path
+import pandas as pd
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from supplier_configs.supplier_configs import SupplierConfigManager
+from supplier_configs.classifier import SupplierClassifier
+from utils.text_cache import get_page_text
+from utils.ledger import InvoiceLedger
+
+def classify_folder(folder: Path, classifier: SupplierClassifier) -> pd.DataFrame:
+    """Classify every PDF under a mixed inbox folder"""
+    rows = []
+    for pdf_file in sorted(Path(folder).rglob('*.pdf')):
+        try:
+            result = classifier.classify(get_page_text(pdf_file))
+            if result.supplier_code:
+                outcome = result.supplier_code
+            elif result.is_ambiguous:
+                outcome = 'AMBIGUOUS'
+            else:
+                outcome = 'UNKNOWN'
+            rows.append({
+                'Full Path': str(pdf_file),
+                'Supplier': outcome,
+                'Candidates': ', '.join(result.candidates),
+                'Excluded By': ', '.join(result.excluded)
+            })
+        except Exception as e:
+            rows.append({'Full Path': str(pdf_file), 'Supplier': 'ERROR',
+                         'Candidates': '', 'Excluded By': str(e)})
+    return pd.DataFrame(rows, columns=['Full Path', 'Supplier', 'Candidates', 'Excluded By'])
+
+def find_misfiled(excel_path: Path, config_manager: SupplierConfigManager,
+                  classifier: SupplierClassifier) -> pd.DataFrame:
+    """List rows on a configured supplier's sheet whose PDF classifies as another supplier"""
+    ledger = InvoiceLedger.for_workbook(excel_path)
+    rows = []
+    for code, config in config_manager.configs.items():
+        sheet_name = ledger.find_sheet(config.sheet_identifier)
+        if not sheet_name:
+            continue
+        for file_path in ledger.get_paths(sheet_name):
+            try:
+                result = classifier.classify(get_page_text(file_path))
+            except Exception as e:
+                print(f"Error reading {Path(file_path).name}: {str(e)}")
+                continue
+            if result.supplier_code and result.supplier_code != code:
+                rows.append({
+                    'Sheet': sheet_name,
+                    'Full Path': file_path,
+                    'Filed Under': code,
+                    'Looks Like': result.supplier_code
+                })
+    return pd.DataFrame(rows, columns=['Sheet', 'Full Path', 'Filed Under', 'Looks Like'])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Route PDFs to suppliers using every config's markers")
+    parser.add_argument("--inbox", type=Path, help="Folder of unsorted PDFs to classify")
+    parser.add_argument("--check-workbook", type=Path, help="Invoice_Summary.xlsx to scan for misfiled PDFs")
+    parser.add_argument("--output", type=Path, help="Optional CSV file for the results")
+    args = parser.parse_args()
+
+    config_manager = SupplierConfigManager()
+    classifier = SupplierClassifier(config_manager.configs)
+
+    if args.inbox:
+        results = classify_folder(args.inbox, classifier)
+        print(f"\nClassified {len(results)} files")
+        print(results['Supplier'].value_counts().to_string())
+    elif args.check_workbook:
+        results = find_misfiled(args.check_workbook, config_manager, classifier)
+        print(f"\nFound {len(results)} possibly misfiled PDFs")
+    else:
+        parser.error("one of --inbox or --check-workbook is required")
+
+    if not results.empty:
+        print(results.to_string(index=False))
+    if args.output:
+        results.to_csv(args.output, index=False)
+        print(f"\nResults written to {args.output}")
@@ -1,11 +1,13 @@
 import os
 import sys
 from pathlib import Path
-import fitz
+import numpy as np
 import pandas as pd
-import logging
-import re
+import time
+from functools import partial
 from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+import argparse
 
 # Get the absolute path to the project root
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -16,10 +18,534 @@ if project_root not in sys.path:
 
 # Now import the modules
 from supplier_configs.supplier_configs import SupplierConfigManager
+from supplier_configs.extraction import DEFAULT_MATCH_BUDGET, SOURCE_FILENAME, get_extractor
 from utils.logging_utils import InvoiceProcessingLogger
+from utils.text_cache import get_page_texts, lookup_page_texts, open_document
+from utils.pipeline import (INLINE, PROCESS, THREAD, DEFAULT_QUEUE_SIZE, ByteBudget, PipelineStage,
+                            run_pipeline)
+from utils.results_journal import ResultsJournal
+from utils.ledger import InvoiceLedger
+from utils.ocr_triage import looks_empty, needs_ocr
+from utils.scan_manifest import ScanManifest
 
-def process_supplier_invoices(supplier_code: str, excel_path: Path):
-    """Process all invoices for a specific supplier"""
+# Define column mapping
+COLUMN_MAPPING = {
+    'invoice_number': 'Invoice/Tax Point Number',
+    'invoice_date': 'Invoice Date',
+    'reference_number': 'Reference Number',
+    'pre_vat_total': 'Pre-VAT Total',
+    'total_amount': 'Total Amount'
+}
+
+# Per-row outcome codes, stored in one int8 array per sheet
+OUTCOMES = ('pending', 'done', 'invalid', 'excluded', 'low_confidence', 'updated', 'error', 'needs_ocr')
+OUTCOME_CODES = {outcome: code for code, outcome in enumerate(OUTCOMES)}
+
+# Threads reading PDFs off the share ahead of extraction, and the most
+# bytes they may hold in memory before extraction catches up
+DEFAULT_PREFETCH_THREADS = 4
+DEFAULT_READ_AHEAD_BYTES = 64 * 1024 * 1024
+
+def error_result(file_path: str, error: Exception) -> dict:
+    return {
+        'file_path': file_path,
+        'status': 'error',
+        'data': {},
+        'confidence_score': 0.0,
+        'error': str(error)
+    }
+
+def match_invoice_text(file_path: str, text: str, config_dict: dict,
+                       timings: Optional[dict] = None,
+                       region_texts: Optional[Dict[str, str]] = None,
+                       document=None) -> dict:
+    """Check markers and run the supplier patterns on one invoice's first page text.
+    
+    Fields with a clip region are matched against region_texts instead.
+    Fields set to other pages are looked for through document, if given.
+    """
+    result = {
+        'file_path': file_path,
+        'status': 'matched',
+        'data': {},
+        'confidence_score': 0.0,
+        'error': None,
+        'timed_out_fields': []
+    }
+    
+    extractor = get_extractor(config_dict)
+    
+    # Check validation and exclusion markers
+    start = time.perf_counter()
+    if not extractor.is_valid(text):
+        result['status'] = 'invalid'
+    elif extractor.is_excluded(text):
+        result['status'] = 'excluded'
+    if timings is not None:
+        timings['marker_checks'] = time.perf_counter() - start
+    if result['status'] != 'matched':
+        return result
+    
+    # Extract data using patterns
+    extraction = extractor.extract(text, Path(file_path).name, timings, DEFAULT_MATCH_BUDGET,
+                                   region_texts, document)
+    result['data'] = extraction.data
+    result['confidence_score'] = extraction.confidence_score
+    result['timed_out_fields'] = extraction.timed_out_fields
+    return result
+
+def read_invoice_bytes(file_path: str) -> bytes:
+    with open(file_path, 'rb') as f:
+        return f.read()
+
+def invoice_size(item: dict) -> int:
+    """Bytes a prefetched invoice will hold, for the read-ahead budget"""
+    try:
+        return os.path.getsize(item['file_path'])
+    except OSError:
+        return 0
+
+def retained_invoice_size(item: dict) -> int:
+    """Bytes extraction passes on to matching: a prefetched PDF whose later pages may be read"""
+    data = item.get('data')
+    return len(data) if data is not None and get_extractor(item['config_dict']).pages else 0
+
+def prefetch_invoice(item: dict, reader=read_invoice_bytes) -> dict:
+    """Pipeline stage: take the invoice's text from the cache, or read its bytes off the share
+    
+    Cached text too short to be an invoice still has its bytes read here, as
+    extraction triages the PDF for OCR.
+    """
+    file_path = item['file_path']
+    try:
+        regions = get_extractor(item['config_dict']).regions
+        cached = lookup_page_texts(file_path, clips=regions)
+        if cached is not None:
+            item['text'], item['region_texts'] = cached
+        if cached is None or looks_empty(item['text']):
+            start = time.perf_counter()
+            item['data'] = reader(file_path)
+            item['timings']['file_read'] = time.perf_counter() - start
+    except Exception as e:
+        item['result'] = error_result(file_path, e)
+    return item
+
+def needs_ocr_result(file_path: str) -> dict:
+    return {
+        'file_path': file_path,
+        'status': 'needs_ocr',
+        'data': {},
+        'confidence_score': 0.0,
+        'error': None
+    }
+
+def extract_invoice_text(item: dict) -> dict:
+    """Pipeline stage: extract page text, plus the clip text of any field with a region
+    
+    A first page with next to no text is triaged from the PDF's metadata,
+    and a scan with no text layer skips marker and pattern checks. The PDF's
+    bytes are passed on to matching only for suppliers with fields on later
+    pages, so those pages are read without going back to the share.
+    """
+    data = item.pop('data', None)
+    if 'result' in item:
+        return item
+    file_path = item['file_path']
+    try:
+        if 'text' not in item:
+            regions = get_extractor(item['config_dict']).regions
+            item['text'], item['region_texts'] = get_page_texts(file_path, clips=regions,
+                                                                timings=item['timings'], data=data)
+        if looks_empty(item['text']):
+            start = time.perf_counter()
+            if needs_ocr(file_path, data):
+                item['result'] = needs_ocr_result(file_path)
+            item['timings']['ocr_triage'] = time.perf_counter() - start
+        if data is not None and 'result' not in item and get_extractor(item['config_dict']).pages:
+            item['data'] = data
+    except Exception as e:
+        item['result'] = error_result(file_path, e)
+    return item
+
+def match_invoice(item: dict) -> dict:
+    """Pipeline stage: check markers and run the patterns; returns the result
+    
+    Later pages are only read, through the page text cache, for suppliers
+    with fields set to other pages, and only while one of those is missing.
+    """
+    result = item.get('result')
+    if result is None:
+        extractor = get_extractor(item['config_dict'])
+        data = item.pop('data', None)
+        document = (open_document(item['file_path'], extractor.regions, item['timings'], data)
+                    if extractor.pages else None)
+        try:
+            result = match_invoice_text(item['file_path'], item['text'], item['config_dict'],
+                                        item['timings'], item['region_texts'], document)
+        except Exception as e:
+            result = error_result(item['file_path'], e)
+        finally:
+            if document is not None:
+                document.close()
+    result['timings'] = item['timings']
+    return result
+
+def new_pipeline_item(file_path: str, config_dict: dict) -> dict:
+    return {'file_path': file_path, 'config_dict': config_dict, 'timings': {}}
+
+def extract_invoice_data(file_path: str, config_dict: dict) -> dict:
+    """Open one invoice, check markers and run the supplier patterns.
+    
+    Runs every pipeline stage in turn on one file, so it only takes and
+    returns plain data. Stage durations are returned under 'timings' for
+    the caller's logger.
+    """
+    item = new_pipeline_item(file_path, config_dict)
+    return match_invoice(extract_invoice_text(prefetch_invoice(item)))
+
+def extraction_stages(workers: int = 1, prefetch: int = DEFAULT_PREFETCH_THREADS,
+                      match_workers: Optional[int] = None,
+                      queue_size: int = DEFAULT_QUEUE_SIZE,
+                      read_ahead_bytes: int = DEFAULT_READ_AHEAD_BYTES,
+                      reader=read_invoice_bytes) -> List[PipelineStage]:
+    """Stages from a pending file to its result, each with its own concurrency.
+    
+    Reads run in threads, since they mostly wait on the share, and stop
+    reading ahead once read_ahead_bytes are waiting for extraction. Extraction
+    and matching run in process pools when given more than one worker. With
+    one worker, extraction gets a single thread and matching runs in the
+    calling thread, where the match time budget can interrupt a search.
+    """
+    match_workers = workers if match_workers is None else match_workers
+    return [
+        PipelineStage('prefetch', partial(prefetch_invoice, reader=reader), prefetch, THREAD,
+                      queue_size, ByteBudget(read_ahead_bytes), invoice_size),
+        # Bytes kept for suppliers with fields on later pages count until matching is done
+        PipelineStage('extraction', extract_invoice_text, max(1, workers),
+                      PROCESS if workers > 1 else THREAD, queue_size,
+                      ByteBudget(read_ahead_bytes), retained_invoice_size),
+        PipelineStage('matching', match_invoice, match_workers,
+                      PROCESS if match_workers > 1 else INLINE, queue_size)
+    ]
+
+def iter_extraction_results(tasks: Iterable[Tuple[str, dict]], workers: int = 1,
+                            prefetch: int = DEFAULT_PREFETCH_THREADS,
+                            match_workers: Optional[int] = None,
+                            queue_size: int = DEFAULT_QUEUE_SIZE,
+                            read_ahead_bytes: int = DEFAULT_READ_AHEAD_BYTES,
+                            reader=read_invoice_bytes):
+    """Yield results for (file_path, config_dict) tasks in input order.
+    
+    Tasks stream through bounded prefetch, extraction and matching stages,
+    so reading the next PDFs overlaps with extracting and matching earlier
+    ones and only a few queues' worth of files are held at once. The caller
+    is the result sink and applies results in order. reader loads a file's
+    bytes; benchmarks swap in a slow one to stand in for the share.
+    """
+    items = (new_pipeline_item(file_path, config_dict) for file_path, config_dict in tasks)
+    stages = extraction_stages(workers, prefetch, match_workers, queue_size, read_ahead_bytes, reader)
+    yield from run_pipeline(items, stages)
+
+def find_supplier_sheet(sheet_names: List[str], config) -> Optional[str]:
+    """Return the first sheet whose name contains the supplier's identifier"""
+    for sheet_name in sheet_names:
+        if config.sheet_identifier in sheet_name.lower():
+            return sheet_name
+    return None
+
+def prepare_sheet(df: pd.DataFrame) -> pd.DataFrame:
+    """Make the extracted columns accept text values.
+    
+    Columns with no values yet are read as float64, which rejects strings.
+    """
+    for excel_column in COLUMN_MAPPING.values():
+        if excel_column in df.columns:
+            df[excel_column] = df[excel_column].astype(object)
+    return df
+
+def collect_pending(df: pd.DataFrame, stats: dict, skip_paths=()) -> List[Tuple[int, str]]:
+    """Return (index, path) for rows that still need extracting.
+    
+    Rows with both Invoice Date and Total Amount are marked done in the
+    outcome array instead of being dispatched. Rows that already have an
+    outcome, e.g. replayed from the journal, keep it.
+    """
+    pending = stats['outcomes'] == OUTCOME_CODES['pending']
+    done = pending & (df['Invoice Date'].notna() & df['Total Amount'].notna()).to_numpy()
+    stats['outcomes'][done] = OUTCOME_CODES['done']
+    if done.any():
+        print(f"Skipping {int(done.sum())} already processed files")
+    
+    pending &= ~done
+    if skip_paths:
+        pending &= ~df['Full Path'].isin(skip_paths).to_numpy()
+    positions = np.flatnonzero(pending)
+    return list(zip(df.index[positions], df['Full Path'].iloc[positions]))
+
+def split_duplicates(df: pd.DataFrame, pending: List[Tuple[int, str]], hashes: Dict[str, str],
+                     stats: dict) -> Tuple[List[Tuple[int, str]], Dict[int, List[Tuple[int, str]]]]:
+    """Keep one pending row per document; return those rows and the copies of each.
+    
+    hashes maps paths to content hashes from the scan manifest. A copy of a
+    row that is already processed takes that row's values now. Other copies
+    wait for the result of the first pending row with the same content.
+    """
+    if not hashes:
+        return pending, {}
+    # Rows whose values can be copied: processed before, or resumed from the journal
+    filled = np.isin(stats['outcomes'], [OUTCOME_CODES['done'], OUTCOME_CODES['updated']])
+    sources = {}
+    for index, file_path in zip(df.index[filled], df['Full Path'][filled]):
+        sources.setdefault(hashes.get(file_path), index)
+    sources.pop(None, None)
+    
+    unique, copies, leaders, copied = [], {}, {}, 0
+    for index, file_path in pending:
+        content_hash = hashes.get(file_path)
+        if content_hash in sources:
+            for excel_column in COLUMN_MAPPING.values():
+                df.at[index, excel_column] = df.at[sources[content_hash], excel_column]
+            stats['outcomes'][df.index.get_loc(index)] = OUTCOME_CODES['updated']
+            copied += 1
+        elif content_hash in leaders:
+            copies.setdefault(leaders[content_hash], []).append((index, file_path))
+        else:
+            if content_hash is not None:
+                leaders[content_hash] = index
+            unique.append((index, file_path))
+    
+    stats['duplicates'] += copied + sum(len(rows) for rows in copies.values())
+    if copied:
+        print(f"Copied values for {copied} files from processed copies of the same document")
+    if copies:
+        print(f"Extracting {len(unique)} unique documents; "
+              f"{sum(len(rows) for rows in copies.values())} copies will share their results")
+    return unique, copies
+
+def find_duplicates(ledger: InvoiceLedger, df: pd.DataFrame, pending: List[Tuple[int, str]],
+                    config, stats: dict) -> Tuple[List[Tuple[int, str]], Dict[int, List[Tuple[int, str]]]]:
+    """split_duplicates with content hashes from the scan manifest stored in the ledger.
+    
+    If any of the supplier's fields is read from the file name, a renamed
+    copy, e.g. with "(1)" added, can give a different result, so only copies
+    with the same name count as duplicates.
+    """
+    hashes = ScanManifest(ledger.conn).content_hashes(df['Full Path'].dropna())
+    if SOURCE_FILENAME in get_extractor(config.to_dict()).sources.values():
+        hashes = {path: f"{content_hash}/{os.path.basename(path)}" for path, content_hash in hashes.items()}
+    return split_duplicates(df, pending, hashes, stats)
+
+def skip_needs_ocr(ledger: InvoiceLedger, df: pd.DataFrame, stats: dict):
+    """Give rows flagged as scans by an earlier run the needs_ocr outcome, so they are not extracted"""
+    pending = stats['outcomes'] == OUTCOME_CODES['pending']
+    flagged = ScanManifest(ledger.conn).needs_ocr_paths(df['Full Path'][pending].dropna())
+    if flagged:
+        stats['outcomes'][pending & df['Full Path'].isin(flagged).to_numpy()] = OUTCOME_CODES['needs_ocr']
+        print(f"Skipping {len(flagged)} scanned files waiting for OCR")
+
+def flag_needs_ocr(ledger: InvoiceLedger, df: pd.DataFrame, stats: dict):
+    """Store the needs-OCR flag for rows found to be scans, so later runs skip them"""
+    scanned = stats['outcomes'] == OUTCOME_CODES['needs_ocr']
+    if scanned.any():
+        ScanManifest(ledger.conn).mark_needs_ocr(df['Full Path'][scanned])
+
+def apply_copies(df: pd.DataFrame, copies: List[Tuple[int, str]], result: dict, config,
+                 stats: dict) -> List[dict]:
+    """Give copies of a document its result; return their results for the journal"""
+    copy_results = []
+    for index, file_path in copies:
+        copy_result = dict(result, file_path=file_path)
+        record_result(df, index, copy_result, config, stats)
+        copy_results.append(copy_result)
+    return copy_results
+
+def record_result(df: pd.DataFrame, index: int, result: dict, config, stats: dict) -> str:
+    """Apply one extraction result to the DataFrame and stats; return its outcome"""
+    if result['status'] in ('error', 'invalid', 'excluded', 'needs_ocr'):
+        outcome = result['status']
+    elif result['confidence_score'] < config.high_confidence_threshold:
+        outcome = 'low_confidence'
+    else:
+        # Update DataFrame using column mapping
+        for field, value in result['data'].items():
+            excel_column = COLUMN_MAPPING.get(field)
+            if excel_column and excel_column in df.columns:
+                df.at[index, excel_column] = value
+            else:
+                print(f"Warning: Column '{excel_column}' not found in Excel sheet")
+        outcome = 'updated'
+    stats['outcomes'][df.index.get_loc(index)] = OUTCOME_CODES[outcome]
+    return outcome
+
+def count_outcomes(stats: dict) -> Dict[str, int]:
+    """Count rows per outcome in one pass over the outcome array"""
+    counts = np.bincount(stats['outcomes'], minlength=len(OUTCOMES))
+    return {outcome: int(count) for outcome, count in zip(OUTCOMES, counts)}
+
+def apply_result(df: pd.DataFrame, index: int, result: dict, config, stats: dict,
+                 logger: InvoiceProcessingLogger):
+    """Record one extraction result in the supplier DataFrame"""
+    file_name = Path(result['file_path']).name
+    print(f"\nProcessing {index + 1}/{stats['total_files']}: {file_name}")
+    
+    # Worker timings are logged rather than journaled
+    timings = result.pop('timings', {})
+    logger.record_timings(timings)
+    stats['extracted'] += 1
+    for stage, seconds in timings.items():
+        stats['stage_seconds'][stage] = stats['stage_seconds'].get(stage, 0.0) + seconds
+    with logger.time_stage('dataframe_update'):
+        outcome = record_result(df, index, result, config, stats)
+    if result.get('timed_out_fields'):
+        logger.warning(f"Match time budget ran out for {file_name}; gave up on: "
+                       f"{', '.join(result['timed_out_fields'])}")
+    if outcome == 'error':
+        logger.log_failed_file(file_name, result['error'])
+    elif outcome == 'invalid':
+        print(f"Skipping invalid file: {file_name}")
+    elif outcome == 'excluded':
+        print(f"Skipping excluded file: {file_name}")
+    elif outcome == 'needs_ocr':
+        print(f"Scanned file with no text, queued for OCR: {file_name}")
+    elif outcome == 'updated':
+        print(f"Successfully updated data for {file_name}")
+
+def replay_journal(df: pd.DataFrame, entries: Dict[str, dict], config, stats: dict) -> set:
+    """Apply results journaled by an interrupted run; return the paths they cover.
+    
+    Errors are not replayed, so those files are tried again.
+    """
+    row_index = {file_path: index for index, file_path in df['Full Path'].items()}
+    resumed = set()
+    for file_path, entry in entries.items():
+        if entry['status'] == 'error' or file_path not in row_index:
+            continue
+        record_result(df, row_index[file_path], entry, config, stats)
+        resumed.add(file_path)
+    if resumed:
+        print(f"Resumed {len(resumed)} results from the journal of an interrupted run")
+    return resumed
+
+def save_sheets(ledger: InvoiceLedger, excel_path: Path, sheets: Dict[str, pd.DataFrame],
+                export: bool = True):
+    """Write updated supplier sheets to the ledger, then re-export the workbook once"""
+    for sheet_name, df in sheets.items():
+        ledger.write_sheet(sheet_name, df)
+    if export:
+        ledger.export_workbook(excel_path)
+
+def record_run_stats(config_manager: SupplierConfigManager, supplier_code: str,
+                     start_time: datetime, stats: dict, wall_seconds: float = 0.0,
+                     run_info: Optional[dict] = None):
+    """Add this run to the supplier's run history.
+    
+    wall_seconds is the time spent on the supplier's files; stage times are
+    the summed per-file timings reported by the extraction stages.
+    """
+    total_files = stats['total_files']
+    counts = count_outcomes(stats)
+    successful_updates = counts['updated']
+    run_stats = {
+        'run_date': start_time.strftime("%Y-%m-%d %H:%M:%S"),
+        'total_processed': total_files,
+        'success_rate': (successful_updates / total_files) * 100 if total_files > 0 else 0,
+        'config_hash': config_manager.configs[supplier_code].config_hash(),
+        'files_extracted': stats['extracted'],
+        'duplicates': stats['duplicates'],
+        'wall_seconds': round(wall_seconds, 3),
+        'files_per_second': stats['extracted'] / wall_seconds if wall_seconds > 0 else 0.0,
+        'stage_seconds': {stage: round(seconds, 4) for stage, seconds in stats['stage_seconds'].items()},
+        'outcomes': counts
+    }
+    run_stats.update(run_info or {})
+    config_manager.update_config_stats(supplier_code, run_stats)
+
+def write_run_log(logger: InvoiceProcessingLogger, sheet_stats: Dict[str, dict], extra: dict):
+    """Copy outcome counts into the logger and write its JSON timing summary"""
+    outcomes = {name: count_outcomes(stats) for name, stats in sheet_stats.items()}
+    for counts in outcomes.values():
+        logger.stats['total_processed'] += sum(counts.values()) - counts['done'] - counts['pending']
+        logger.stats['successful_updates'] += counts['updated']
+        logger.stats['skipped_files'] += (counts['done'] + counts['invalid'] + counts['excluded']
+                                          + counts['needs_ocr'])
+        logger.stats['review_needed'] += counts['low_confidence']
+        logger.stats['errors'] += counts['error']
+    logger.stop_profiling()
+    logger.write_json_summary(dict(extra, outcomes=outcomes))
+
+def print_debug_summary(config, df: pd.DataFrame, stats: dict):
+    total_files = stats['total_files']
+    counts = count_outcomes(stats)
+    successful_updates = counts['updated']
+    processed = total_files - counts['done'] - counts['pending']
+    
+    print("\n" + "="*50)
+    print("DEBUG SUMMARY")
+    print("="*50)
+
+    print("\nConfiguration Used:")
+    print(f"Name: {config.name}")
+    print(f"Sheet identifier: {config.sheet_identifier}")
+    print(f"Validation markers: {list(config.validation_markers)}")
+    print(f"Exclusion markers: {list(config.exclusion_markers)}")
+    print("\nPatterns:")
+    for field, pattern in config.patterns.items():
+        print(f"  {field}: {pattern}")
+
+    print("\nExcel Column Mapping:")
+    for field, excel_col in COLUMN_MAPPING.items():
+        if excel_col in df.columns:
+            print(f"✓ {field} -> {excel_col}")
+        else:
+            print(f"✗ {field} -> {excel_col} (not found)")
+
+    print("\nProcessing Statistics:")
+    print(f"Total files found: {total_files}")
+    print(f"Files skipped (already processed): {counts['done']}")
+    print(f"Files skipped (validation markers): {counts['invalid']}")
+    print(f"Files skipped (exclusion markers): {counts['excluded']}")
+    print(f"Files skipped (scanned, needs OCR): {counts['needs_ocr']}")
+    print(f"Files below confidence threshold: {counts['low_confidence']}")
+    print(f"Files with errors: {counts['error']}")
+    print(f"Duplicate copies (not extracted): {stats['duplicates']}")
+    print(f"Files processed: {processed}")
+    print(f"Successful updates: {successful_updates}")
+    print(f"Success rate: {(successful_updates/total_files)*100 if total_files > 0 else 0:.2f}%")
+
+    print("\n" + "="*50)
+    print("END DEBUG SUMMARY")
+    print("="*50)
+
+    # Then continue with your existing final summary
+    print(f"\nProcessing completed for {config.name}")
+    print(f"Total files processed: {total_files}")
+    print(f"Successfully updated: {successful_updates}")
+
+def new_sheet_stats(total_files: int) -> dict:
+    return {
+        'total_files': total_files,
+        'outcomes': np.zeros(total_files, dtype=np.int8),
+        # Files extracted in this run, and their summed stage timings
+        'extracted': 0,
+        # Copies of another row's document, given its result without extracting
+        'duplicates': 0,
+        'stage_seconds': {}
+    }
+
+def process_supplier_invoices(supplier_code: str, excel_path: Path, workers: int = 1,
+                              export: bool = True, profile: bool = False,
+                              prefetch: int = DEFAULT_PREFETCH_THREADS,
+                              match_workers: Optional[int] = None,
+                              queue_size: int = DEFAULT_QUEUE_SIZE,
+                              read_ahead_bytes: int = DEFAULT_READ_AHEAD_BYTES):
+    """Process all invoices for a specific supplier
+    
+    Pending files stream through the read, extract and match stages of
+    iter_extraction_results; with workers > 1 extraction and matching run in
+    process pools. Only this process touches the DataFrame and the workbook. Stage timings,
+    and a cProfile capture if profile is set, go to a JSON summary next to
+    the log file.
+    """
     # Initialize config manager
     config_manager = SupplierConfigManager()
     
@@ -28,174 +554,232 @@ def process_supplier_invoices(supplier_code: str, excel_path: Path):
         return
     
     config = config_manager.configs[supplier_code]
+    config_dict = config.to_dict()
     logger = InvoiceProcessingLogger(config.name)
+    if profile:
+        logger.start_profiling()
     
     try:
         print(f"\nStarting processing for {config.name}")
         start_time = datetime.now()
+        run_start = time.perf_counter()
         
-        # Load Excel file
-        xl = pd.ExcelFile(excel_path)
-        supplier_sheet = None
-        
-        # Find supplier sheet
-        for sheet_name in xl.sheet_names:
-            if config.sheet_identifier in sheet_name.lower():
-                supplier_sheet = sheet_name
-                break
+        # Load the supplier's rows from the ledger
+        ledger = InvoiceLedger.for_workbook(excel_path)
+        supplier_sheet = find_supplier_sheet(ledger.sheet_names(), config)
         
         if not supplier_sheet:
             print(f"Sheet not found for {config.name}")
             return
         
+        df = prepare_sheet(ledger.read_sheet(supplier_sheet))
+        
         # Process files
-        df = pd.read_excel(xl, supplier_sheet)
-        total_files = len(df)
-        successful_updates = 0
-        print(f"Found {total_files} files to process")
+        stats = new_sheet_stats(len(df))
+        print(f"Found {stats['total_files']} files to process")
+        if workers > 1:
+            print(f"Using {workers} worker processes")
+        
+        # Each result goes to the journal as it is produced; the workbook is written once
+        journal = ResultsJournal.for_workbook(excel_path)
+        resumed = replay_journal(df, journal.load_sheet(supplier_sheet), config, stats)
+        skip_needs_ocr(ledger, df, stats)
+        
+        pending, copies = find_duplicates(ledger, df, collect_pending(df, stats, resumed), config, stats)
+        tasks = ((file_path, config_dict) for _, file_path in pending)
+        results = iter_extraction_results(tasks, workers, prefetch, match_workers, queue_size,
+                                          read_ahead_bytes)
+        
+        try:
+            for (index, file_path), result in zip(pending, results):
+                apply_result(df, index, result, config, stats, logger)
+                journal.append(supplier_sheet, result)
+                for copy_result in apply_copies(df, copies.get(index, []), result, config, stats):
+                    journal.append(supplier_sheet, copy_result)
+        finally:
+            journal.close()
+        
+        # Final save
+        flag_needs_ocr(ledger, df, stats)
+        with logger.time_stage('workbook_save'):
+            save_sheets(ledger, excel_path, {supplier_sheet: df}, export)
+        journal.discard([supplier_sheet])
         
-        for index, row in df.iterrows():
-            file_path = row['Full Path']
+        record_run_stats(config_manager, supplier_code, start_time, stats, time.perf_counter() - run_start,
+                         {'mode': 'single', 'workers': workers})
+        print_debug_summary(config, df, stats)
+        write_run_log(logger, {supplier_sheet: stats},
+                      {'supplier_code': supplier_code, 'workers': workers, 'prefetch': prefetch})
+        
+    except Exception as e:
+        logger.stop_profiling()
+        print(f"Error in main process: {str(e)}")
+
+def process_all_suppliers(excel_path: Path, workers: int = 1, export: bool = True,
+                          profile: bool = False, prefetch: int = DEFAULT_PREFETCH_THREADS,
+                          match_workers: Optional[int] = None,
+                          queue_size: int = DEFAULT_QUEUE_SIZE,
+                          read_ahead_bytes: int = DEFAULT_READ_AHEAD_BYTES,
+                          streaming: bool = False):
+    """Process every configured supplier from a single workbook load.
+    
+    Pending rows from all supplier sheets go through one extraction run and
+    every updated sheet is written back in one final save. With streaming,
+    suppliers are loaded, extracted and stored in the ledger one at a time
+    instead, so peak memory is one sheet's rows; the workbook is still
+    exported once at the end.
+    """
+    config_manager = SupplierConfigManager()
+    logger = InvoiceProcessingLogger("ALL_SUPPLIERS")
+    if profile:
+        logger.start_profiling()
+    
+    try:
+        start_time = datetime.now()
+        jobs = {}
+        
+        # Open the ledger once for every supplier
+        ledger = InvoiceLedger.for_workbook(excel_path)
+        sheet_names = ledger.sheet_names()
+        for supplier_code, config in config_manager.configs.items():
+            supplier_sheet = find_supplier_sheet(sheet_names, config)
+            if not supplier_sheet:
+                print(f"Sheet not found for {config.name}")
+                continue
+            if any(job['sheet'] == supplier_sheet for job in jobs.values()):
+                print(f"Skipping {config.name}: sheet '{supplier_sheet}' is already claimed by another supplier")
+                continue
+            jobs[supplier_code] = {'config': config, 'sheet': supplier_sheet}
+        
+        journal = ResultsJournal.for_workbook(excel_path)
+        journaled = journal.load()
+        groups = [[supplier_code] for supplier_code in jobs] if streaming else [list(jobs)]
+        saved_sheets = 0
+        if workers > 1:
+            print(f"Using {workers} worker processes")
+        
+        for group in groups:
+            group_start = time.perf_counter()
+            # Schedule the group's pending rows through one extraction run
+            schedule = []
+            for supplier_code in group:
+                job = jobs[supplier_code]
+                job['df'] = prepare_sheet(ledger.read_sheet(job['sheet']))
+                job['stats'] = new_sheet_stats(len(job['df']))
+                print(f"\nCollecting pending files for {job['config'].name} ({job['stats']['total_files']} rows)")
+                entries = {file_path: entry for (sheet, file_path), entry in journaled.items()
+                           if sheet == job['sheet']}
+                resumed = replay_journal(job['df'], entries, job['config'], job['stats'])
+                skip_needs_ocr(ledger, job['df'], job['stats'])
+                config_dict = job['config'].to_dict()
+                pending = collect_pending(job['df'], job['stats'], resumed)
+                pending, job['copies'] = find_duplicates(ledger, job['df'], pending, job['config'], job['stats'])
+                for index, file_path in pending:
+                    schedule.append((supplier_code, index, file_path, config_dict))
             
+            print(f"\nProcessing {len(schedule)} pending files across {len(group)} suppliers")
+            tasks = ((file_path, config_dict) for _, _, file_path, config_dict in schedule)
+            results = iter_extraction_results(tasks, workers, prefetch, match_workers, queue_size,
+                                              read_ahead_bytes)
             try:
-                # Skip if already processed
-                if pd.notna(row['Invoice Date']) and pd.notna(row['Total Amount']):
-                    print(f"Skipping already processed file: {Path(file_path).name}")
-                    continue
-                
-                print(f"\nProcessing {index + 1}/{total_files}: {Path(file_path).name}")
-                
-                # Extract data using supplier-specific patterns
-                doc = fitz.open(file_path)
-                text = doc[0].get_text()
-                doc.close()
-                
-                # Check validation markers
-                if not all(marker in text for marker in config.validation_markers):
-                    print(f"Skipping invalid file: {Path(file_path).name}")
-                    continue
-                
-                if any(marker in text for marker in config.exclusion_markers):
-                    print(f"Skipping excluded file: {Path(file_path).name}")
-                    continue
-                
-                # Extract data using patterns
-                data = {}
-                confidence_points = 0
-                total_checks = len(config.patterns)
-                
-                filename = Path(file_path).name
-                for field, pattern in config.patterns.items():
-                    # Check filename patterns first
-                    if field in ['invoice_number', 'reference_number']:
-                        match = re.search(pattern, filename)
-                    else:
-                        match = re.search(pattern, text)
-                    
-                    if match:
-                        data[field] = match.group(1)
-                        confidence_points += 1
-                
-                confidence_score = (confidence_points / total_checks) * 100
-                
-                # Define column mapping
-                column_mapping = {
-                    'invoice_number': 'Invoice/Tax Point Number',
-                    'invoice_date': 'Invoice Date',
-                    'reference_number': 'Reference Number',
-                    'pre_vat_total': 'Pre-VAT Total',
-                    'total_amount': 'Total Amount'
-                }
-
-                if confidence_score >= config.high_confidence_threshold:
-                    # Update DataFrame using column mapping
-                    for field, value in data.items():
-                        excel_column = column_mapping.get(field)
-                        if excel_column and excel_column in df.columns:
-                            df.at[index, excel_column] = value
-                        else:
-                            print(f"Warning: Column '{excel_column}' not found in Excel sheet")
-                    successful_updates += 1
-                    print(f"Successfully updated data for {Path(file_path).name}")
-                
-                # Save progress every 10 files
-                if (index + 1) % 10 == 0:
-                    with pd.ExcelWriter(excel_path, engine='openpyxl', mode='a', 
-                                      if_sheet_exists='replace') as writer:
-                        df.to_excel(writer, sheet_name=supplier_sheet, index=False)
-                    print(f"Progress saved after {index + 1} files")
-                
-            except Exception as e:
-                print(f"Error processing {Path(file_path).name}: {str(e)}")
+                for (supplier_code, index, _, _), result in zip(schedule, results):
+                    job = jobs[supplier_code]
+                    apply_result(job['df'], index, result, job['config'], job['stats'], logger)
+                    journal.append(job['sheet'], result)
+                    for copy_result in apply_copies(job['df'], job['copies'].get(index, []), result,
+                                                    job['config'], job['stats']):
+                        journal.append(job['sheet'], copy_result)
+            finally:
+                journal.close()
+            
+            for supplier_code in group:
+                flag_needs_ocr(ledger, jobs[supplier_code]['df'], jobs[supplier_code]['stats'])
+            # Store the group's updated sheets; the workbook is exported once at the end
+            updated_sheets = {jobs[code]['sheet']: jobs[code]['df'] for code in group
+                              if count_outcomes(jobs[code]['stats'])['updated'] > 0}
+            if updated_sheets:
+                with logger.time_stage('ledger_save'):
+                    save_sheets(ledger, excel_path, updated_sheets, export=False)
+                saved_sheets += len(updated_sheets)
+            journal.discard([jobs[code]['sheet'] for code in group])
+            
+            # A shared run's wall time is split between its suppliers by files extracted
+            group_seconds = time.perf_counter() - group_start
+            group_extracted = sum(jobs[code]['stats']['extracted'] for code in group)
+            for supplier_code in group:
+                job = jobs[supplier_code]
+                share = (job['stats']['extracted'] / group_extracted if group_extracted
+                         else 1 / len(group))
+                record_run_stats(config_manager, supplier_code, start_time, job['stats'],
+                                 group_seconds * share,
+                                 {'mode': 'streaming' if streaming else 'all', 'workers': workers})
+                print_debug_summary(job['config'], job['df'], job['stats'])
+                # Only the outcome array is kept for the run log
+                job['df'] = None
+                job['copies'] = None
         
-        # Final save
-        with pd.ExcelWriter(excel_path, engine='openpyxl', mode='a', 
-                           if_sheet_exists='replace') as writer:
-            df.to_excel(writer, sheet_name=supplier_sheet, index=False)
-        
-        # Update configuration statistics
-        stats = {
-            'run_date': start_time.strftime("%Y-%m-%d %H:%M:%S"),
-            'total_processed': total_files,
-            'success_rate': (successful_updates / total_files) * 100 if total_files > 0 else 0
-        }
-        config_manager.update_config_stats(supplier_code, stats)
-        
-        # Just before the final print statements, add this debug section:
-        print("\n" + "="*50)
-        print("DEBUG SUMMARY")
-        print("="*50)
-
-        print("\nConfiguration Used:")
-        print(f"Name: {config.name}")
-        print(f"Sheet identifier: {config.sheet_identifier}")
-        print(f"Validation markers: {config.validation_markers}")
-        print(f"Exclusion markers: {config.exclusion_markers}")
-        print("\nPatterns:")
-        for field, pattern in config.patterns.items():
-            print(f"  {field}: {pattern}")
-
-        print("\nExcel Column Mapping:")
-        for field, excel_col in column_mapping.items():
-            if excel_col in df.columns:
-                print(f"✓ {field} -> {excel_col}")
-            else:
-                print(f"✗ {field} -> {excel_col} (not found)")
-
-        print("\nProcessing Statistics:")
-        print(f"Total files found: {total_files}")
-        print(f"Files skipped (already processed): {sum(1 for _, row in df.iterrows() if pd.notna(row['Invoice Date']) and pd.notna(row['Total Amount']))}")
-        print(f"Files skipped (validation markers): {sum(1 for _, row in df.iterrows() if not all(marker in text for marker in config.validation_markers))}")
-        print(f"Files skipped (exclusion markers): {sum(1 for _, row in df.iterrows() if any(marker in text for marker in config.exclusion_markers))}")
-        print(f"Files processed: {total_files - successful_updates}")
-        print(f"Successful updates: {successful_updates}")
-        print(f"Success rate: {(successful_updates/total_files)*100 if total_files > 0 else 0:.2f}%")
-
-        print("\n" + "="*50)
-        print("END DEBUG SUMMARY")
-        print("="*50)
-
-        # Then continue with your existing final summary
-        print(f"\nProcessing completed for {config.name}")
-        print(f"Total files processed: {total_files}")
-        print(f"Successfully updated: {successful_updates}")
+        if saved_sheets:
+            if export:
+                with logger.time_stage('workbook_save'):
+                    ledger.export_workbook(excel_path)
+            print(f"\nSaved {saved_sheets} updated sheets")
+        write_run_log(logger, {job['sheet']: job['stats'] for job in jobs.values()},
+                      {'supplier_code': 'ALL', 'workers': workers, 'prefetch': prefetch,
+                       'streaming': streaming})
         
     except Exception as e:
+        logger.stop_profiling()
         print(f"Error in main process: {str(e)}")
 
 if __name__ == "__main__":
-    # Initialize config manager
-    config_manager = SupplierConfigManager()
+    parser = argparse.ArgumentParser(description="Extract invoice data into the summary workbook")
+    parser.add_argument("supplier_code", nargs="?", help="Supplier code to process")
+    parser.add_argument("--all", action="store_true",
+                        help="Process every configured supplier with one workbook load and save")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes for PDF text extraction (default: 1, one thread)")
+    parser.add_argument("--match-workers", type=int,
+                        help="Worker processes for pattern matching (default: same as --workers)")
+    parser.add_argument("--prefetch", type=int, default=DEFAULT_PREFETCH_THREADS,
+                        help=f"Threads reading PDFs ahead of extraction (default: {DEFAULT_PREFETCH_THREADS})")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE,
+                        help=f"Files each pipeline stage may hold waiting (default: {DEFAULT_QUEUE_SIZE})")
+    parser.add_argument("--read-ahead-mb", type=int, default=DEFAULT_READ_AHEAD_BYTES // (1024 * 1024),
+                        help="Most PDF bytes read ahead of extraction, in MB "
+                             f"(default: {DEFAULT_READ_AHEAD_BYTES // (1024 * 1024)})")
+    parser.add_argument("--profile", action="store_true",
+                        help="Capture a cProfile of the main process into the run's log folder")
+    parser.add_argument("--streaming", action="store_true",
+                        help="With --all, load, process and store one supplier at a time to bound memory")
+    parser.add_argument("--no-export", action="store_true",
+                        help="Update the ledger only; export the workbook later with utils/ledger.py")
+    args = parser.parse_args()
     
-    # Show available suppliers
-    print("\nAvailable suppliers:")
-    for code in config_manager.configs.keys():
-        print(f"- {code}")
+    excel_path = Path(r"C:\Users\JulianMitchell\OneDrive - Cornwells Chemists Limited\Jasper\AI PROGAMMES\INVOICE_PROJECT\Invoice_Summary.xlsx")
     
-    # Get supplier code from user
-    supplier_code = input("\nEnter supplier code from the list above: ").upper()
+    if args.all:
+        process_all_suppliers(excel_path, workers=args.workers, export=not args.no_export,
+                              profile=args.profile, prefetch=args.prefetch,
+                              match_workers=args.match_workers, queue_size=args.queue_size,
+                              read_ahead_bytes=args.read_ahead_mb * 1024 * 1024,
+                              streaming=args.streaming)
+        sys.exit(0)
     
-    excel_path = Path(r"C:\Users\JulianMitchell\OneDrive - Cornwells Chemists Limited\Jasper\AI PROGAMMES\INVOICE_PROJECT\Invoice_Summary.xlsx")
+    # Initialize config manager
+    config_manager = SupplierConfigManager()
+    
+    supplier_code = args.supplier_code.upper() if args.supplier_code else None
+    if not supplier_code:
+        # Show available suppliers
+        print("\nAvailable suppliers:")
+        for code in config_manager.configs.keys():
+            print(f"- {code}")
+        
+        # Get supplier code from user
+        supplier_code = input("\nEnter supplier code from the list above: ").upper()
     
-    process_supplier_invoices(supplier_code, excel_path)
-    
\ No newline at end of file
+    process_supplier_invoices(supplier_code, excel_path, workers=args.workers,
+                              export=not args.no_export, profile=args.profile,
+                              prefetch=args.prefetch, match_workers=args.match_workers,
+                              queue_size=args.queue_size,
+                              read_ahead_bytes=args.read_ahead_mb * 1024 * 1024)
@@ -0,0 +1,207 @@
+import argparse
+import json
+import re
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from supplier_configs.supplier_configs import SupplierConfigManager
+from supplier_configs.extraction import FieldExtractor
+from utils.text_cache import clip_key, get_default_cache
+from utils.ledger import InvoiceLedger
+
+CURRENT = 'current'
+
+
+def _percent(count: int, total: int) -> float:
+    return (count / total) * 100 if total else 0.0
+
+
+def load_candidates(candidates_file: Path, base_config: dict, include_current: bool = True) -> Dict[str, dict]:
+    """Read named candidate configs; each is laid over the supplier's saved config.
+
+    The file maps a candidate name to a config, or to just its patterns,
+    e.g. {"strict": {"patterns": {...}}, "loose": {"total_amount": "..."}}.
+    Per-field settings (patterns, sources, regions and pages) are merged
+    field by field, so a candidate only names the fields it changes; any
+    other setting replaces the saved one.
+    """
+    with open(candidates_file, 'r') as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or not data:
+        raise ValueError(f"{candidates_file} must map candidate names to configs")
+    candidates = {CURRENT: base_config} if include_current else {}
+    for name, candidate in data.items():
+        if 'patterns' not in candidate:
+            candidate = {'patterns': candidate}
+        merged = dict(base_config, **candidate)
+        for key, value in base_config.items():
+            if isinstance(value, dict) and isinstance(candidate.get(key), dict):
+                merged[key] = dict(value, **candidate[key])
+        candidates[name] = merged
+    return candidates
+
+
+def run_tournament(candidates: Dict[str, dict], invoice_paths: List[str], extract: bool = False) -> dict:
+    """Run every candidate over every cached invoice in one pass over the page text cache.
+
+    Each document's first page is read once and all candidates are matched
+    against it. Per candidate and field the report gives the hit rate, the
+    ambiguity rate (the pattern matched more than one distinct value) and
+    the disagreement rate (the value taken is not the one most candidates
+    took from the same document, or there is no clear majority). Rates are
+    over the documents that pass the candidate's validation and exclusion
+    markers. Documents not in the cache are skipped, unless extract is set,
+    when their PDFs are read into it.
+    """
+    extractors = {name: FieldExtractor.from_config(config) for name, config in candidates.items()}
+    clips = {clip_key(rect): rect for extractor in extractors.values() for rect in extractor.regions.values()}
+    fields = list(dict.fromkeys(field for extractor in extractors.values() for field in extractor.fields))
+    counts = {name: {'judged': 0, 'complete': 0,
+                     'fields': {field: {'hits': 0, 'ambiguous': 0, 'disagree': 0}
+                                for field in extractor.fields}}
+              for name, extractor in extractors.items()}
+    match_seconds = dict.fromkeys(extractors, 0.0)
+
+    cache = get_default_cache()
+    start = time.perf_counter()
+    documents = list(cache.cached_texts(invoice_paths, clips=clips))
+    if extract:
+        cached = {path for path, _, _ in documents}
+        for path in invoice_paths:
+            if path in cached:
+                continue
+            try:
+                text, clip_texts = cache.get_texts(path, clips=clips)
+            except Exception as e:
+                print(f"Error reading {Path(path).name}: {str(e)}")
+                continue
+            documents.append((path, text, clip_texts))
+    read_seconds = time.perf_counter() - start
+
+    for path, text, clip_texts in documents:
+        filename = Path(path).name
+        values = {}
+        for name, extractor in extractors.items():
+            match_start = time.perf_counter()
+            if extractor.is_valid(text) and not extractor.is_excluded(text):
+                region_texts = {field: clip_texts[clip_key(rect)] for field, rect in extractor.regions.items()}
+                values[name] = extractor.find_all(text, filename, region_texts)
+            match_seconds[name] += time.perf_counter() - match_start
+
+        for field in fields:
+            # The value extract() would take from each candidate that found one
+            taken = {name: matches[field][0] for name, matches in values.items()
+                     if matches.get(field)}
+            tally = Counter(taken.values()).most_common()
+            # Only a value more candidates took than any other goes undisputed
+            agreed = tally[0][0] if tally and (len(tally) == 1 or tally[0][1] > tally[1][1]) else None
+            for name, value in taken.items():
+                field_counts = counts[name]['fields'][field]
+                field_counts['hits'] += 1
+                field_counts['ambiguous'] += len(set(values[name][field])) > 1
+                field_counts['disagree'] += value != agreed
+        for name, matches in values.items():
+            counts[name]['judged'] += 1
+            counts[name]['complete'] += all(matches[field] for field in extractors[name].fields)
+
+    report = {'documents': len(documents), 'invoices': len(invoice_paths),
+              'read_seconds': read_seconds, 'candidates': {}}
+    for name, candidate_counts in counts.items():
+        judged = candidate_counts['judged']
+        report['candidates'][name] = {
+            'judged': judged,
+            'all_fields_rate': _percent(candidate_counts['complete'], judged),
+            'match_seconds': match_seconds[name],
+            'fields': {field: {'hit_rate': _percent(field_counts['hits'], judged),
+                               'ambiguity_rate': _percent(field_counts['ambiguous'], judged),
+                               'disagreement_rate': _percent(field_counts['disagree'], judged)}
+                       for field, field_counts in candidate_counts['fields'].items()}
+        }
+    return report
+
+
+def _rank(scores: dict) -> tuple:
+    """Sort key: most hits, then fewest ambiguous and disputed values"""
+    return -scores['hit_rate'], scores['ambiguity_rate'], scores['disagreement_rate']
+
+
+def print_tournament_report(supplier_code: str, report: dict):
+    candidates = report['candidates']
+    names = list(candidates)
+    width = max(21, *(len(name) for name in names))
+    print(f"\n=== {supplier_code}: {len(names)} candidates over {report['documents']} cached documents "
+          f"({report['invoices']} on the sheet) ===")
+    print("Cells are hit% / ambiguous% / disagreeing%, over documents passing each candidate's markers")
+    print(f"{'':24s}" + "".join(f"{name:>{width}s}  " for name in names))
+    print(f"{'documents judged':24s}" + "".join(f"{candidates[name]['judged']:>{width}d}  " for name in names))
+    fields = list(dict.fromkeys(field for name in names for field in candidates[name]['fields']))
+    for field in fields:
+        cells = []
+        for name in names:
+            scores = candidates[name]['fields'].get(field)
+            cell = (f"{scores['hit_rate']:.1f} / {scores['ambiguity_rate']:.1f} / "
+                    f"{scores['disagreement_rate']:.1f}") if scores else "-"
+            cells.append(f"{cell:>{width}s}  ")
+        print(f"{field:24s}" + "".join(cells))
+    print(f"{'all fields found %':24s}"
+          + "".join(f"{candidates[name]['all_fields_rate']:>{width}.1f}  " for name in names))
+    print(f"{'match ms/document':24s}"
+          + "".join(f"{candidates[name]['match_seconds'] * 1000 / max(1, report['documents']):>{width}.2f}  "
+                    for name in names))
+
+    print("\nBest per field:")
+    for field in fields:
+        entrants = [name for name in names if field in candidates[name]['fields']]
+        best = min(entrants, key=lambda name: _rank(candidates[name]['fields'][field]))
+        print(f"  {field}: {best}")
+    best = max(names, key=lambda name: (candidates[name]['all_fields_rate'], candidates[name]['judged']))
+    print(f"Most documents with every field: {best} ({candidates[best]['all_fields_rate']:.1f}%)")
+    print(f"Cache read {report['read_seconds']:.2f}s, matching "
+          f"{sum(candidate['match_seconds'] for candidate in candidates.values()):.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare candidate pattern sets for a supplier over every cached invoice")
+    parser.add_argument("supplier_code", help="Supplier whose sheet lists the invoices and whose config is the base")
+    parser.add_argument("candidates", type=Path,
+                        help="JSON file mapping candidate names to configs or to patterns")
+    parser.add_argument("--workbook", type=Path, default=project_root / "Invoice_Summary.xlsx",
+                        help="Invoice summary workbook whose ledger lists the invoices")
+    parser.add_argument("--no-current", action="store_true",
+                        help="Leave the saved config out of the comparison")
+    parser.add_argument("--extract", action="store_true",
+                        help="Read invoices missing from the page text cache instead of skipping them")
+    parser.add_argument("--json", type=Path, help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    supplier_code = args.supplier_code.upper()
+    manager = SupplierConfigManager()
+    if supplier_code not in manager.configs:
+        print(f"Error: Unknown supplier code '{supplier_code}'")
+        sys.exit(2)
+    base_config = manager.configs[supplier_code].to_dict()
+    try:
+        candidates = load_candidates(args.candidates, base_config, not args.no_current)
+        ledger = InvoiceLedger.for_workbook(args.workbook)
+        supplier_sheet = ledger.find_sheet(base_config['sheet_identifier'])
+        if not supplier_sheet:
+            raise ValueError(f"Sheet not found for {supplier_code}")
+        invoice_paths = ledger.get_paths(supplier_sheet)
+        ledger.close()
+        report = run_tournament(candidates, invoice_paths, args.extract)
+    except (OSError, ValueError, KeyError, re.error) as e:
+        print(f"Error: {str(e)}")
+        sys.exit(2)
+
+    print_tournament_report(supplier_code, report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(dict(report, supplier_code=supplier_code), f, indent=4)
+        print(f"\nReport written to {args.json}")
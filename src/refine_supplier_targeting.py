@@ -1,9 +1,16 @@
 from dataclasses import dataclass
 import re
-import fitz
+import sys
 from pathlib import Path
 from typing import Optional, Dict
-import pandas as pd
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from utils.text_cache import get_page_text
+from utils.ledger import InvoiceLedger
+from supplier_configs.extraction import FieldExtractor
 
 @dataclass
 class ValleyNorthernInvoiceData:
@@ -18,13 +25,12 @@ class ValleyNorthernInvoiceData:
 def analyze_extraction_confidence(text: str, patterns: Dict[str, str]) -> dict:
     """Analyze how well patterns match the text"""
     confidence_report = {}
-    for field, pattern in patterns.items():
-        matches = re.finditer(pattern, text)
-        matches_list = list(matches)
+    all_matches = FieldExtractor(patterns).find_all(text)
+    for field, matches_list in all_matches.items():
         confidence_report[field] = {
             'success': len(matches_list) > 0,
             'matches_found': len(matches_list),
-            'sample_matches': [m.group(1) for m in matches_list[:3]]
+            'sample_matches': matches_list[:3]
         }
     return confidence_report
 
@@ -90,9 +96,7 @@ def extract_valley_northern_data(pdf_path: str) -> Optional[ValleyNorthernInvoic
     """Extract data from Valley Northern invoice"""
     try:
         # Extract text from PDF
-        doc = fitz.open(pdf_path)
-        text = doc[0].get_text()
-        doc.close()
+        text = get_page_text(pdf_path)
         
         # Get suggested config and confidence report
         filename = Path(pdf_path).name
@@ -108,13 +112,12 @@ def extract_valley_northern_data(pdf_path: str) -> Optional[ValleyNorthernInvoic
             confidence_points += 1
         
         # Extract other fields from text
-        for field, pattern in config['patterns'].items():
+        extraction = FieldExtractor.from_config(config).extract(text, filename)
+        for field, value in extraction.data.items():
             if field != 'invoice_number' or field not in results:  # Skip invoice_number if already found
-                match = re.search(pattern, text)
-                if match:
-                    results[field] = match.group(1)
-                    confidence_points += 1
-                    print(f"Found {field}: {results[field]}")
+                results[field] = value
+                confidence_points += 1
+                print(f"Found {field}: {results[field]}")
         
         if len(results) >= 5:  # Allow missing one field
             # Convert amounts to float
@@ -157,19 +160,16 @@ def test_valley_northern_extraction():
     
     try:
         # Find Valley Northern sheet
-        xl = pd.ExcelFile(excel_path)
-        vn_sheet = None
-        for sheet_name in xl.sheet_names:
-            if 'valley northern' in sheet_name.lower():
-                vn_sheet = sheet_name
-                break
+        ledger = InvoiceLedger.for_workbook(excel_path)
+        vn_sheet = ledger.find_sheet('valley northern')
         
         if not vn_sheet:
             print("Valley Northern sheet not found")
             return
         
         # Read the sheet
-        df = pd.read_excel(xl, vn_sheet)
+        df = ledger.read_sheet(vn_sheet)
+        ledger.close()
         
         # Show available files
         print("\nAvailable Valley Northern files:")
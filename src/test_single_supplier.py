@@ -1,13 +1,18 @@
+import sys
 import fitz
-import pandas as pd
 from pathlib import Path
 
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from utils.text_cache import get_page_text
+from utils.ledger import InvoiceLedger
+
 def analyze_invoice_structure(pdf_path: str):
     """Show raw text and layout of PDF"""
     try:
-        doc = fitz.open(pdf_path)
-        text = doc[0].get_text()
-        doc.close()
+        text = get_page_text(pdf_path)
         
         print("\n=== DOCUMENT TYPE ANALYSIS ===")
         print(f"File: {Path(pdf_path).name}")
@@ -23,8 +28,9 @@ def analyze_invoice_structure(pdf_path: str):
         blocks = doc[0].get_text("blocks")
         doc.close()
         
+        # Block rectangles can be copied into a config's field_regions
         for block in blocks:
-            print(f"\nBlock at ({block[0]:.1f}, {block[1]:.1f}):")
+            print(f"\nBlock at [{block[0]:.1f}, {block[1]:.1f}, {block[2]:.1f}, {block[3]:.1f}]:")
             print(f"Text: {block[4]}\n")
         
     except Exception as e:
@@ -35,19 +41,20 @@ def test_aah_extraction():
     
     try:
         # Show all available sheets
-        xl = pd.ExcelFile(excel_path)
+        ledger = InvoiceLedger.for_workbook(Path(excel_path))
+        sheet_names = ledger.sheet_names()
         print("\nAvailable sheets in Excel file:")
-        for i, sheet_name in enumerate(xl.sheet_names, 1):
+        for i, sheet_name in enumerate(sheet_names, 1):
             print(f"{i}. {sheet_name}")
         
         # Get sheet selection from user
         sheet_index = int(input("\nEnter the number of the sheet to analyze: ")) - 1
-        if 0 <= sheet_index < len(xl.sheet_names):
-            selected_sheet = xl.sheet_names[sheet_index]
+        if 0 <= sheet_index < len(sheet_names):
+            selected_sheet = sheet_names[sheet_index]
             print(f"\nAnalyzing sheet: {selected_sheet}")
             
             # Read the sheet
-            df = pd.read_excel(xl, selected_sheet)
+            df = ledger.read_sheet(selected_sheet)
             
             # Filter for unprocessed files
             unprocessed_files = df[
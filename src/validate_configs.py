@@ -1,90 +1,276 @@
+import argparse
+import ast
+import json
+import os
 import random
 from pathlib import Path
-import pandas as pd
 import sys
-import fitz
-import re
-from typing import List
+from typing import Dict, List, Optional
 
 # Add project root to Python path
 project_root = Path(__file__).parent.parent
 sys.path.append(str(project_root))
 
 # Now we can import from supplier_configs
-from supplier_configs.supplier_configs import SupplierConfigManager
+from supplier_configs.supplier_configs import SupplierConfig, SupplierConfigManager
+from supplier_configs.extraction import FieldExtractor
+from utils.text_cache import open_document
+from utils.ledger import InvoiceLedger
+from main_script import iter_extraction_results
+
+# Default sample size for batch validation; 0 validates every invoice
+DEFAULT_SAMPLE_SIZE = 200
+DEFAULT_MIN_HIT_RATE = 90.0
+
+# Exit codes for batch validation
+EXIT_OK = 0
+EXIT_BELOW_THRESHOLD = 1
+EXIT_SETUP_ERROR = 2
 
 def get_random_invoices(supplier_code: str, count: int = 20) -> List[str]:
     """Get random invoice paths for a supplier"""
     excel_path = project_root / "Invoice_Summary.xlsx"
-    xl = pd.ExcelFile(excel_path)
+    ledger = InvoiceLedger.for_workbook(excel_path)
     
     # Find supplier sheet
-    supplier_sheet = None
-    for sheet_name in xl.sheet_names:
-        if supplier_code.lower() in sheet_name.lower():
-            supplier_sheet = sheet_name
-            break
+    supplier_sheet = ledger.find_sheet(supplier_code)
     
     if not supplier_sheet:
         raise ValueError(f"Sheet not found for {supplier_code}")
     
     # Get random invoices
-    df = pd.read_excel(xl, supplier_sheet)
-    invoice_paths = df['Full Path'].dropna().tolist()
+    invoice_paths = ledger.get_paths(supplier_sheet)
+    ledger.close()
     return random.sample(invoice_paths, min(count, len(invoice_paths)))
 
 def validate_config(supplier_code: str, config_dict: dict) -> bool:
     """Validate proposed config on random invoices"""
     invoice_paths = get_random_invoices(supplier_code)
     
+    extractor = FieldExtractor.from_config(config_dict)
+    
     print(f"\nTesting configuration on {len(invoice_paths)} random invoices...")
     successes = 0
     
     for path in invoice_paths:
         print(f"\nProcessing invoice: {path}")
-        # Extract text from PDF
-        doc = fitz.open(path)
-        text = doc[0].get_text()
-        doc.close()
+        # Test extraction with proposed config, reading later pages only if a field needs them
+        with open_document(path, extractor.regions) as document:
+            text, region_texts = document.texts(0)
+            extraction = extractor.extract(text, Path(path).name, region_texts=region_texts,
+                                           document=document)
+        for field, value in extraction.data.items():
+            print(f"Found {field}: {value}")
+        for field in extraction.missing_fields:
+            print(f"Failed to find {field}")
+            print(f"Pattern used: {config_dict['patterns'][field]}")  # Print the pattern that failed
         
-        # Test extraction with proposed config
-        results = {}
-        for field, pattern in config_dict['patterns'].items():
-            match = re.search(pattern, text)
-            if match:
-                results[field] = match.group(1)
-                print(f"Found {field}: {results[field]}")
-            else:
-                print(f"Failed to find {field}")
-                print(f"Pattern used: {pattern}")  # Print the pattern that failed
-        
-        if len(results) == 5:  # All fields found
+        if not extraction.missing_fields:  # All fields found
             successes += 1
             print("Successfully extracted all fields!")
         else:
-            print(f"Failed to extract all fields. Found {len(results)}/5 fields")
+            print(f"Failed to extract all fields. Found {len(extraction.data)}/{len(extractor.fields)} fields")
     
     success_rate = (successes / len(invoice_paths)) * 100
     print(f"\nSuccess rate: {success_rate:.1f}%")
     
     return input("\nSave this configuration? (y/n): ").lower() == 'y'
 
+def stratified_sample(paths_by_period: Dict[str, List[str]], size: Optional[int], seed: int) -> List[str]:
+    """Pick a reproducible sample spread across period folders.
+    
+    Each period gets at least one invoice when size allows, and the rest
+    of the sample is shared out in proportion to period size. A size of
+    0 or None returns every invoice.
+    """
+    periods = sorted(paths_by_period)
+    total = sum(len(paths) for paths in paths_by_period.values())
+    if not size or size >= total:
+        return [path for period in periods for path in sorted(paths_by_period[period])]
+    
+    quotas = dict.fromkeys(periods, 0)
+    if size >= len(periods):
+        quotas = dict.fromkeys(periods, 1)
+    remaining = size - sum(quotas.values())
+    spare = {period: len(paths_by_period[period]) - quotas[period] for period in periods}
+    spare_total = sum(spare.values())
+    
+    # Largest remainder, so the quotas add up to exactly size
+    shares = {period: remaining * spare[period] / spare_total for period in periods}
+    for period in periods:
+        quotas[period] += int(shares[period])
+    leftover = size - sum(quotas.values())
+    by_remainder = sorted(periods, key=lambda period: (-(shares[period] % 1), period))
+    for period in by_remainder[:leftover]:
+        quotas[period] += 1
+    
+    rng = random.Random(seed)
+    sample = []
+    for period in periods:
+        sample.extend(rng.sample(sorted(paths_by_period[period]), quotas[period]))
+    return sample
+
+def get_sample_invoices(ledger: InvoiceLedger, sheet_identifier: str, size: Optional[int],
+                        seed: int) -> List[str]:
+    """Get a seeded, period-stratified sample of a supplier's invoice paths"""
+    supplier_sheet = ledger.find_sheet(sheet_identifier)
+    if not supplier_sheet:
+        raise ValueError(f"Sheet not found for {sheet_identifier}")
+    
+    df = ledger.read_sheet(supplier_sheet).dropna(subset=['Full Path'])
+    periods = df['Period Folder'].fillna('').astype(str)
+    paths_by_period = {period: list(paths) for period, paths in df['Full Path'].groupby(periods)}
+    return stratified_sample(paths_by_period, size, seed)
+
+def validate_batch(config_dict: dict, invoice_paths: List[str], workers: int = 1) -> dict:
+    """Run a config over invoices without prompting and return hit rates.
+    
+    Field hit rates are over the invoices that pass the validation and
+    exclusion markers, as those are the ones main_script extracts.
+    """
+    fields = list(config_dict['patterns'])
+    hits = dict.fromkeys(fields, 0)
+    misses = {field: [] for field in fields}
+    statuses = {'matched': 0, 'invalid': 0, 'excluded': 0, 'error': 0, 'needs_ocr': 0}
+    complete = 0
+    
+    tasks = [(path, config_dict) for path in invoice_paths]
+    for result in iter_extraction_results(tasks, workers):
+        statuses[result['status']] += 1
+        if result['status'] != 'matched':
+            continue
+        for field in fields:
+            if result['data'].get(field) is not None:
+                hits[field] += 1
+            else:
+                misses[field].append(result['file_path'])
+        if all(result['data'].get(field) is not None for field in fields):
+            complete += 1
+    
+    matched = statuses['matched']
+    return {
+        'sampled': len(invoice_paths),
+        'statuses': statuses,
+        'field_hit_rates': {field: (hits[field] / matched) * 100 if matched else 0.0 for field in fields},
+        'all_fields_rate': (complete / matched) * 100 if matched else 0.0,
+        'misses': misses
+    }
+
+def print_batch_report(supplier_code: str, report: dict, min_hit_rate: float, max_listed: int = 3):
+    statuses = report['statuses']
+    print(f"\n=== {supplier_code}: {report['sampled']} invoices ===")
+    print(f"Matched markers: {statuses['matched']}, invalid: {statuses['invalid']}, "
+          f"excluded: {statuses['excluded']}, errors: {statuses['error']}, "
+          f"scanned (needs OCR): {statuses['needs_ocr']}")
+    for field, rate in report['field_hit_rates'].items():
+        flag = "✓" if rate >= min_hit_rate else "✗"
+        print(f"{flag} {field}: {rate:.1f}%")
+        if rate < min_hit_rate:
+            for path in report['misses'][field][:max_listed]:
+                print(f"    missed in {Path(path).name}")
+    print(f"All fields found: {report['all_fields_rate']:.1f}%")
+
+def load_config_file(config_file: Path, supplier_codes: List[str]) -> Dict[str, dict]:
+    """Read configs from JSON: one config for a single supplier, or a code -> config mapping"""
+    with open(config_file, 'r') as f:
+        data = json.load(f)
+    if 'patterns' in data:
+        if len(supplier_codes) != 1:
+            raise ValueError("A single config in --config-file needs exactly one --supplier")
+        return {supplier_codes[0]: data}
+    return {code: data[code] for code in (supplier_codes or data)}
+
+def run_batch(args) -> int:
+    """Validate one or more configs headlessly and return the exit code"""
+    manager = SupplierConfigManager()
+    supplier_codes = [code.upper() for code in args.supplier or []]
+    try:
+        if args.config_file:
+            configs = load_config_file(args.config_file, supplier_codes)
+        else:
+            codes = supplier_codes or list(manager.configs)
+            configs = {code: manager.configs[code].to_dict() for code in codes}
+        ledger = InvoiceLedger.for_workbook(args.workbook)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error: {str(e)}")
+        return EXIT_SETUP_ERROR
+    
+    exit_code = EXIT_OK
+    reports = {}
+    for supplier_code, config_dict in configs.items():
+        sheet_identifier = config_dict.get('sheet_identifier') or supplier_code
+        try:
+            invoice_paths = get_sample_invoices(ledger, sheet_identifier, args.sample, args.seed)
+        except ValueError as e:
+            print(f"\n{supplier_code}: {str(e)}")
+            exit_code = max(exit_code, EXIT_SETUP_ERROR)
+            continue
+        
+        report = validate_batch(config_dict, invoice_paths, args.workers)
+        print_batch_report(supplier_code, report, args.min_hit_rate)
+        passed = bool(report['statuses']['matched']) and all(
+            rate >= args.min_hit_rate for rate in report['field_hit_rates'].values())
+        report['passed'] = passed
+        reports[supplier_code] = report
+        if not passed:
+            exit_code = max(exit_code, EXIT_BELOW_THRESHOLD)
+        elif args.save and args.config_file:
+            update_supplier_config(supplier_code, config_dict)
+    ledger.close()
+    
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'seed': args.seed, 'sample': args.sample, 'min_hit_rate': args.min_hit_rate,
+                       'reports': reports}, f, indent=4)
+        print(f"\nReport written to {args.json}")
+    
+    failed = [code for code, report in reports.items() if not report['passed']]
+    print(f"\n{len(reports) - len(failed)}/{len(configs)} suppliers passed "
+          f"(every field at least {args.min_hit_rate:.0f}%)")
+    return exit_code
+
 def update_supplier_config(supplier_code: str, config_dict: dict):
     """Update supplier configuration if validated"""
     manager = SupplierConfigManager()
     if supplier_code in manager.configs:
         # Update existing config
-        current_config = manager.configs[supplier_code]
-        for key, value in config_dict.items():
-            setattr(current_config, key, value)
+        current = manager.configs[supplier_code].to_dict()
     else:
         # Create new config
-        manager.configs[supplier_code] = config_dict
+        current = {'code': supplier_code, 'name': supplier_code, 'sheet_identifier': supplier_code.lower(),
+                   'validation_markers': [], 'exclusion_markers': [], 'patterns': {}}
+    manager.configs[supplier_code] = SupplierConfig.from_dict(dict(current, **config_dict))
     
     manager.save_configs()
     print(f"\nConfiguration updated for {supplier_code}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validate supplier configs against invoices in the ledger")
+    parser.add_argument("--batch", action="store_true",
+                        help="Validate without prompts and exit non-zero if a field falls below --min-hit-rate")
+    parser.add_argument("--supplier", action="append",
+                        help="Supplier code to validate; repeat for several (default: every configured supplier)")
+    parser.add_argument("--config-file", type=Path,
+                        help="JSON file with a config, or a mapping of supplier code to config "
+                             "(default: the saved configs)")
+    parser.add_argument("--sample", type=int, default=DEFAULT_SAMPLE_SIZE,
+                        help=f"Invoices per supplier, spread across period folders; 0 for all "
+                             f"(default: {DEFAULT_SAMPLE_SIZE})")
+    parser.add_argument("--seed", type=int, default=0, help="Sample seed, for reproducible runs")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes for PDF extraction")
+    parser.add_argument("--min-hit-rate", type=float, default=DEFAULT_MIN_HIT_RATE,
+                        help=f"Lowest passing hit rate per field (default: {DEFAULT_MIN_HIT_RATE:.0f})")
+    parser.add_argument("--workbook", type=Path, default=project_root / "Invoice_Summary.xlsx",
+                        help="Invoice summary workbook whose ledger lists the invoices")
+    parser.add_argument("--save", action="store_true",
+                        help="Save configs from --config-file that pass")
+    parser.add_argument("--json", type=Path, help="Also write the report to this JSON file")
+    args = parser.parse_args()
+    
+    if args.batch:
+        sys.exit(run_batch(args))
+    
     supplier_code = input("Enter supplier code: ").upper()
     
     print("\nPaste the suggested configuration from refine_supplier_targeting.py")
@@ -97,7 +283,8 @@ if __name__ == "__main__":
             break
         config_lines.append(line)
     
-    config_dict = eval('\n'.join(config_lines))
+    # A pasted dict literal; literal_eval will not run code
+    config_dict = ast.literal_eval('\n'.join(config_lines))
     
     if validate_config(supplier_code, config_dict):
-        update_supplier_config(supplier_code, config_dict)
\ No newline at end of file
+        update_supplier_config(supplier_code, config_dict)
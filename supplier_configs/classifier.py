@@ -0,0 +1,125 @@
+# supplier_configs/classifier.py
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+
+from supplier_configs.supplier_configs import SupplierConfig
+
+# Below this many distinct markers, C substring search beats a Python-level
+# automaton walk on a typical invoice page; above it the automaton wins.
+# benchmarks/bench_classifier.py puts the break-even at 250-300 markers on
+# 2,000-character pages, against 17 markers in today's configs.
+AUTOMATON_MIN_MARKERS = 256
+
+@dataclass
+class Classification:
+    supplier_code: Optional[str] = None
+    candidates: List[str] = field(default_factory=list)
+    excluded: List[str] = field(default_factory=list)
+
+    @property
+    def is_ambiguous(self) -> bool:
+        return self.supplier_code is None and len(self.candidates) > 1
+
+
+class MarkerAutomaton:
+    """Aho-Corasick automaton reporting which markers occur in a text"""
+
+    def __init__(self, markers: Set[str]):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [frozenset()]
+        for marker in markers:
+            self._add(marker)
+        self._link()
+
+    def _add(self, marker: str):
+        state = 0
+        for char in marker:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(frozenset())
+                next_state = len(self.goto) - 1
+                self.goto[state][char] = next_state
+            state = next_state
+        self.output[state] = self.output[state] | {marker}
+
+    def _link(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[next_state] = target if target != next_state else 0
+                self.output[next_state] = self.output[next_state] | self.output[self.fail[next_state]]
+
+    def find(self, text: str) -> Set[str]:
+        goto, fail, output = self.goto, self.fail, self.output
+        found = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found |= output[state]
+        return found
+
+
+class SupplierClassifier:
+    """Decide which supplier a document belongs to from every config's markers.
+
+    All validation and exclusion markers are de-duplicated and searched in a
+    single pass over the text. A supplier matches when all of its validation
+    markers are present and none of its exclusion markers are. When several
+    suppliers match, the one with the most validation markers wins; a tie is
+    reported as ambiguous.
+
+    The markers are searched with an Aho-Corasick automaton once there are
+    AUTOMATON_MIN_MARKERS of them; use_automaton overrides that choice.
+    """
+
+    def __init__(self, configs: Dict[str, SupplierConfig], use_automaton: Optional[bool] = None):
+        self.rules = {}
+        markers = set()
+        for code, config in configs.items():
+            # A supplier without validation markers would match every document
+            if not config.validation_markers:
+                continue
+            self.rules[code] = (frozenset(config.validation_markers), frozenset(config.exclusion_markers))
+            markers.update(config.validation_markers)
+            markers.update(config.exclusion_markers)
+        self.markers = sorted(markers)
+        if use_automaton is None:
+            use_automaton = len(markers) >= AUTOMATON_MIN_MARKERS
+        self.automaton = MarkerAutomaton(markers) if use_automaton else None
+
+    def find_markers(self, text: str) -> Set[str]:
+        if self.automaton is not None:
+            return self.automaton.find(text)
+        return {marker for marker in self.markers if marker in text}
+
+    def classify(self, text: str) -> Classification:
+        found = self.find_markers(text)
+        result = Classification()
+        for code, (validation, exclusion) in self.rules.items():
+            if validation <= found:
+                if exclusion & found:
+                    result.excluded.append(code)
+                else:
+                    result.candidates.append(code)
+
+        result.candidates.sort(key=lambda code: len(self.rules[code][0]), reverse=True)
+        if len(result.candidates) == 1:
+            result.supplier_code = result.candidates[0]
+        elif len(result.candidates) > 1:
+            best, runner_up = result.candidates[0], result.candidates[1]
+            if len(self.rules[best][0]) > len(self.rules[runner_up][0]):
+                result.supplier_code = best
+        return result
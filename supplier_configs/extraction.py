@@ -0,0 +1,256 @@
+# supplier_configs/extraction.py
+import json
+import re
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+# Where a field's pattern is matched
+SOURCE_TEXT = "text"
+SOURCE_FILENAME = "filename"
+FIELD_SOURCES = (SOURCE_TEXT, SOURCE_FILENAME)
+
+# Pages a text field is searched on: the first page, the last page, every
+# page in order, or, given as a number N, the first N pages
+PAGES_FIRST = "first"
+PAGES_LAST = "last"
+PAGES_ANY = "any"
+FIELD_PAGES = (PAGES_FIRST, PAGES_LAST, PAGES_ANY)
+
+# Seconds one document may spend matching patterns before its remaining fields are given up
+DEFAULT_MATCH_BUDGET = 0.5
+
+@dataclass
+class ExtractionResult:
+    data: Dict[str, Optional[str]] = field(default_factory=dict)
+    confidence_score: float = 0.0
+    missing_fields: List[str] = field(default_factory=list)
+    # Fields given up because the document ran out of match time; also in missing_fields
+    timed_out_fields: List[str] = field(default_factory=list)
+
+class MatchTimeout(Exception):
+    """Raised inside a search when a match time budget runs out"""
+
+def _raise_match_timeout(signum, frame):
+    raise MatchTimeout()
+
+@contextmanager
+def match_deadline(seconds: Optional[float]):
+    """Interrupt the enclosed regex searches once seconds have passed.
+
+    Uses SIGALRM, which re checks while it backtracks, so this only applies
+    in the main thread on platforms with setitimer. Elsewhere it does
+    nothing and callers fall back to checking the time between fields.
+    """
+    if not seconds or not hasattr(signal, 'setitimer') or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+    previous = signal.signal(signal.SIGALRM, _raise_match_timeout)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+def _remaining(budget: Optional[float], spent: float) -> Optional[float]:
+    if not budget:
+        return None
+    return max(budget - spent, 1e-6)
+
+def infer_field_source(pattern: str) -> str:
+    """Guess the source for a field with no explicit entry in field_sources"""
+    # Older configs match invoice numbers out of names like INV123_456.pdf
+    return SOURCE_FILENAME if r"\.pdf" in pattern else SOURCE_TEXT
+
+class FieldExtractor:
+    """Compiled patterns and markers for one supplier.
+
+    Build it once per config and call extract() per document. Each field is
+    matched against either the page text or the file name, as set in
+    field_sources. A text field with an entry in regions is matched only
+    against the text inside that clip rectangle, when the caller passes it.
+    A text field with an entry in pages is searched on those pages instead
+    of only the first, when the caller passes the document.
+    """
+
+    def __init__(self, patterns: Dict[str, str], field_sources: Optional[Dict[str, str]] = None,
+                 validation_markers: Optional[List[str]] = None,
+                 exclusion_markers: Optional[List[str]] = None,
+                 regions: Optional[Dict[str, List[float]]] = None,
+                 pages: Optional[Dict[str, object]] = None):
+        field_sources = field_sources or {}
+        self.validation_markers = list(validation_markers or [])
+        self.exclusion_markers = list(exclusion_markers or [])
+        self.fields = list(patterns)
+        self.compiled = {name: re.compile(pattern) for name, pattern in patterns.items()}
+        self.sources = {}
+        for name, pattern in patterns.items():
+            source = field_sources.get(name) or infer_field_source(pattern)
+            if source not in FIELD_SOURCES:
+                raise ValueError(f"Unknown source '{source}' for field '{name}'")
+            self.sources[name] = source
+        self.regions = {}
+        for name, rect in (regions or {}).items():
+            if name not in self.compiled:
+                raise ValueError(f"Region given for unknown field '{name}'")
+            if self.sources[name] != SOURCE_TEXT:
+                raise ValueError(f"Field '{name}' has a region but is matched against the {self.sources[name]}")
+            if len(rect) != 4 or not (rect[0] < rect[2] and rect[1] < rect[3]):
+                raise ValueError(f"Region for '{name}' must be [x0, y0, x1, y1] with x0 < x1 and y0 < y1")
+            self.regions[name] = [float(value) for value in rect]
+        self.pages = {}
+        for name, spec in (pages or {}).items():
+            if name not in self.compiled:
+                raise ValueError(f"Pages given for unknown field '{name}'")
+            if self.sources[name] != SOURCE_TEXT:
+                raise ValueError(f"Field '{name}' has pages but is matched against the {self.sources[name]}")
+            first_n = isinstance(spec, int) and not isinstance(spec, bool) and spec >= 1
+            if spec not in FIELD_PAGES and not first_n:
+                raise ValueError(f"Pages for '{name}' must be one of {', '.join(FIELD_PAGES)} "
+                                 f"or a number of leading pages, not {spec!r}")
+            if spec != PAGES_FIRST and spec != 1:
+                self.pages[name] = spec
+
+    @classmethod
+    def from_config(cls, config) -> "FieldExtractor":
+        """Build from a SupplierConfig or its dict form"""
+        if not isinstance(config, dict):
+            config = config.to_dict()
+        return cls(config['patterns'],
+                   config.get('field_sources'),
+                   config.get('validation_markers'),
+                   config.get('exclusion_markers'),
+                   config.get('field_regions'),
+                   config.get('field_pages'))
+
+    def is_valid(self, text: str) -> bool:
+        return all(marker in text for marker in self.validation_markers)
+
+    def is_excluded(self, text: str) -> bool:
+        return any(marker in text for marker in self.exclusion_markers)
+
+    @staticmethod
+    def _value(match) -> Optional[str]:
+        return match.group(1) if match.re.groups else match.group(0)
+
+    def _wants_page(self, name: str, page_no: int, page_count: int) -> bool:
+        spec = self.pages.get(name, PAGES_FIRST)
+        if spec == PAGES_FIRST:
+            return page_no == 0
+        if spec == PAGES_LAST:
+            return page_no == page_count - 1
+        if spec == PAGES_ANY:
+            return page_no < page_count
+        return page_no < min(spec, page_count)
+
+    def _next_page(self, names: List[str], page_no: int, page_count: int) -> Optional[int]:
+        """The next page after page_no that any of the fields is searched on"""
+        for next_no in range(page_no + 1, page_count):
+            if any(self._wants_page(name, next_no, page_count) for name in names):
+                return next_no
+        return None
+
+    def _source(self, name: str, text: str, filename: str,
+                region_texts: Optional[Dict[str, str]]) -> str:
+        if self.sources[name] == SOURCE_FILENAME:
+            return filename
+        if region_texts is not None and name in region_texts:
+            return region_texts[name]
+        return text
+
+    def extract(self, text: str, filename: str = "", timings: Optional[dict] = None,
+                time_budget: Optional[float] = None,
+                region_texts: Optional[Dict[str, str]] = None,
+                document=None) -> ExtractionResult:
+        """Run every field pattern and score the document.
+
+        text and region_texts are the first page's text and the text of
+        each field's clip region on it, as read by
+        text_cache.get_page_texts(path, clips=extractor.regions); fields
+        without a region are matched against the page text.
+
+        Fields with pages set are looked for on later pages through
+        document, a text_cache.DocumentPages. Its pages are only read while
+        a field is still missing, in page order, and the search stops once
+        every field is found, so one-page invoices cost nothing extra.
+        Without document, the first page is taken to be the only one.
+
+        If timings is given, each field's search time is recorded in it
+        under "field:<name>". With time_budget (seconds), fields not matched
+        by the time it runs out count as missing and are listed in
+        timed_out_fields, so one pathological pattern only costs this
+        document its remaining fields. Reading pages does not count against it.
+        """
+        result = ExtractionResult()
+        # Seconds spent matching so far, across pages
+        spent = 0.0
+        page_no, page_count = 0, 1
+        if document is not None and self.pages:
+            # Usually cached with the first page, so this rarely opens the file
+            page_count = document.page_count
+        # Fields still being looked for, on this page or a later one
+        remaining = list(self.fields)
+        try:
+            while True:
+                started = time.perf_counter()
+                with match_deadline(_remaining(time_budget, spent)):
+                    for name in [name for name in remaining if self._wants_page(name, page_no, page_count)]:
+                        if time_budget and spent + time.perf_counter() - started > time_budget:
+                            raise MatchTimeout()
+                        source = self._source(name, text, filename, region_texts)
+                        start = time.perf_counter()
+                        match = self.compiled[name].search(source)
+                        if timings is not None:
+                            key = f"field:{name}"
+                            timings[key] = timings.get(key, 0.0) + time.perf_counter() - start
+                        if match:
+                            result.data[name] = self._value(match)
+                            remaining.remove(name)
+                        elif self._next_page([name], page_no, page_count) is None:
+                            remaining.remove(name)
+                spent += time.perf_counter() - started
+
+                page_no = self._next_page(remaining, page_no, page_count)
+                if page_no is None:
+                    break
+                text, region_texts = document.texts(page_no)
+        except MatchTimeout:
+            result.timed_out_fields = remaining
+
+        result.missing_fields = [name for name in self.fields if name not in result.data]
+        if self.fields:
+            result.confidence_score = (len(result.data) / len(self.fields)) * 100
+        return result
+
+    def find_all(self, text: str, filename: str = "",
+                 region_texts: Optional[Dict[str, str]] = None) -> Dict[str, List[Optional[str]]]:
+        """Return every match per field, for reviewing how specific a pattern is"""
+        matches = {}
+        for name, compiled in self.compiled.items():
+            source = self._source(name, text, filename, region_texts)
+            matches[name] = [self._value(match) for match in compiled.finditer(source)]
+        return matches
+
+
+@lru_cache(maxsize=64)
+def _cached_extractor(signature: str) -> FieldExtractor:
+    return FieldExtractor.from_config(json.loads(signature))
+
+def get_extractor(config) -> FieldExtractor:
+    """Return a cached extractor for a SupplierConfig or config dict"""
+    if not isinstance(config, dict):
+        config = config.to_dict()
+    signature = json.dumps({
+        'patterns': config['patterns'],
+        'field_sources': config.get('field_sources') or {},
+        'validation_markers': config.get('validation_markers') or [],
+        'exclusion_markers': config.get('exclusion_markers') or [],
+        'field_regions': config.get('field_regions') or {},
+        'field_pages': config.get('field_pages') or {}
+    })
+    return _cached_extractor(signature)
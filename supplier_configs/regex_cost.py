@@ -0,0 +1,258 @@
+# supplier_configs/regex_cost.py
+import json
+import math
+import re
+import sqlite3
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from re import _parser as sre_parse
+    from re import _constants as sre_constants
+except ImportError:  # Python < 3.11
+    import sre_parse
+    import sre_constants
+
+# Add project root to Python path
+project_root = str(Path(__file__).resolve().parent.parent)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from supplier_configs.extraction import (SOURCE_FILENAME, MatchTimeout, infer_field_source,
+                                         match_deadline)
+from utils.text_cache import PROJECT_ROOT, default_cache_path
+
+RESULTS_PATH = PROJECT_ROOT / "cache" / "regex_cost.json"
+
+# Cached pages each pattern is timed against
+SAMPLE_PAGES = 40
+# Size of the joined text used for the growth test, and how many times it is repeated
+GROWTH_BASE_CHARS = 20000
+GROWTH_FACTOR = 8
+# A pattern is flagged if it takes longer than this per page on average...
+SLOW_SECONDS = 0.005
+# ...or if its run time grows faster than text length to this power
+SUPERLINEAR_GROWTH = 1.5
+# Give up timing a pattern after this long; that alone marks it as super-linear
+MEASURE_BUDGET = 2.0
+# [\s\S]{0,n} windows wider than this are noted
+WIDE_WINDOW = 100
+
+
+@dataclass
+class PatternCost:
+    supplier_code: str
+    field: str
+    pattern: str
+    warnings: List[str] = field(default_factory=list)
+    mean_seconds: Optional[float] = None
+    worst_seconds: Optional[float] = None
+    growth: Optional[float] = None
+
+    @property
+    def flagged(self) -> bool:
+        return bool(self.warnings)
+
+
+def _is_any_char(subpattern) -> bool:
+    """True for . (any char) or a class like [\\s\\S] that matches everything"""
+    items = list(subpattern)
+    if len(items) != 1:
+        return False
+    op, av = items[0]
+    if op is sre_constants.ANY:
+        return True
+    if op is sre_constants.IN:
+        categories = {str(value) for kind, value in av if kind is sre_constants.CATEGORY}
+        return any(f"CATEGORY_NOT_{name[len('CATEGORY_'):]}" in categories
+                   for name in categories if not name.startswith('CATEGORY_NOT_'))
+    return False
+
+
+def _walk(subpattern, warnings: set, inside_unbounded: bool = False):
+    for op, av in subpattern:
+        if op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT):
+            low, high, sub = av
+            unbounded = high == sre_constants.MAXREPEAT
+            if inside_unbounded and high > 1:
+                warnings.add("nested quantifiers, e.g. (a+)+, can backtrack exponentially")
+            if _is_any_char(sub):
+                if unbounded:
+                    warnings.add("unbounded [\\s\\S]*/.* scan can re-read the rest of the page per attempt")
+                elif high > WIDE_WINDOW:
+                    warnings.add(f"wide wildcard window {{{low},{high}}} is re-scanned at every start")
+            _walk(sub, warnings, inside_unbounded or unbounded)
+        elif op is sre_constants.SUBPATTERN:
+            _walk(av[-1], warnings, inside_unbounded)
+        elif op is sre_constants.BRANCH:
+            for branch in av[1]:
+                _walk(branch, warnings, inside_unbounded)
+        elif op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            _walk(av[1], warnings, inside_unbounded)
+
+
+def _has_literal_prefix(subpattern) -> bool:
+    for op, av in subpattern:
+        if op is sre_constants.AT:
+            continue
+        if op is sre_constants.SUBPATTERN:
+            return _has_literal_prefix(av[-1])
+        if op is sre_constants.BRANCH:
+            return all(_has_literal_prefix(branch) for branch in av[1])
+        return op is sre_constants.LITERAL
+    return False
+
+
+def static_warnings(pattern: str) -> List[str]:
+    """Structural risks in a pattern, without running it"""
+    try:
+        parsed = sre_parse.parse(pattern)
+    except re.error as e:
+        return [f"does not compile: {e}"]
+    warnings = set()
+    _walk(parsed, warnings)
+    if warnings and not _has_literal_prefix(parsed):
+        warnings.add("no literal prefix, so every position in the page is tried")
+    return sorted(warnings)
+
+
+def load_sample_pages(limit: int = SAMPLE_PAGES, cache_path: Optional[Path] = None) -> List[str]:
+    """Most recently used pages from the page text cache (the shared one unless cache_path is given)"""
+    cache_path = Path(cache_path) if cache_path is not None else default_cache_path()
+    if not cache_path.exists():
+        return []
+    try:
+        conn = sqlite3.connect(f"file:{cache_path}?mode=ro", uri=True, timeout=30)
+        try:
+            rows = conn.execute("SELECT text FROM page_text ORDER BY last_access DESC LIMIT ?", (limit,))
+            return [row[0] for row in rows]
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return []
+
+
+def _best_time(func, repeats: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def time_pattern(cost: PatternCost, pages: List[str]):
+    """Time a pattern on cached pages and measure how it scales with text length"""
+    compiled = re.compile(cost.pattern)
+    base = "\n".join(pages)[:GROWTH_BASE_CHARS]
+    try:
+        with match_deadline(MEASURE_BUDGET):
+            durations = []
+            for text in pages:
+                start = time.perf_counter()
+                compiled.search(text)
+                durations.append(time.perf_counter() - start)
+            cost.mean_seconds = sum(durations) / len(durations)
+            cost.worst_seconds = max(durations)
+
+            # A full scan of the text, then of the text repeated, as for a page with no match
+            small = _best_time(lambda: list(compiled.finditer(base)))
+            large_text = base * GROWTH_FACTOR
+            large = _best_time(lambda: list(compiled.finditer(large_text)))
+            cost.growth = math.log(max(large, 1e-9) / max(small, 1e-9)) / math.log(GROWTH_FACTOR)
+    except MatchTimeout:
+        cost.growth = float('inf')
+        cost.warnings.append(f"took over {MEASURE_BUDGET:.0f}s to time against cached pages")
+        return
+
+    if cost.mean_seconds > SLOW_SECONDS:
+        cost.warnings.append(f"slow: {cost.mean_seconds * 1000:.1f} ms per page on average")
+    if cost.growth > SUPERLINEAR_GROWTH:
+        cost.warnings.append(f"super-linear: time grows like length^{cost.growth:.1f}")
+
+
+def _load_results(results_path: Path) -> Dict[str, dict]:
+    if results_path.exists():
+        try:
+            with open(results_path, 'r') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            pass
+    return {}
+
+
+def analyse_configs(configs: dict, force: bool = False,
+                    results_path: Path = RESULTS_PATH) -> Tuple[List[PatternCost], List[PatternCost]]:
+    """Check every pattern of every config; return all reports and the newly timed ones.
+
+    Timings are kept in results_path by pattern, so each pattern is only
+    timed once unless force is set.
+    """
+    results = _load_results(results_path)
+    pages = None
+    reports, new = [], []
+    for supplier_code, config in configs.items():
+        if not isinstance(config, dict):
+            config = config.to_dict()
+        field_sources = config.get('field_sources') or {}
+        for field_name, pattern in config['patterns'].items():
+            cost = PatternCost(supplier_code, field_name, pattern, static_warnings(pattern))
+            reports.append(cost)
+            compiles = not any(warning.startswith("does not compile") for warning in cost.warnings)
+            source = field_sources.get(field_name) or infer_field_source(pattern)
+            # Filename patterns only ever see a short name, so only page text patterns are timed
+            if source == SOURCE_FILENAME or not compiles:
+                continue
+
+            if pattern in results and not force:
+                timing = results[pattern]
+                cost.mean_seconds = timing['mean_seconds']
+                cost.worst_seconds = timing['worst_seconds']
+                cost.growth = timing['growth']
+                cost.warnings.extend(timing['warnings'])
+                continue
+
+            if pages is None:
+                pages = load_sample_pages()
+            if pages:
+                static_count = len(cost.warnings)
+                time_pattern(cost, pages)
+                results[pattern] = {
+                    'mean_seconds': cost.mean_seconds,
+                    'worst_seconds': cost.worst_seconds,
+                    'growth': cost.growth if cost.growth is not None and math.isfinite(cost.growth) else None,
+                    'warnings': cost.warnings[static_count:]
+                }
+                new.append(cost)
+
+    if new:
+        results_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(results_path, 'w') as f:
+            json.dump(results, f, indent=4)
+    return reports, new
+
+
+def print_pattern_warnings(reports: List[PatternCost]):
+    for cost in reports:
+        if cost.flagged:
+            print(f"Warning: pattern {cost.supplier_code}.{cost.field}: {'; '.join(cost.warnings)}")
+
+
+if __name__ == "__main__":
+    from supplier_configs.supplier_configs import SupplierConfigManager
+
+    manager = SupplierConfigManager(check_patterns=False)
+    reports, _ = analyse_configs(manager.configs, force='--force' in sys.argv)
+    print(f"{'Pattern':40s} {'Mean ms':>8s} {'Worst ms':>9s} {'Growth':>7s}")
+    for cost in reports:
+        mean = f"{cost.mean_seconds * 1000:8.3f}" if cost.mean_seconds is not None else f"{'-':>8s}"
+        worst = f"{cost.worst_seconds * 1000:9.3f}" if cost.worst_seconds is not None else f"{'-':>9s}"
+        growth = f"{cost.growth:7.2f}" if cost.growth is not None else f"{'-':>7s}"
+        print(f"{cost.supplier_code + '.' + cost.field:40s} {mean} {worst} {growth}")
+        for warning in cost.warnings:
+            print(f"    {warning}")
+    if not load_sample_pages(1):
+        print("\nNo cached pages yet; run a stage to fill the page text cache, then use --force to time patterns")
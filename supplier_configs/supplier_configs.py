@@ -1,12 +1,39 @@
 # supplier_configs.py
+import hashlib
 import json
+import os
 from pathlib import Path
-from dataclasses import dataclass, asdict
-from typing import List, Dict
-from datetime import datetime
+from dataclasses import dataclass, field, fields
+from types import MappingProxyType
+from typing import List, Dict, Mapping, Optional
+from supplier_configs.regex_cost import analyse_configs, print_pattern_warnings
+from utils.run_stats import RunStatsStore
 
-@dataclass
+DEFAULT_CONFIG_FILE = Path(__file__).resolve().parent / "supplier_configs.json"
+
+def _freeze(value):
+    """Read-only copy of a JSON value: dicts become mapping proxies, lists tuples"""
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+def _thaw(value):
+    """Plain, mutable copy of a value made by _freeze"""
+    if isinstance(value, Mapping):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+@dataclass(frozen=True)
 class SupplierConfig:
+    """One supplier's settings, read-only all the way down.
+    
+    Markers are stored as tuples and per-field settings as mapping proxies;
+    to_dict() returns plain, mutable copies.
+    """
     code: str
     name: str
     sheet_identifier: str
@@ -15,158 +42,272 @@ class SupplierConfig:
     patterns: dict
     high_confidence_threshold: float = 95.0
     review_confidence_threshold: float = 75.0
-    last_run_date: str = ""
-    total_processed: int = 0
-    success_rate: float = 0.0
+    # Per-field match source: "text" (page text) or "filename"
+    field_sources: dict = field(default_factory=dict)
+    # Per-field clip rectangle [x0, y0, x1, y1] in PDF points; see test_single_supplier's block layout
+    field_regions: dict = field(default_factory=dict)
+    # Per-field pages to search: "first" (default), "last", "any" or a number N for the first N pages
+    field_pages: dict = field(default_factory=dict)
+    
+    def __post_init__(self):
+        # Configs are shared through the cached snapshot, so nested values are frozen too
+        for f in fields(self):
+            object.__setattr__(self, f.name, _freeze(getattr(self, f.name)))
     
     def to_dict(self):
-        return asdict(self)
+        return {f.name: _thaw(getattr(self, f.name)) for f in fields(self)}
+    
+    def __reduce__(self):
+        # Mapping proxies do not pickle
+        return self.from_dict, (self.to_dict(),)
+    
+    def config_hash(self) -> str:
+        """Short hash of the config, to tell runs made with different settings apart"""
+        data = json.dumps(self.to_dict(), sort_keys=True)
+        return hashlib.sha1(data.encode('utf-8')).hexdigest()[:10]
     
     @classmethod
     def from_dict(cls, data):
-        return cls(**data)
+        """Build a config, ignoring keys it does not have, such as the old run statistics"""
+        known = {f.name for f in fields(cls)}
+        return cls(**{key: value for key, value in data.items() if key in known})
+
+# Parsed config files by path: the (mtime_ns, size) they were read at, the
+# read-only configs, and whether their patterns were checked in this process
+_snapshots = {}
+
+def _file_key(config_file: Path):
+    try:
+        stat = config_file.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+def _migrate_legacy_stats(config_data: dict, stats_store: RunStatsStore):
+    """Copy run statistics from an old config file into the stats store, once"""
+    recorded = None
+    for code, data in config_data.items():
+        if not data.get('last_run_date'):
+            continue
+        if recorded is None:
+            recorded = stats_store.latest()
+        if code not in recorded:
+            stats_store.append(code, {
+                'run_date': data['last_run_date'],
+                'total_processed': data.get('total_processed', 0),
+                'success_rate': data.get('success_rate', 0.0)
+            })
+
+def _load_snapshot(config_file: Path) -> dict:
+    config_file = Path(config_file)
+    key = _file_key(config_file)
+    snapshot = _snapshots.get(config_file)
+    if snapshot is not None and snapshot['key'] == key:
+        return snapshot
+    if key is None:
+        configs = get_default_configs()
+    else:
+        with open(config_file, 'r') as f:
+            config_data = json.load(f)
+        _migrate_legacy_stats(config_data, RunStatsStore())
+        configs = {code: SupplierConfig.from_dict(data) for code, data in config_data.items()}
+    snapshot = {'key': key, 'configs': MappingProxyType(configs), 'patterns_checked': False}
+    _snapshots[config_file] = snapshot
+    return snapshot
+
+def load_config_snapshot(config_file: Path = DEFAULT_CONFIG_FILE) -> Mapping[str, SupplierConfig]:
+    """Return the configs in config_file as a read-only mapping.
+    
+    The parsed configs are cached per process and only re-read once the
+    file's mtime or size changes, so constructing managers is cheap.
+    """
+    return _load_snapshot(config_file)['configs']
 
 class SupplierConfigManager:
-    def __init__(self):
-        self.config_dir = Path("supplier_configs")
-        self.config_dir.mkdir(exist_ok=True)
-        self.config_file = self.config_dir / "supplier_configs.json"
-        self.configs = self._load_configs()
+    """Supplier configs from supplier_configs.json, plus their run statistics.
     
-    def _load_configs(self) -> Dict[str, SupplierConfig]:
-        if self.config_file.exists():
-            with open(self.config_file, 'r') as f:
-                config_data = json.load(f)
-                return {code: SupplierConfig.from_dict(data) 
-                       for code, data in config_data.items()}
-        return self._get_default_configs()
+    configs starts as a copy of the cached snapshot of the file. The configs
+    themselves are frozen: edit by putting new SupplierConfig objects into
+    configs, then call save_configs(). Run statistics go to a separate
+    append-only store, so recording them never rewrites the config file.
+    """
+    
+    def __init__(self, check_patterns: bool = True, config_file: Path = DEFAULT_CONFIG_FILE,
+                 stats_store: Optional[RunStatsStore] = None):
+        self.config_file = Path(config_file)
+        self.config_dir = self.config_file.parent
+        self.stats_store = stats_store or RunStatsStore()
+        snapshot = _load_snapshot(self.config_file)
+        self.configs = dict(snapshot['configs'])
+        self.check_patterns_on_save = check_patterns
+        # Patterns are checked once per version of the file in each process
+        if check_patterns and not snapshot['patterns_checked']:
+            self.check_patterns()
+            snapshot['patterns_checked'] = True
+    
+    def check_patterns(self, force: bool = False, count_known: bool = True):
+        """Flag slow or backtracking-heavy patterns.
+        
+        New patterns are timed against cached page text and printed in full;
+        patterns checked before are only counted, if count_known is set.
+        """
+        reports, new = analyse_configs(self.configs, force)
+        print_pattern_warnings(new)
+        flagged_before = [cost for cost in reports if cost.flagged and cost not in new]
+        if flagged_before and count_known:
+            print(f"{len(flagged_before)} supplier patterns flagged as slow or backtracking-heavy; "
+                  f"run python supplier_configs/regex_cost.py for details")
+        return reports
     
     def _get_default_configs(self) -> Dict[str, SupplierConfig]:
-        configs = {
-            "ABBOTT": SupplierConfig(
-                code="ABBOTT",
-                name="Abbott Laboratories Limited",
-                sheet_identifier="abbott",
-                validation_markers=["ABBOTT LABORATORIES LIMITED", "INVOICE"],
-                exclusion_markers=["REMITTANCE ADVICE"],
-                patterns={
-                    "invoice_number": r"Invoice No\.?\s*(\d{7})",
-                    "invoice_date": r"Invoice Date\s*(\d{2}/\d{2}/\d{4})",
-                    "reference_number": r"Account Ref No\.\s*(\d+)",
-                    "pre_vat_total": r"Total Net Amount\s*([\d,]+\.\d{2})",
-                    "total_amount": r"Invoice Total\s*([\d,]+\.\d{2})"
-                }
-            ),
-            "AJBELL": SupplierConfig(
-                code="AJBELL",
-                name="AJ Bell Business Solutions Limited",
-                sheet_identifier="bell",
-                validation_markers=["AJ Bell", "FEE INVOICE"],
-                exclusion_markers=["REMITTANCE"],
-                patterns={
-                    "invoice_number": r"Invoice Number:\s*(\d{2}/\d{2}/\d{3})",
-                    "invoice_date": r"(\d{1,2}\s+(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{4})",
-                    "reference_number": r"Our Ref:\s*(CORN\d{4})",
-                    "pre_vat_total": r"Total Fee:\s*£([\d,]+\.\d{2})",
-                    "total_amount": r"Total Invoice:\s*£([\d,]+\.\d{2})"
-                }
-            ),
-            "ADEPT": SupplierConfig(
-                code="ADEPT",
-                name="Adept Computer Support Ltd",
-                sheet_identifier="adept",
-                validation_markers=["Adept Computer Support Ltd", "Invoice"],
-                exclusion_markers=["REMITTANCE", "Statement"],
-                patterns={
-                    'invoice_number': r"\b(\d{5})\b(?=\s*\d{2}/\d{2}/\d{4})",
-                    'invoice_date': r"\b(\d{2}/\d{2}/\d{4})\b",
-                    'reference_number': r"Serial:\s*(ITACS\d{4})",
-                    'pre_vat_total': r"Sub Total\s*(\d+\.\d{2})",
-                    'total_amount': r"Invoice Total\s*(\d+\.\d{2})"
-                }
-            ),
-            "ASH_WASTE": SupplierConfig(
-                code="ASH_WASTE",
-                name="ASH Waste Services Ltd",
-                sheet_identifier="ash waste",
-                validation_markers=["ASH Waste Services Ltd"],
-                exclusion_markers=["REMITTANCE", "Statement"],
-                patterns={
-                    'invoice_number': r"INV(\d+)_\d+\.pdf",
-                    'invoice_date': r"\b(\d{2}/\d{2}/\d{4})\b",
-                    'reference_number': r"INV\d+_(\d+)\.pdf",
-                    'pre_vat_total': r"VAT\s*£(\d+\.\d{2})",
-                    'total_amount': r"£\d+\.\d{2}\s*£\d+\.\d{2}\s*£(\d+\.\d{2})"
-                },
-                high_confidence_threshold=95.0,
-                review_confidence_threshold=75.0,
-                last_run_date="",
-                total_processed=0,
-                success_rate=0.0
-            ),
-            "ALLIANCE": SupplierConfig(
-                code="ALLIANCE",
-                name="Alliance Healthcare (Distribution) Ltd",
-                sheet_identifier="alliance",
-                validation_markers=[
-                    'Alliance Healthcare',
-                    'STATEMENT'
-                ],
-                exclusion_markers=[
-                    'NO OUTSTANDING ITEMS',
-                    'SUPPRESS'
-                ],
-                patterns={
-                    'invoice_number': r"(\d+)_([A-Z0-9]+)_(\d{2}-\d{2}-\d{4})\.pdf",
-                    'invoice_date': r"(\d{2}APR\d{2})\s+1",
-                    'reference_number': r"(\d+)_[A-Z0-9]+_\d{2}-\d{2}-\d{4}\.pdf",
-                    'pre_vat_total': r"PAGE TOTAL\s+(\d+\.\d{2})",
-                    'total_amount': r"INVOICE TOTAL\s+(\d+\.\d{2})"
-                },
-                high_confidence_threshold=95.0,
-                review_confidence_threshold=75.0,
-                last_run_date="",
-                total_processed=0,
-                success_rate=0.0
-            ),
-            "VALLEY": SupplierConfig(
-                code="VALLEY",
-                name="Valley Northern",
-                sheet_identifier="valley northern",
-                validation_markers=[
-                    'Valley Northern Ltd',
-                    'INVOICE FOR'
-                ],
-                exclusion_markers=[
-                    'STATEMENT',
-                    'CREDIT NOTE'
-                ],
-                patterns={
-                    'invoice_number': r'Invoice\s*Date\s*Invoice\s*No[\s\S]{0,200}?(\d{5,7})',
-                    'invoice_date': r'Invoice\s*Date\s*Invoice\s*No[\s\S]{0,100}?(\d{2}/\d{2}/\d{4})',
-                    'reference_number': r'(?:Customer\s*Order\s*Number[\s\S]{0,200}?\([\s\S]*?([\w\-]+)\)|VN\d{5})',
-                    'pre_vat_total': r'Sub\s*Total[\s\S]{0,50}?(\d+\.\d{2})',
-                    'total_amount': r'(?:TOTAL\s*DUE\s*\(£\)|TOTAL\s*AMOUNT)[\s\S]{0,50}?(\d+\.\d{2})'
-                },
-                high_confidence_threshold=95.0,
-                review_confidence_threshold=75.0,
-                last_run_date="",
-                total_processed=0,
-                success_rate=0.0
-            )
-        }
-        return configs
+        return get_default_configs()
     
     def save_configs(self):
+        """Write configs to the config file, replacing it in one step"""
         config_data = {code: config.to_dict() 
                       for code, config in self.configs.items()}
-        with open(self.config_file, 'w') as f:
+        tmp_path = self.config_file.with_suffix('.json.tmp')
+        with open(tmp_path, 'w') as f:
             json.dump(config_data, f, indent=4)
+        os.replace(tmp_path, self.config_file)
+        if self.check_patterns_on_save:
+            self.check_patterns(count_known=False)
     
     def update_config_stats(self, code: str, stats: dict):
+        """Record a run's statistics for one supplier"""
         if code in self.configs:
-            config = self.configs[code]
-            config.last_run_date = stats['run_date']
-            config.total_processed = stats['total_processed']
-            config.success_rate = stats['success_rate']
-            self.save_configs()
\ No newline at end of file
+            self.stats_store.append(code, stats)
+    
+    def last_run_stats(self, code: str) -> Optional[dict]:
+        return self.stats_store.latest().get(code)
+
+def get_default_configs() -> Dict[str, SupplierConfig]:
+    configs = {
+        "ABBOTT": SupplierConfig(
+            code="ABBOTT",
+            name="Abbott Laboratories Limited",
+            sheet_identifier="abbott",
+            validation_markers=["ABBOTT LABORATORIES LIMITED", "INVOICE"],
+            exclusion_markers=["REMITTANCE ADVICE"],
+            patterns={
+                "invoice_number": r"Invoice No\.?\s*(\d{7})",
+                "invoice_date": r"Invoice Date\s*(\d{2}/\d{2}/\d{4})",
+                "reference_number": r"Account Ref No\.\s*(\d+)",
+                "pre_vat_total": r"Total Net Amount\s*([\d,]+\.\d{2})",
+                "total_amount": r"Invoice Total\s*([\d,]+\.\d{2})"
+            },
+            field_sources={
+                'invoice_number': 'text',
+                'reference_number': 'text'
+            }
+        ),
+        "AJBELL": SupplierConfig(
+            code="AJBELL",
+            name="AJ Bell Business Solutions Limited",
+            sheet_identifier="bell",
+            validation_markers=["AJ Bell", "FEE INVOICE"],
+            exclusion_markers=["REMITTANCE"],
+            patterns={
+                "invoice_number": r"Invoice Number:\s*(\d{2}/\d{2}/\d{3})",
+                "invoice_date": r"(\d{1,2}\s+(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{4})",
+                "reference_number": r"Our Ref:\s*(CORN\d{4})",
+                "pre_vat_total": r"Total Fee:\s*£([\d,]+\.\d{2})",
+                "total_amount": r"Total Invoice:\s*£([\d,]+\.\d{2})"
+            },
+            field_sources={
+                'invoice_number': 'text',
+                'reference_number': 'text'
+            }
+        ),
+        "ADEPT": SupplierConfig(
+            code="ADEPT",
+            name="Adept Computer Support Ltd",
+            sheet_identifier="adept",
+            validation_markers=["Adept Computer Support Ltd", "Invoice"],
+            exclusion_markers=["REMITTANCE", "Statement"],
+            patterns={
+                'invoice_number': r"\b(\d{5})\b(?=\s*\d{2}/\d{2}/\d{4})",
+                'invoice_date': r"\b(\d{2}/\d{2}/\d{4})\b",
+                'reference_number': r"Serial:\s*(ITACS\d{4})",
+                'pre_vat_total': r"Sub Total\s*(\d+\.\d{2})",
+                'total_amount': r"Invoice Total\s*(\d+\.\d{2})"
+            },
+            field_sources={
+                'invoice_number': 'text',
+                'reference_number': 'text'
+            }
+        ),
+        "ASH_WASTE": SupplierConfig(
+            code="ASH_WASTE",
+            name="ASH Waste Services Ltd",
+            sheet_identifier="ash waste",
+            validation_markers=["ASH Waste Services Ltd"],
+            exclusion_markers=["REMITTANCE", "Statement"],
+            patterns={
+                'invoice_number': r"INV(\d+)_\d+\.pdf",
+                'invoice_date': r"\b(\d{2}/\d{2}/\d{4})\b",
+                'reference_number': r"INV\d+_(\d+)\.pdf",
+                'pre_vat_total': r"VAT\s*£(\d+\.\d{2})",
+                'total_amount': r"£\d+\.\d{2}\s*£\d+\.\d{2}\s*£(\d+\.\d{2})"
+            },
+            field_sources={
+                'invoice_number': 'filename',
+                'reference_number': 'filename'
+            },
+            high_confidence_threshold=95.0,
+            review_confidence_threshold=75.0
+        ),
+        "ALLIANCE": SupplierConfig(
+            code="ALLIANCE",
+            name="Alliance Healthcare (Distribution) Ltd",
+            sheet_identifier="alliance",
+            validation_markers=[
+                'Alliance Healthcare',
+                'STATEMENT'
+            ],
+            exclusion_markers=[
+                'NO OUTSTANDING ITEMS',
+                'SUPPRESS'
+            ],
+            patterns={
+                'invoice_number': r"(\d+)_([A-Z0-9]+)_(\d{2}-\d{2}-\d{4})\.pdf",
+                'invoice_date': r"(\d{2}APR\d{2})\s+1",
+                'reference_number': r"(\d+)_[A-Z0-9]+_\d{2}-\d{2}-\d{4}\.pdf",
+                'pre_vat_total': r"PAGE TOTAL\s+(\d+\.\d{2})",
+                'total_amount': r"INVOICE TOTAL\s+(\d+\.\d{2})"
+            },
+            field_sources={
+                'invoice_number': 'filename',
+                'reference_number': 'filename'
+            },
+            high_confidence_threshold=95.0,
+            review_confidence_threshold=75.0
+        ),
+        "VALLEY": SupplierConfig(
+            code="VALLEY",
+            name="Valley Northern",
+            sheet_identifier="valley northern",
+            validation_markers=[
+                'Valley Northern Ltd',
+                'INVOICE FOR'
+            ],
+            exclusion_markers=[
+                'STATEMENT',
+                'CREDIT NOTE'
+            ],
+            patterns={
+                'invoice_number': r'Invoice\s*Date\s*Invoice\s*No[\s\S]{0,200}?(\d{5,7})',
+                'invoice_date': r'Invoice\s*Date\s*Invoice\s*No[\s\S]{0,100}?(\d{2}/\d{2}/\d{4})',
+                'reference_number': r'(?:Customer\s*Order\s*Number[\s\S]{0,200}?\([\s\S]*?([\w\-]+)\)|VN\d{5})',
+                'pre_vat_total': r'Sub\s*Total[\s\S]{0,50}?(\d+\.\d{2})',
+                'total_amount': r'(?:TOTAL\s*DUE\s*\(£\)|TOTAL\s*AMOUNT)[\s\S]{0,50}?(\d+\.\d{2})'
+            },
+            field_sources={
+                'invoice_number': 'text',
+                'reference_number': 'text'
+            },
+            high_confidence_threshold=95.0,
+            review_confidence_threshold=75.0
+        )
+    }
+    return configs
@@ -0,0 +1,34 @@
+import json
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from benchmarks.bench_classifier import with_extra_suppliers
+from benchmarks.synthetic_corpus import SUPPLIER_TEMPLATES, make_document
+from supplier_configs.classifier import SupplierClassifier
+from supplier_configs.supplier_configs import DEFAULT_CONFIG_FILE, SupplierConfig
+
+
+def test_automaton_matches_substring_search():
+    with open(DEFAULT_CONFIG_FILE, 'r') as f:
+        configs = {code: SupplierConfig.from_dict(data) for code, data in json.load(f).items()}
+    texts = ['', 'nothing to see here']
+    for code in SUPPLIER_TEMPLATES:
+        for n in range(40):
+            texts.append('\n'.join(make_document(code, n)['lines']))
+    # Two suppliers' documents on one page, and a made-up supplier's markers
+    texts.append(texts[2] + '\n' + texts[-1])
+    configs = with_extra_suppliers(configs, 64)
+    extra = configs['BENCH0000']
+    texts.append('\n'.join(extra.validation_markers))
+
+    automaton = SupplierClassifier(configs, use_automaton=True)
+    substring = SupplierClassifier(configs, use_automaton=False)
+    assert automaton.automaton is not None and substring.automaton is None
+    for text in texts:
+        assert automaton.find_markers(text) == substring.find_markers(text)
+        assert automaton.classify(text) == substring.classify(text)
+    assert automaton.classify(texts[-1]).supplier_code == 'BENCH0000'
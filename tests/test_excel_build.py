@@ -0,0 +1,31 @@
+import sys
+from pathlib import Path
+
+from openpyxl import load_workbook
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+sys.path.append(str(project_root / 'src'))
+
+from excel_build import build_supplier_sheet, create_invoice_summary
+from utils.ledger import LEDGER_COLUMNS
+
+
+def test_empty_folder_builds_an_empty_sheet():
+    df = build_supplier_sheet({}, None, 'SUP0001')
+    assert df.empty and list(df.columns) == LEDGER_COLUMNS
+
+
+def test_rebuild_skips_empty_supplier_folders(tmp_path):
+    share, output = tmp_path / 'share', tmp_path / 'output'
+    (share / 'ABBOTT' / 'JAN 24').mkdir(parents=True)
+    (share / 'ABBOTT' / 'JAN 24' / 'inv1.pdf').write_bytes(b'%PDF')
+    (share / 'EMPTY SUPPLIER').mkdir()
+    output.mkdir()
+
+    excel_path = create_invoice_summary(share, output)
+
+    workbook = load_workbook(excel_path, read_only=True)
+    assert workbook.sheetnames == ['Summary', 'ABBOTT']
+    workbook.close()
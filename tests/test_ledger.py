@@ -0,0 +1,121 @@
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from openpyxl import Workbook, load_workbook
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from utils.ledger import (DATE_FORMAT, DATETIME_FORMAT, LEDGER_COLUMNS, OPENPYXL, XLSXWRITER, InvoiceLedger,
+                          xlsxwriter)
+
+
+def write_workbook(excel_path: Path, sheets: dict):
+    """Save a workbook in the Invoice_Summary.xlsx layout, with the given rows per sheet"""
+    workbook = Workbook()
+    workbook.active.title = 'Summary'
+    workbook.active.append(['Supplier Name', 'Supplier Code', 'Invoice Count', 'Total Size (MB)'])
+    for sheet_name, rows in sheets.items():
+        worksheet = workbook.create_sheet(sheet_name)
+        worksheet.append(LEDGER_COLUMNS)
+        for row in rows:
+            worksheet.append([row.get(column) for column in LEDGER_COLUMNS])
+    workbook.save(excel_path)
+
+
+def test_import_keeps_date_cells(tmp_path):
+    excel_path = tmp_path / 'Invoice_Summary.xlsx'
+    write_workbook(excel_path, {'ABBOTT': [
+        {'Invoice File': 'a.pdf', 'Invoice Date': datetime(2024, 1, 2), 'Full Path': '/share/a.pdf',
+         'Supplier Code': 'SUP0001'},
+        {'Invoice File': 'b.pdf', 'Invoice Date': '03/01/2024', 'Full Path': '/share/b.pdf',
+         'Supplier Code': 'SUP0001'}
+    ]})
+
+    ledger = InvoiceLedger.for_workbook(excel_path)
+    df = ledger.read_sheet('ABBOTT')
+    ledger.close()
+
+    assert df['Invoice Date'].tolist() == [datetime(2024, 1, 2), '03/01/2024']
+
+
+@pytest.mark.parametrize('backend', [OPENPYXL, XLSXWRITER])
+def test_export_round_trips_cell_types(tmp_path, backend):
+    if backend == XLSXWRITER and xlsxwriter is None:
+        pytest.skip("XlsxWriter is not installed")
+    excel_path = tmp_path / 'Invoice_Summary.xlsx'
+    write_workbook(excel_path, {'ABBOTT': [
+        {'Invoice File': 'a.pdf', 'Invoice Date': datetime(2024, 1, 2), 'Pre-VAT Total': 10.5,
+         'File Size (KB)': 12, 'Full Path': '/share/a.pdf', 'Supplier Code': 'SUP0001'},
+        {'Invoice File': 'b.pdf', 'Invoice Date': datetime(2024, 1, 3, 9, 30), 'Pre-VAT Total': 7,
+         'File Size (KB)': 3.25, 'Full Path': '/share/b.pdf', 'Supplier Code': 'SUP0001'}
+    ]})
+    ledger = InvoiceLedger.for_workbook(excel_path)
+    ledger.export_workbook(excel_path, backend)
+    ledger.close()
+
+    worksheet = load_workbook(excel_path)['ABBOTT']
+    rows = list(worksheet.iter_rows(min_row=2))
+    assert [row[1].value for row in rows] == [datetime(2024, 1, 2), datetime(2024, 1, 3, 9, 30)]
+    assert [row[1].number_format for row in rows] == [DATE_FORMAT, DATETIME_FORMAT]
+    assert [row[4].value for row in rows] == [10.5, 7]
+    assert [row[7].value for row in rows] == [12, 3.25]
+    assert isinstance(rows[0][7].value, int) and isinstance(rows[1][4].value, int)
+
+
+def test_round_trip_keeps_summary_of_empty_sheet(tmp_path):
+    excel_path = tmp_path / 'Invoice_Summary.xlsx'
+    workbook = Workbook()
+    workbook.active.title = 'Summary'
+    for row in [['Supplier Name', 'Supplier Code', 'Invoice Count', 'Total Size (MB)'],
+                ['ABBOTT', 'SUP0001', 1, 0.01], ['FUEL GENIE', 'SUP0002', 220, 13.32],
+                ['TOTALS', None, 221, 13.33]]:
+        workbook.active.append(row)
+    worksheet = workbook.create_sheet('ABBOTT')
+    worksheet.append(LEDGER_COLUMNS)
+    worksheet.append(['a.pdf', None, None, None, None, None, 'ABBOTT', 12.0, '/share/a.pdf', 'SUP0001'])
+    workbook.create_sheet('FUEL GENIE')
+    workbook.save(excel_path)
+
+    ledger = InvoiceLedger.for_workbook(excel_path)
+    ledger.export_workbook(excel_path)
+    ledger.close()
+
+    workbook = load_workbook(excel_path)
+    summary = list(workbook['Summary'].iter_rows(min_row=2, values_only=True))
+    assert summary[1] == ('FUEL GENIE', 'SUP0002', 220, 13.32)
+    assert summary[-1][0] == 'TOTALS' and summary[-1][2] == 221
+    assert workbook['FUEL GENIE'].max_row == 1 and workbook['FUEL GENIE']['A1'].value is None
+
+
+def test_changed_workbook_never_overwrites_unexported_results(tmp_path):
+    excel_path = tmp_path / 'Invoice_Summary.xlsx'
+    write_workbook(excel_path, {'ABBOTT': [
+        {'Invoice File': 'a.pdf', 'Full Path': '/share/a.pdf', 'Supplier Code': 'SUP0001'}
+    ]})
+    ledger = InvoiceLedger.for_workbook(excel_path)
+    df = ledger.read_sheet('ABBOTT')
+    df['Total Amount'] = '45.00'
+    # As main_script.py --no-export leaves it: results in the ledger only
+    ledger.write_sheet('ABBOTT', df)
+    ledger.close()
+    stat = excel_path.stat()
+    os.utime(excel_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    with pytest.raises(RuntimeError, match='never exported'):
+        InvoiceLedger.for_workbook(excel_path)
+
+    ledger = InvoiceLedger.for_workbook(excel_path, sync=False)
+    assert ledger.read_sheet('ABBOTT')['Total Amount'].tolist() == ['45.00']
+    ledger.export_workbook(excel_path)
+    ledger.close()
+    # Once exported, a later edit to the workbook is imported as before
+    stat = excel_path.stat()
+    os.utime(excel_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    ledger = InvoiceLedger.for_workbook(excel_path)
+    assert ledger.read_sheet('ABBOTT')['Total Amount'].tolist() == ['45.00']
+    ledger.close()
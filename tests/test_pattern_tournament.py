@@ -0,0 +1,49 @@
+import json
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+sys.path.append(str(project_root / 'src'))
+
+from benchmarks.synthetic_corpus import make_document
+from pattern_tournament import CURRENT, load_candidates, run_tournament
+from supplier_configs.extraction import FieldExtractor
+from supplier_configs.supplier_configs import DEFAULT_CONFIG_FILE
+from utils.text_cache import CACHE_PATH_ENV, PageTextCache
+
+
+def test_partial_candidate_keeps_the_other_fields(tmp_path, monkeypatch):
+    with open(DEFAULT_CONFIG_FILE, 'r') as f:
+        base_config = json.load(f)['ABBOTT']
+    base_config['field_regions'] = {'invoice_number': [0, 0, 300, 100]}
+    candidates_file = tmp_path / 'candidates.json'
+    candidates_file.write_text(json.dumps({'loose': {'total_amount': r'Grand Total\s+([\d.,]+)'}}))
+
+    candidates = load_candidates(candidates_file, base_config)
+    loose = candidates['loose']
+    assert loose['patterns'] == dict(base_config['patterns'], total_amount=r'Grand Total\s+([\d.,]+)')
+    assert loose['field_regions'] == base_config['field_regions']
+    FieldExtractor.from_config(loose)
+
+    # Over documents the saved config reads in full, the candidate misses its one changed field
+    del base_config['field_regions']
+    candidates = load_candidates(candidates_file, base_config)
+    monkeypatch.setenv(CACHE_PATH_ENV, str(tmp_path / 'cache.sqlite'))
+    cache = PageTextCache(tmp_path / 'cache.sqlite')
+    paths = []
+    for n in range(5):
+        document = make_document('ABBOTT', n)
+        if document['kind'] != 'valid':
+            continue
+        path = tmp_path / f"{n}.pdf"
+        path.write_bytes(b'%PDF')
+        cache.put(path, 0, '\n'.join(document['lines']))
+        paths.append(str(path))
+    cache.close()
+
+    report = run_tournament(candidates, paths)
+    assert report['candidates'][CURRENT]['all_fields_rate'] == 100.0
+    assert report['candidates']['loose']['all_fields_rate'] == 0.0
+    assert report['candidates']['loose']['fields']['invoice_number']['hit_rate'] == 100.0
@@ -0,0 +1,110 @@
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from utils.pipeline import INLINE, PROCESS, THREAD, ByteBudget, PipelineStage, run_pipeline
+
+
+def double(item: int) -> int:
+    return item * 2
+
+
+def fail_on_three(item: int) -> int:
+    if item == 3:
+        raise ValueError("bad item 3")
+    return item
+
+
+def jitter(item):
+    time.sleep(random.random() / 200)
+    return item
+
+
+def pipeline_threads() -> list:
+    return [thread for thread in threading.enumerate() if thread.name.startswith('pipeline-')]
+
+
+@pytest.mark.parametrize('kind', [THREAD, PROCESS])
+def test_stage_error_stops_the_pipeline_and_reaches_the_caller(kind):
+    stages = [PipelineStage('read', jitter, 4), PipelineStage('check', fail_on_three, 2, kind)]
+    results = []
+    with pytest.raises(ValueError, match="bad item 3"):
+        for item in run_pipeline(range(100), stages):
+            results.append(item)
+    assert results == [0, 1, 2]
+    assert pipeline_threads() == []
+
+
+def test_results_keep_source_order_through_an_inline_last_stage():
+    stages = [PipelineStage('read', jitter, 8, queue_size=4),
+              PipelineStage('work', jitter, 3),
+              PipelineStage('double', double, kind=INLINE)]
+    assert list(run_pipeline(range(200), stages)) == [n * 2 for n in range(200)]
+
+
+def test_inline_stage_before_a_background_stage_is_refused():
+    stages = [PipelineStage('double', double, kind=INLINE), PipelineStage('work', jitter)]
+    with pytest.raises(ValueError, match="Inline stages must come after"):
+        list(run_pipeline(range(3), stages))
+
+
+def test_budget_is_held_until_the_next_stage_finishes():
+    budget = ByteBudget(max_bytes=30)
+
+    def slow_consumer(item):
+        time.sleep(0.005)
+        return item
+
+    stages = [PipelineStage('read', jitter, 8, budget=budget, weigh=lambda item: 10),
+              PipelineStage('parse', slow_consumer, 4)]
+    assert list(run_pipeline(range(50), stages)) == list(range(50))
+    # Eight readers would run ahead; the budget lets three items be held at once
+    assert budget.peak == 30
+    assert budget.used == 0
+
+
+def test_item_bigger_than_the_budget_still_gets_through():
+    budget = ByteBudget(max_bytes=10)
+    stages = [PipelineStage('read', jitter, 2, budget=budget, weigh=lambda item: 25 if item == 2 else 5),
+              PipelineStage('parse', jitter)]
+    assert list(run_pipeline(range(6), stages)) == list(range(6))
+    assert budget.peak == 25
+    assert budget.used == 0
+
+
+def test_interrupt_in_the_consumer_shuts_the_pipeline_down():
+    def interrupt(item):
+        if item == 5:
+            raise KeyboardInterrupt
+        return item
+
+    budget = ByteBudget(max_bytes=40)
+    stages = [PipelineStage('read', jitter, 4, budget=budget, weigh=lambda item: 10),
+              PipelineStage('parse', jitter, 2),
+              PipelineStage('interrupt', interrupt, kind=INLINE)]
+    with pytest.raises(KeyboardInterrupt):
+        list(run_pipeline(iter(range(10**6)), stages))
+    assert pipeline_threads() == []
+
+
+def test_stopping_early_does_not_drain_the_source():
+    consumed = []
+
+    def source():
+        for n in range(10**6):
+            consumed.append(n)
+            yield n
+
+    for item in run_pipeline(source(), [PipelineStage('work', jitter, 2, queue_size=4)]):
+        if item == 10:
+            break
+    assert pipeline_threads() == []
+    assert len(consumed) < 100
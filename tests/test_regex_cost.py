@@ -0,0 +1,20 @@
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from supplier_configs.regex_cost import load_sample_pages
+from utils.text_cache import CACHE_PATH_ENV, PageTextCache
+
+
+def test_sample_pages_come_from_the_cache_in_the_environment(tmp_path, monkeypatch):
+    pdf = tmp_path / 'a.pdf'
+    pdf.write_bytes(b'%PDF')
+    cache = PageTextCache(tmp_path / 'scratch.sqlite')
+    cache.put(pdf, 0, 'Invoice No. 123')
+    cache.close()
+
+    monkeypatch.setenv(CACHE_PATH_ENV, str(tmp_path / 'scratch.sqlite'))
+    assert load_sample_pages() == ['Invoice No. 123']
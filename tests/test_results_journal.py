@@ -0,0 +1,49 @@
+import json
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+# Add project root and src to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+sys.path.append(str(project_root / 'src'))
+
+from main_script import OUTCOME_CODES, collect_pending, new_sheet_stats, prepare_sheet, replay_journal
+from supplier_configs.supplier_configs import SupplierConfig
+from utils.results_journal import ResultsJournal
+
+
+def make_result(file_path: str, status: str = 'success', confidence: float = 100.0, **data) -> dict:
+    return {'file_path': file_path, 'status': status, 'data': data, 'confidence_score': confidence,
+            'error': 'could not open' if status == 'error' else None}
+
+
+def test_interrupted_run_is_resumed_from_the_journal(tmp_path):
+    paths = [f"//share/ACME/{n}.pdf" for n in range(5)]
+    df = prepare_sheet(pd.DataFrame({'Full Path': paths, 'Invoice Date': None, 'Total Amount': None,
+                                     'Invoice/Tax Point Number': None}))
+    config = SupplierConfig(code='ACME', name='Acme', sheet_identifier='ACME', validation_markers=[],
+                            exclusion_markers=[], patterns={})
+
+    journal = ResultsJournal.for_workbook(tmp_path / 'Invoices.xlsx')
+    journal.append('ACME', make_result(paths[0], invoice_number='INV-1', invoice_date='01/02/2024',
+                                       total_amount='12.50'))
+    journal.append('ACME', make_result(paths[1], status='excluded'))
+    journal.append('ACME', make_result(paths[2], status='error'))
+    journal.append('OTHER', make_result(paths[3], invoice_date='01/03/2024', total_amount='9.99'))
+    journal.close()
+    # The run was killed part way through writing the next result
+    with open(journal.journal_path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(dict(make_result(paths[4], total_amount='1.00'), sheet='ACME'))[:40])
+
+    stats = new_sheet_stats(len(df))
+    resumed = replay_journal(df, journal.load_sheet('ACME'), config, stats)
+
+    assert resumed == {paths[0], paths[1]}
+    assert df.loc[0, 'Invoice/Tax Point Number'] == 'INV-1'
+    assert df.loc[0, 'Total Amount'] == '12.50'
+    assert stats['outcomes'][:2].tolist() == [OUTCOME_CODES['updated'], OUTCOME_CODES['excluded']]
+    # Errors, other sheets' results and the truncated line are extracted again
+    pending = collect_pending(df, stats, resumed)
+    assert [file_path for _, file_path in pending] == paths[2:]
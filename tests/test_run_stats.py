@@ -0,0 +1,27 @@
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from utils.run_stats import analyse_history
+
+
+def make_run(stage_seconds: dict, files: int = 100, wall_seconds: float = 10.0) -> dict:
+    return {'run_date': '2024-01-01 00:00:00', 'mode': 'serial', 'workers': 1, 'files_extracted': files,
+            'wall_seconds': wall_seconds, 'files_per_second': files / wall_seconds,
+            'stage_seconds': stage_seconds}
+
+
+def test_new_stage_is_not_a_regression():
+    runs = [make_run({'text_extraction': 5.0}) for _ in range(3)]
+    runs.append(make_run({'text_extraction': 5.0, 'ocr_triage': 2.0}))
+    assert analyse_history(runs)[-1].regressions == []
+
+
+def test_stage_baseline_uses_only_runs_that_recorded_it():
+    runs = [make_run({'text_extraction': 5.0}), make_run({'text_extraction': 5.0, 'ocr_triage': 1.0}),
+            make_run({'text_extraction': 5.0, 'ocr_triage': 2.0})]
+    trends = analyse_history(runs)
+    assert trends[-1].regressions == ['ocr_triage 20.0 ms/file (baseline 10.0)']
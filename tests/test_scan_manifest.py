@@ -0,0 +1,34 @@
+import os
+import sqlite3
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from utils.scan_manifest import ScanManifest
+
+
+def test_file_rewritten_in_place_loses_its_stale_hash(tmp_path):
+    root = tmp_path / 'SUPPLIER'
+    for folder in ('JAN 24', 'FEB 24'):
+        (root / folder).mkdir(parents=True)
+        (root / folder / 'inv.pdf').write_bytes(b'%PDF same document')
+    first, second = str(root / 'JAN 24' / 'inv.pdf'), str(root / 'FEB 24' / 'inv.pdf')
+    manifest = ScanManifest(sqlite3.connect(':memory:'))
+    manifest.scan(root)
+    assert manifest.hash_possible_duplicates() == 2
+    assert manifest.duplicate_groups() == [[first, second]]
+
+    # Same size, new content and mtime, and the folder's mtime put back
+    folder_times = os.stat(root / 'FEB 24')
+    with open(second, 'r+b') as f:
+        f.write(b'%PDF else document')
+    os.utime(second, ns=(folder_times.st_atime_ns, folder_times.st_mtime_ns + 10**9))
+    os.utime(root / 'FEB 24', ns=(folder_times.st_atime_ns, folder_times.st_mtime_ns))
+    assert not manifest.scan(root).has_changes
+
+    assert list(manifest.content_hashes([first, second])) == [first]
+    manifest.hash_possible_duplicates()
+    assert manifest.duplicate_groups() == []
@@ -0,0 +1,57 @@
+import hashlib
+import json
+import pickle
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from supplier_configs.supplier_configs import SupplierConfig, SupplierConfigManager, load_config_snapshot
+from utils.run_stats import RunStatsStore
+
+ACME = {
+    'code': 'ACME', 'name': 'Acme Ltd', 'sheet_identifier': 'acme',
+    'validation_markers': ['ACME LTD', 'INVOICE'], 'exclusion_markers': ['STATEMENT'],
+    'patterns': {'invoice_number': r'Invoice No\s*(\d+)', 'total_amount': r'Total\s*([\d.]+)'},
+    'high_confidence_threshold': 95.0, 'review_confidence_threshold': 75.0,
+    'field_sources': {'invoice_number': 'text'},
+    'field_regions': {'total_amount': [300, 600, 560, 700]},
+    'field_pages': {'total_amount': 'last'}
+}
+
+
+def test_returned_configs_cannot_change_the_snapshot(tmp_path):
+    config_file = tmp_path / 'supplier_configs.json'
+    config_file.write_text(json.dumps({'ACME': ACME}))
+    config = load_config_snapshot(config_file)['ACME']
+
+    with pytest.raises(TypeError):
+        config.patterns['invoice_number'] = r'(\d+)'
+    with pytest.raises(TypeError):
+        config.field_regions['total_amount'][0] = 0
+    with pytest.raises(AttributeError):
+        config.validation_markers.append('REMITTANCE')
+    # Copies handed out for editing are the caller's own
+    data = config.to_dict()
+    data['patterns']['invoice_number'] = r'(\d+)'
+    data['field_pages']['total_amount'] = 'any'
+    data['exclusion_markers'].append('REMITTANCE')
+    manager = SupplierConfigManager(check_patterns=False, config_file=config_file,
+                                    stats_store=RunStatsStore(tmp_path / 'run_stats.jsonl'))
+    manager.configs['ACME'] = SupplierConfig.from_dict(data)
+
+    assert load_config_snapshot(config_file)['ACME'].to_dict() == ACME
+    assert SupplierConfigManager(check_patterns=False, config_file=config_file).configs['ACME'] == config
+
+
+def test_frozen_config_saves_hashes_and_pickles_as_before(tmp_path):
+    config = SupplierConfig.from_dict(ACME)
+    assert config.to_dict() == ACME
+    assert json.loads(json.dumps(config.to_dict())) == ACME
+    assert pickle.loads(pickle.dumps(config)) == config
+    # Runs recorded before configs were frozen keep their config hash
+    assert config.config_hash() == hashlib.sha1(json.dumps(ACME, sort_keys=True).encode('utf-8')).hexdigest()[:10]
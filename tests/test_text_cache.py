@@ -0,0 +1,67 @@
+import os
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+import fitz
+
+from utils import text_cache
+from utils.text_cache import DocumentPages, PageTextCache
+
+
+def stored_bytes(cache: PageTextCache) -> int:
+    return cache.conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM page_text").fetchone()[0]
+
+
+def test_total_bytes_follows_inserts_replacements_and_evictions(tmp_path):
+    cache = PageTextCache(tmp_path / 'cache.sqlite', max_bytes=1000)
+    pdfs = []
+    for number in range(6):
+        pdf = tmp_path / f"{number}.pdf"
+        pdf.write_bytes(b'%PDF')
+        pdfs.append(pdf)
+
+    cache.put_many(pdfs[0], 0, {'': 'a' * 100, '0,0,10,10': 'b' * 50})
+    assert cache.total_bytes() == stored_bytes(cache) == 150
+    # Replacing a clip's text swaps its bytes
+    cache.put(pdfs[0], 0, 'c' * 20, clip=(0, 0, 10, 10))
+    assert cache.total_bytes() == stored_bytes(cache) == 120
+    # A rewritten file's stale entries are dropped
+    os.utime(pdfs[0], ns=(1, 1))
+    cache.put(pdfs[0], 0, 'd' * 10)
+    assert cache.total_bytes() == stored_bytes(cache) == 10
+
+    for pdf in pdfs[1:]:
+        cache.put(pdf, 0, 'e' * 300)
+    assert cache.total_bytes() == stored_bytes(cache) <= 1000
+    assert cache.get(pdfs[-1]) == 'e' * 300
+    cache.clear()
+    assert cache.total_bytes() == 0
+    cache.close()
+
+
+def test_document_pages_open_prefetched_bytes_not_the_file(tmp_path, monkeypatch):
+    pdf = tmp_path / 'invoice.pdf'
+    doc = fitz.open()
+    for text in ('Page one', 'Page two'):
+        doc.new_page().insert_text((72, 72), text)
+    doc.save(pdf)
+    doc.close()
+    opened = []
+    real_open = fitz.open
+
+    def recording_open(*args, **kwargs):
+        opened.append(args)
+        return real_open(*args, **kwargs)
+    monkeypatch.setattr(text_cache.fitz, 'open', recording_open)
+
+    cache = PageTextCache(tmp_path / 'cache.sqlite')
+    with DocumentPages(cache, pdf, data=pdf.read_bytes()) as document:
+        assert document.page_count == 2
+        assert 'Page two' in document.texts(1)[0]
+    # Opened once, from the stream and never from the path
+    assert opened == [()]
+    cache.close()
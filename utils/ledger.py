@@ -0,0 +1,565 @@
+# utils/ledger.py
+import os
+import sqlite3
+import sys
+from datetime import date, datetime, time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import pandas as pd
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, Side
+
+try:
+    import xlsxwriter
+except ImportError:  # Optional; exports fall back to openpyxl
+    xlsxwriter = None
+
+LEDGER_COLUMNS = [
+    'Invoice File',
+    'Invoice Date',
+    'Invoice/Tax Point Number',
+    'Reference Number',
+    'Pre-VAT Total',
+    'Total Amount',
+    'Period Folder',
+    'File Size (KB)',
+    'Full Path',
+    'Supplier Code'
+]
+
+# Set column widths
+COLUMN_WIDTHS = {
+    'A': 30,  # Invoice File
+    'B': 15,  # Invoice Date
+    'C': 20,  # Invoice/Tax Point Number
+    'D': 20,  # Reference Number
+    'E': 15,  # Pre-VAT Total
+    'F': 15,  # Total Amount
+    'G': 20,  # Period Folder
+    'H': 15,  # File Size
+    'I': 50,  # Full Path
+    'J': 15   # Supplier Code
+}
+SUMMARY_WIDTHS = {'A': 40, 'B': 15, 'C': 15, 'D': 15}
+
+# Rows per executemany batch when streaming a sheet in from a workbook
+IMPORT_BATCH_ROWS = 5000
+
+# Date and time cells are stored as ISO text after this marker and a type
+# name, e.g. "\x1fdate:2024-01-02". Workbook text cannot hold control
+# characters, so no text cell can be mistaken for a date.
+DATE_MARKER = '\x1f'
+_DATE_TYPES = {'datetime': datetime, 'date': date, 'time': time}
+# Number formats dates are exported with, so Excel still sorts and filters them as dates
+DATE_FORMAT = 'dd/mm/yyyy'
+DATETIME_FORMAT = 'dd/mm/yyyy hh:mm:ss'
+TIME_FORMAT = 'hh:mm:ss'
+
+# Workbook writers: XlsxWriter in constant-memory mode when installed, else openpyxl write-only
+XLSXWRITER = 'xlsxwriter'
+OPENPYXL = 'openpyxl'
+EXPORT_BACKENDS = (XLSXWRITER, OPENPYXL)
+DEFAULT_EXPORT_BACKEND = XLSXWRITER if xlsxwriter is not None else OPENPYXL
+
+SUMMARY_SHEET = 'Summary'
+MAX_SHEET_NAME = 31
+
+# Meta key set by every ledger write and cleared when the ledger and workbook match again
+UNEXPORTED_KEY = 'unexported_changes'
+
+
+def clean_sheet_name(name):
+    invalid_chars = ['[', ']', ':', '*', '?', '/', '\\']
+    clean_name = ''.join(char for char in name if char not in invalid_chars)
+    return clean_name[:MAX_SHEET_NAME]
+
+
+def export_sheet_names(sheet_names: Iterable[str]) -> Dict[str, str]:
+    """Map ledger sheet names to valid, distinct workbook sheet names.
+
+    Excel compares sheet names without case, so a name that clashes with
+    the summary or an earlier sheet once cleaned gets a (2), (3)... suffix.
+    """
+    taken = {SUMMARY_SHEET.lower()}
+    names = {}
+    for sheet_name in sheet_names:
+        base = clean_sheet_name(sheet_name) or 'Sheet'
+        name, copy = base, 1
+        while name.lower() in taken:
+            copy += 1
+            suffix = f" ({copy})"
+            name = base[:MAX_SHEET_NAME - len(suffix)] + suffix
+        taken.add(name.lower())
+        names[sheet_name] = name
+    return names
+
+
+def to_ledger_value(value):
+    """Turn a cell value into one SQLite can store, keeping dates recognisable"""
+    # datetime (and pandas' Timestamp) first, as it is also a date
+    for type_name, date_type in _DATE_TYPES.items():
+        if isinstance(value, date_type):
+            return f"{DATE_MARKER}{type_name}:{value.isoformat()}"
+    return value
+
+
+def from_ledger_value(value):
+    """Inverse of to_ledger_value: stored date text back into a date, datetime or time"""
+    if isinstance(value, str) and value.startswith(DATE_MARKER):
+        type_name, _, text = value[len(DATE_MARKER):].partition(':')
+        return _DATE_TYPES[type_name].fromisoformat(text)
+    return value
+
+
+def _date_format(value) -> Optional[str]:
+    """Number format for an exported date, datetime or time cell; None for any other value"""
+    if isinstance(value, datetime):
+        return DATETIME_FORMAT if value.time() != time() else DATE_FORMAT
+    if isinstance(value, date):
+        return DATE_FORMAT
+    if isinstance(value, time):
+        return TIME_FORMAT
+    return None
+
+
+def _header_cells(worksheet, headers: List[str]) -> List[WriteOnlyCell]:
+    """Header row in the style pandas' to_excel gives it"""
+    thin = Side(style='thin')
+    cells = []
+    for header in headers:
+        cell = WriteOnlyCell(worksheet, value=header)
+        cell.font = Font(bold=True)
+        cell.border = Border(left=thin, right=thin, top=thin, bottom=thin)
+        cell.alignment = Alignment(horizontal='center', vertical='top')
+        cells.append(cell)
+    return cells
+
+
+def _write_openpyxl(path: Path, sheets: Iterable[tuple]):
+    """Write sheets with openpyxl's write-only mode"""
+    workbook = Workbook(write_only=True)
+    for sheet_name, headers, widths, rows in sheets:
+        worksheet = workbook.create_sheet(sheet_name)
+        for col_letter, width in widths.items():
+            worksheet.column_dimensions[col_letter].width = width
+        if headers:
+            worksheet.append(_header_cells(worksheet, headers))
+        for row in rows:
+            cells = list(row)
+            for i, value in enumerate(cells):
+                number_format = _date_format(value)
+                if number_format:
+                    cells[i] = WriteOnlyCell(worksheet, value=value)
+                    cells[i].number_format = number_format
+            worksheet.append(cells)
+    workbook.save(path)
+
+
+def _write_xlsxwriter(path: Path, sheets: Iterable[tuple]):
+    """Write sheets with XlsxWriter's constant-memory mode, which flushes each row to disk.
+
+    Text is always stored as text, never as a formula or link.
+    """
+    workbook = xlsxwriter.Workbook(str(path), {'constant_memory': True, 'strings_to_formulas': False,
+                                               'strings_to_urls': False})
+    header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+    date_formats = {number_format: workbook.add_format({'num_format': number_format})
+                    for number_format in (DATE_FORMAT, DATETIME_FORMAT, TIME_FORMAT)}
+    for sheet_name, headers, widths, rows in sheets:
+        worksheet = workbook.add_worksheet(sheet_name)
+        for col_letter, width in widths.items():
+            worksheet.set_column(f"{col_letter}:{col_letter}", width)
+        if headers:
+            worksheet.write_row(0, 0, headers, header_format)
+        for row_no, row in enumerate(rows, start=1 if headers else 0):
+            worksheet.write_row(row_no, 0, row)
+            for col_no, value in enumerate(row):
+                number_format = _date_format(value)
+                if number_format:
+                    worksheet.write_datetime(row_no, col_no, value, date_formats[number_format])
+    workbook.close()
+
+
+class InvoiceLedger:
+    """SQLite store for the invoice rows behind Invoice_Summary.xlsx.
+
+    Rows keep their sheet and order so the workbook can be exported in its
+    usual layout, and are indexed on Full Path and Supplier Code so stages
+    can query one supplier without reading the whole workbook.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.conn = sqlite3.connect(str(self.db_path), timeout=30)
+        self._setup()
+
+    @classmethod
+    def for_workbook(cls, excel_path: Path, sync: bool = True, create: bool = False) -> "InvoiceLedger":
+        """Open the ledger stored beside a workbook, importing the workbook if needed"""
+        excel_path = Path(excel_path)
+        db_path = excel_path.parent / f"{excel_path.stem}.ledger.sqlite"
+        if not create and not db_path.exists() and not excel_path.exists():
+            raise FileNotFoundError(f"No ledger or workbook found at {excel_path}")
+        ledger = cls(db_path)
+        if sync:
+            try:
+                ledger.sync_from_workbook(excel_path)
+            except Exception:
+                ledger.close()
+                raise
+        return ledger
+
+    def _setup(self):
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        # Editable columns have no declared type so numbers and text keep their type
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS invoices (
+                sheet_name TEXT NOT NULL,
+                row_order INTEGER NOT NULL,
+                "Invoice File" TEXT,
+                "Invoice Date",
+                "Invoice/Tax Point Number",
+                "Reference Number",
+                "Pre-VAT Total",
+                "Total Amount",
+                "Period Folder" TEXT,
+                "File Size (KB)" REAL,
+                "Full Path" TEXT,
+                "Supplier Code" TEXT
+            )
+        """)
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_invoices_full_path ON invoices ("Full Path")')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_invoices_supplier_code ON invoices ("Supplier Code")')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_invoices_sheet ON invoices (sheet_name, row_order)')
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS sheets (
+                sheet_name TEXT PRIMARY KEY,
+                supplier_name TEXT,
+                position INTEGER,
+                has_headers INTEGER NOT NULL DEFAULT 1,
+                summary_code TEXT,
+                summary_count INTEGER,
+                summary_size_mb REAL
+            )
+        """)
+        # Ledgers written before empty sheets kept their imported summary figures
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(sheets)")}
+        if 'has_headers' not in columns:
+            self.conn.execute("ALTER TABLE sheets ADD COLUMN has_headers INTEGER NOT NULL DEFAULT 1")
+        for column, column_type in (('summary_code', 'TEXT'), ('summary_count', 'INTEGER'),
+                                    ('summary_size_mb', 'REAL')):
+            if column not in columns:
+                self.conn.execute(f"ALTER TABLE sheets ADD COLUMN {column} {column_type}")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.conn.commit()
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def has_unexported_changes(self) -> bool:
+        """True if the ledger was written to since it last matched the workbook"""
+        return self._get_meta(UNEXPORTED_KEY) == '1'
+
+    # Reading
+
+    def sheet_names(self) -> List[str]:
+        return [row[0] for row in self.conn.execute("SELECT sheet_name FROM sheets ORDER BY position")]
+
+    def find_sheet(self, identifier: str) -> Optional[str]:
+        """Return the first sheet whose name contains identifier (case-insensitive)"""
+        for sheet_name in self.sheet_names():
+            if identifier.lower() in sheet_name.lower():
+                return sheet_name
+        return None
+
+    def read_sheet(self, sheet_name: str) -> pd.DataFrame:
+        columns = ', '.join(f'"{column}"' for column in LEDGER_COLUMNS)
+        df = pd.read_sql_query(
+            f"SELECT {columns} FROM invoices WHERE sheet_name = ? ORDER BY row_order",
+            self.conn, params=(sheet_name,)
+        )
+        for column in df.select_dtypes(include=['object', 'string']).columns:
+            if df[column].str.startswith(DATE_MARKER, na=False).any():
+                df[column] = df[column].astype(object).map(from_ledger_value)
+        return df
+
+    def get_paths(self, sheet_name: str) -> List[str]:
+        rows = self.conn.execute(
+            'SELECT "Full Path" FROM invoices WHERE sheet_name = ? AND "Full Path" IS NOT NULL ORDER BY row_order',
+            (sheet_name,)
+        )
+        return [row[0] for row in rows]
+
+    def summary(self) -> pd.DataFrame:
+        """Build the Summary sheet, including its TOTALS row.
+
+        A sheet with no rows is left out, unless it was imported empty from
+        a workbook whose Summary listed it; its figures are then kept as they
+        were, as the ledger has nothing to count them from.
+        """
+        df_summary = pd.read_sql_query("""
+            SELECT s.supplier_name AS "Supplier Name",
+                   COALESCE(MIN(i."Supplier Code"), s.summary_code) AS "Supplier Code",
+                   CASE WHEN COUNT(i.rowid) > 0 THEN COUNT(i.rowid) ELSE s.summary_count END
+                       AS "Invoice Count",
+                   CASE WHEN COUNT(i.rowid) > 0 THEN ROUND(COALESCE(SUM(i."File Size (KB)"), 0) / 1024, 2)
+                        ELSE s.summary_size_mb END AS "Total Size (MB)"
+            FROM sheets s LEFT JOIN invoices i ON i.sheet_name = s.sheet_name
+            GROUP BY s.sheet_name
+            HAVING COUNT(i.rowid) > 0 OR s.summary_count IS NOT NULL
+            ORDER BY s.position
+        """, self.conn)
+        totals = {
+            'Supplier Name': 'TOTALS',
+            'Supplier Code': '',
+            'Invoice Count': df_summary['Invoice Count'].sum(),
+            'Total Size (MB)': round(df_summary['Total Size (MB)'].sum(), 2)
+        }
+        return pd.concat([df_summary, pd.DataFrame([totals])], ignore_index=True)
+
+    # Writing
+
+    def _insert_rows(self, sheet_name: str, rows: Iterable[tuple], start: int = 0):
+        """Insert rows given as tuples in LEDGER_COLUMNS order, numbering them from start"""
+        placeholders = ', '.join('?' for _ in range(len(LEDGER_COLUMNS) + 2))
+        columns = ', '.join(f'"{column}"' for column in LEDGER_COLUMNS)
+        self.conn.executemany(
+            f"INSERT INTO invoices (sheet_name, row_order, {columns}) VALUES ({placeholders})",
+            ((sheet_name, order, *map(to_ledger_value, values)) for order, values in enumerate(rows, start))
+        )
+
+    def _insert_sheet(self, sheet_name: str, df: pd.DataFrame):
+        self.conn.execute("DELETE FROM invoices WHERE sheet_name = ?", (sheet_name,))
+        rows = df.reindex(columns=LEDGER_COLUMNS).astype(object)
+        # Blank cells and empty strings are the same thing in the workbook
+        rows = rows.where(pd.notna(rows) & (rows != ''), None)
+        self._insert_rows(sheet_name, rows.itertuples(index=False, name=None))
+
+    def _set_sheet(self, sheet_name: str, supplier_name: Optional[str], position: Optional[int]):
+        """Register a sheet, keeping its current name and position unless given new ones"""
+        row = self.conn.execute("SELECT supplier_name, position FROM sheets WHERE sheet_name = ?",
+                                (sheet_name,)).fetchone()
+        if position is None:
+            position = row[1] if row else self.conn.execute(
+                "SELECT COALESCE(MAX(position), -1) + 1 FROM sheets").fetchone()[0]
+        if supplier_name is None:
+            supplier_name = row[0] if row else sheet_name
+        self.conn.execute("INSERT OR REPLACE INTO sheets (sheet_name, supplier_name, position) VALUES (?, ?, ?)",
+                          (sheet_name, supplier_name, position))
+
+    def write_sheet(self, sheet_name: str, df: pd.DataFrame, supplier_name: Optional[str] = None,
+                    position: Optional[int] = None):
+        """Replace one sheet's rows"""
+        self._insert_sheet(sheet_name, df)
+        self._set_sheet(sheet_name, supplier_name, position)
+        self._set_meta(UNEXPORTED_KEY, '1')
+        self.conn.commit()
+
+    def update_sheet_info(self, sheet_name: str, supplier_name: str, position: int, supplier_code: str):
+        """Re-number a sheet whose rows have not changed, without reading them"""
+        self.conn.execute('UPDATE invoices SET "Supplier Code" = ? WHERE sheet_name = ?',
+                          (supplier_code, sheet_name))
+        self._set_sheet(sheet_name, supplier_name, position)
+        self._set_meta(UNEXPORTED_KEY, '1')
+        self.conn.commit()
+
+    def keep_sheets(self, sheet_names: Iterable[str]):
+        """Drop every sheet not in sheet_names"""
+        keep = set(sheet_names)
+        for sheet_name in self.sheet_names():
+            if sheet_name not in keep:
+                self.conn.execute("DELETE FROM invoices WHERE sheet_name = ?", (sheet_name,))
+                self.conn.execute("DELETE FROM sheets WHERE sheet_name = ?", (sheet_name,))
+                self._set_meta(UNEXPORTED_KEY, '1')
+        self.conn.commit()
+
+    def replace_all(self, sheets: Dict[str, pd.DataFrame], supplier_names: Dict[str, str]):
+        """Replace every sheet, keeping the order of the sheets dict"""
+        self.conn.execute("DELETE FROM invoices")
+        self.conn.execute("DELETE FROM sheets")
+        for position, (sheet_name, df) in enumerate(sheets.items()):
+            self._insert_sheet(sheet_name, df)
+            self.conn.execute("INSERT INTO sheets (sheet_name, supplier_name, position) VALUES (?, ?, ?)",
+                              (sheet_name, supplier_names.get(sheet_name, sheet_name), position))
+        self._set_meta(UNEXPORTED_KEY, '1')
+        self.conn.commit()
+
+    # Workbook import/export
+
+    def _import_rows(self, sheet_name: str, rows) -> tuple:
+        """Stream one worksheet's rows into the ledger.
+
+        Returns its first Supplier Code and whether it had a header row.
+        """
+        headers = next(rows, None) or ()
+        positions = {header: i for i, header in enumerate(headers) if header is not None}
+        picks = [positions.get(column) for column in LEDGER_COLUMNS]
+        code_column = LEDGER_COLUMNS.index('Supplier Code')
+        first_code = None
+        batch, order = [], 0
+        for values in rows:
+            # Blank cells and empty strings are the same thing in the workbook
+            row = tuple(values[i] if i is not None and i < len(values) and values[i] != '' else None
+                        for i in picks)
+            if all(value is None for value in row):
+                continue
+            if first_code is None:
+                first_code = row[code_column]
+            batch.append(row)
+            if len(batch) >= IMPORT_BATCH_ROWS:
+                self._insert_rows(sheet_name, batch, order)
+                order += len(batch)
+                batch = []
+        self._insert_rows(sheet_name, batch, order)
+        return first_code, any(header is not None for header in headers)
+
+    def import_workbook(self, excel_path: Path):
+        """Load every supplier sheet of an existing workbook into the ledger.
+
+        The workbook is read in openpyxl's read-only mode one row at a time,
+        so memory stays flat however many rows and sheets it has.
+        """
+        excel_path = Path(excel_path)
+        workbook = load_workbook(excel_path, read_only=True, data_only=True)
+        try:
+            names_by_code = {}
+            # Summary rows by the sheet name their supplier's sheet would have
+            summary_by_sheet = {}
+            if SUMMARY_SHEET in workbook.sheetnames:
+                rows = workbook[SUMMARY_SHEET].iter_rows(values_only=True)
+                headers = next(rows, None) or ()
+                if 'Supplier Code' in headers and 'Supplier Name' in headers:
+                    code, name = headers.index('Supplier Code'), headers.index('Supplier Name')
+                    count = headers.index('Invoice Count') if 'Invoice Count' in headers else None
+                    size = headers.index('Total Size (MB)') if 'Total Size (MB)' in headers else None
+                    for row in rows:
+                        if len(row) <= max(code, name) or row[name] is None:
+                            continue
+                        names_by_code[row[code]] = row[name]
+                        summary_by_sheet[clean_sheet_name(str(row[name]))] = (
+                            row[name], row[code],
+                            row[count] if count is not None and count < len(row) else None,
+                            row[size] if size is not None and size < len(row) else None)
+
+            self.conn.execute("DELETE FROM invoices")
+            self.conn.execute("DELETE FROM sheets")
+            position = 0
+            for sheet_name in workbook.sheetnames:
+                if sheet_name == SUMMARY_SHEET:
+                    continue
+                first_code, has_headers = self._import_rows(sheet_name,
+                                                            workbook[sheet_name].iter_rows(values_only=True))
+                supplier_name = names_by_code.get(first_code, sheet_name)
+                summary_code = summary_count = summary_size_mb = None
+                if first_code is None and sheet_name in summary_by_sheet:
+                    # No rows to count, so keep what the Summary said about this sheet
+                    supplier_name, summary_code, summary_count, summary_size_mb = summary_by_sheet[sheet_name]
+                    summary_count = summary_count or 0
+                self.conn.execute(
+                    "INSERT INTO sheets (sheet_name, supplier_name, position, has_headers, summary_code, "
+                    "summary_count, summary_size_mb) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (sheet_name, supplier_name, position, has_headers, summary_code, summary_count,
+                     summary_size_mb))
+                position += 1
+        finally:
+            workbook.close()
+        self._set_meta('workbook_mtime_ns', str(excel_path.stat().st_mtime_ns))
+        self._set_meta(UNEXPORTED_KEY, '0')
+        self.conn.commit()
+
+    def sync_from_workbook(self, excel_path: Path):
+        """Re-import the workbook if it was changed outside the ledger, e.g. edited by hand.
+
+        An import replaces every ledger row, so if the ledger also has results
+        not yet exported (e.g. from main_script.py --no-export or a failed
+        export) nothing is imported and a RuntimeError says how to go on.
+        """
+        excel_path = Path(excel_path)
+        if not excel_path.exists():
+            return
+        if str(excel_path.stat().st_mtime_ns) != self._get_meta('workbook_mtime_ns'):
+            if self.has_unexported_changes():
+                raise RuntimeError(
+                    f"{excel_path.name} was changed since the last export, but the ledger has results "
+                    f"that were never exported to it. Run 'python utils/ledger.py export {excel_path}' "
+                    f"to keep the ledger's results (overwriting the workbook's changes), or "
+                    f"'python utils/ledger.py import {excel_path}' to take the workbook's (dropping them)")
+            print(f"Importing {excel_path.name} into the ledger (workbook changed since last export)")
+            self.import_workbook(excel_path)
+
+    def _export_sheets(self) -> Iterator[tuple]:
+        """Yield (sheet name, headers, column widths, rows) for each workbook sheet, summary first.
+
+        Supplier rows are streamed from SQLite as the writer asks for them.
+        """
+        df_summary = self.summary()
+        summary_rows = df_summary.astype(object).where(pd.notna(df_summary), None)
+        yield (SUMMARY_SHEET, list(df_summary.columns), SUMMARY_WIDTHS,
+               ([value.item() if hasattr(value, 'item') else value for value in row]
+                for row in summary_rows.itertuples(index=False, name=None)))
+
+        columns = ', '.join(f'"{column}"' for column in LEDGER_COLUMNS)
+        headerless = {row[0] for row in self.conn.execute("SELECT sheet_name FROM sheets WHERE NOT has_headers")}
+        for sheet_name, export_name in export_sheet_names(self.sheet_names()).items():
+            rows = self.conn.execute(
+                f"SELECT {columns} FROM invoices WHERE sheet_name = ? ORDER BY row_order", (sheet_name,))
+            # A sheet imported without even a header row goes back the same way
+            headers = [] if sheet_name in headerless else LEDGER_COLUMNS
+            yield export_name, headers, COLUMN_WIDTHS, (tuple(map(from_ledger_value, row)) for row in rows)
+
+    def export_workbook(self, excel_path: Path, backend: Optional[str] = None):
+        """Write the ledger out in the Invoice_Summary.xlsx layout.
+
+        Rows are streamed from SQLite straight into the workbook file, with
+        column widths and the header style set as each sheet is started, so
+        only the row being written is held in memory. backend picks the
+        writer (default DEFAULT_EXPORT_BACKEND); XlsxWriter is the faster.
+        """
+        backend = backend or DEFAULT_EXPORT_BACKEND
+        if backend not in EXPORT_BACKENDS:
+            raise ValueError(f"Unknown export backend '{backend}'")
+        if backend == XLSXWRITER and xlsxwriter is None:
+            raise ValueError("The xlsxwriter export backend needs the XlsxWriter package")
+        excel_path = Path(excel_path)
+        tmp_path = excel_path.with_name(f"~{excel_path.name}")
+        kept = [row[0] for row in self.conn.execute("""
+            SELECT sheet_name FROM sheets s WHERE summary_count IS NOT NULL
+            AND NOT EXISTS (SELECT 1 FROM invoices i WHERE i.sheet_name = s.sheet_name)
+            ORDER BY position
+        """)]
+        if kept:
+            print(f"Summary figures kept from the imported workbook for sheets with no rows: {', '.join(kept)}")
+
+        if backend == XLSXWRITER:
+            _write_xlsxwriter(tmp_path, self._export_sheets())
+        else:
+            _write_openpyxl(tmp_path, self._export_sheets())
+        os.replace(tmp_path, excel_path)
+        self._set_meta('workbook_mtime_ns', str(excel_path.stat().st_mtime_ns))
+        self._set_meta(UNEXPORTED_KEY, '0')
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] not in ('import', 'export'):
+        print("Usage: python utils/ledger.py import|export path/to/Invoice_Summary.xlsx")
+        sys.exit(1)
+
+    command, excel_path = sys.argv[1], Path(sys.argv[2])
+    ledger = InvoiceLedger.for_workbook(excel_path, sync=False)
+    if command == 'import':
+        ledger.import_workbook(excel_path)
+        print(f"Imported {len(ledger.sheet_names())} sheets into {ledger.db_path}")
+    else:
+        ledger.export_workbook(excel_path)
+        print(f"Exported {len(ledger.sheet_names())} sheets to {excel_path}")
+    ledger.close()
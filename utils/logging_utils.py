@@ -1,10 +1,21 @@
 # utils/logging_utils.py
 import logging
+import cProfile
+import io
+import pstats
+import time
+from array import array
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime
 import json
+import numpy as np
 import pandas as pd
 
+# Percentiles reported for each timed stage
+TIMING_PERCENTILES = (50, 90, 99)
+PROFILE_TOP_FUNCTIONS = 30
+
 class InvoiceProcessingLogger:
     def __init__(self, supplier_name: str):
         # Set up logging directory
@@ -28,6 +39,23 @@ class InvoiceProcessingLogger:
             'errors': 0,
             'failed_files': []
         }
+        
+        # Durations in seconds per stage, e.g. "pdf_open" or "field:invoice_date"
+        self.timings = {}
+        self.profiler = None
+        self.started_at = datetime.now()
+    
+    @property
+    def log_file(self) -> Path:
+        return self.supplier_dir / f"processing_{self.timestamp}.log"
+    
+    @property
+    def summary_file(self) -> Path:
+        return self.supplier_dir / f"processing_{self.timestamp}.json"
+    
+    @property
+    def profile_file(self) -> Path:
+        return self.supplier_dir / f"processing_{self.timestamp}.pstats"
     
     def setup_logger(self):
         # Create a new logger instance
@@ -37,7 +65,7 @@ class InvoiceProcessingLogger:
         # Prevent duplicate logging
         if not logger.handlers:
             # Create file handler
-            log_file = self.supplier_dir / f"processing_{self.timestamp}.log"
+            log_file = self.log_file
             file_handler = logging.FileHandler(log_file)
             file_handler.setLevel(logging.INFO)
             
@@ -89,4 +117,86 @@ class InvoiceProcessingLogger:
         if self.stats['failed_files']:
             self.info("\nFailed Files Details:")
             for filename, reason in self.stats['failed_files']:
-                self.info(f"❌ {filename}: {reason}")
\ No newline at end of file
+                self.info(f"❌ {filename}: {reason}")
+
+    # Timing and profiling
+    def record_timing(self, stage: str, seconds: float):
+        """Add one duration for a stage"""
+        if stage not in self.timings:
+            self.timings[stage] = array('d')
+        self.timings[stage].append(seconds)
+    
+    def record_timings(self, timings: dict):
+        """Add durations measured elsewhere, e.g. in a worker process"""
+        for stage, seconds in timings.items():
+            self.record_timing(stage, seconds)
+    
+    @contextmanager
+    def time_stage(self, stage: str):
+        """Time the enclosed block as one occurrence of stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_timing(stage, time.perf_counter() - start)
+    
+    def timing_summary(self) -> dict:
+        """Count, cumulative and percentile durations per stage, slowest total first"""
+        summary = {}
+        for stage, durations in self.timings.items():
+            values = np.frombuffer(durations, dtype=np.float64)
+            percentiles = np.percentile(values, TIMING_PERCENTILES)
+            summary[stage] = {
+                'count': len(values),
+                'total_seconds': float(values.sum()),
+                'mean_seconds': float(values.mean()),
+                **{f"p{p}_seconds": float(v) for p, v in zip(TIMING_PERCENTILES, percentiles)},
+                'max_seconds': float(values.max())
+            }
+        return dict(sorted(summary.items(), key=lambda item: item[1]['total_seconds'], reverse=True))
+    
+    def start_profiling(self):
+        """Profile this process with cProfile until stop_profiling()"""
+        self.profiler = cProfile.Profile()
+        self.profiler.enable()
+    
+    def stop_profiling(self):
+        if self.profiler is not None:
+            self.profiler.disable()
+            self.profiler.dump_stats(str(self.profile_file))
+    
+    def profile_summary(self) -> list:
+        """Top functions by cumulative time from the captured profile"""
+        if self.profiler is None:
+            return []
+        stats = pstats.Stats(self.profiler, stream=io.StringIO())
+        stats.sort_stats('cumulative')
+        top = []
+        for (filename, line, function) in stats.fcn_list[:PROFILE_TOP_FUNCTIONS]:
+            calls, primitive_calls, total_time, cumulative_time, _ = stats.stats[(filename, line, function)]
+            top.append({
+                'function': f"{filename}:{line}({function})",
+                'calls': calls,
+                'total_seconds': total_time,
+                'cumulative_seconds': cumulative_time
+            })
+        return top
+    
+    def write_json_summary(self, extra: dict = None) -> Path:
+        """Write stats, stage timings and any profile next to the log file"""
+        summary = {
+            'started_at': self.started_at.strftime("%Y-%m-%d %H:%M:%S"),
+            'wall_seconds': (datetime.now() - self.started_at).total_seconds(),
+            'log_file': str(self.log_file),
+            'stats': self.stats,
+            'timings': self.timing_summary()
+        }
+        if extra:
+            summary.update(extra)
+        if self.profiler is not None:
+            summary['profile_file'] = str(self.profile_file)
+            summary['profile_top'] = self.profile_summary()
+        with open(self.summary_file, 'w') as f:
+            json.dump(summary, f, indent=4)
+        self.info(f"Timing summary written to {self.summary_file}")
+        return self.summary_file
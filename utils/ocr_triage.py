@@ -0,0 +1,50 @@
+# utils/ocr_triage.py
+from dataclasses import dataclass
+from typing import Optional
+
+import fitz
+
+# First pages with fewer non-space characters than this are checked for being a scan
+MIN_TEXT_CHARS = 20
+# Share of the page that images must cover for it to count as a scan
+MIN_IMAGE_COVERAGE = 0.5
+
+
+@dataclass
+class PageTriage:
+    text_spans: int
+    fonts: int
+    image_coverage: float
+
+    @property
+    def needs_ocr(self) -> bool:
+        """An image-only page: no usable text layer, mostly covered by images"""
+        return (self.text_spans == 0 or self.fonts == 0) and self.image_coverage >= MIN_IMAGE_COVERAGE
+
+
+def looks_empty(text: str) -> bool:
+    """True if extracted page text is too short to hold an invoice"""
+    return len(''.join(text.split())) < MIN_TEXT_CHARS
+
+
+def triage_page(page) -> PageTriage:
+    """Count text spans, fonts and the share of the page covered by images.
+
+    Only page metadata is read; nothing is rendered.
+    """
+    text_spans = sum(1 for block in page.get_text('dict')['blocks'] if block['type'] == 0
+                     for line in block['lines'] for span in line['spans'] if span['text'].strip())
+    page_rect = page.rect
+    page_area = abs(page_rect)
+    image_area = sum(abs(fitz.Rect(info['bbox']) & page_rect) for info in page.get_image_info())
+    return PageTriage(text_spans=text_spans, fonts=len(page.get_fonts()),
+                      image_coverage=min(1.0, image_area / page_area) if page_area else 0.0)
+
+
+def needs_ocr(path, data: Optional[bytes] = None) -> bool:
+    """Triage the first page of a PDF, from data if its bytes are already read"""
+    doc = fitz.open(stream=data, filetype='pdf') if data is not None else fitz.open(path)
+    try:
+        return len(doc) > 0 and triage_page(doc[0]).needs_ocr
+    finally:
+        doc.close()
@@ -0,0 +1,219 @@
+# utils/pipeline.py
+import queue
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, List, Optional
+
+# Where a stage runs: a thread pool (I/O), a process pool (CPU-bound work) or
+# the thread iterating the pipeline (work that needs the main thread)
+THREAD = 'thread'
+PROCESS = 'process'
+INLINE = 'inline'
+
+DEFAULT_QUEUE_SIZE = 16
+
+# Queue markers for the end of the input and for a stage that failed
+_DONE = object()
+
+
+class _Failure:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+class ByteBudget:
+    """Limits how many bytes a pipeline stage may hold ahead of the next one.
+
+    A single item bigger than the whole budget is still let through once
+    nothing else is held, so it cannot stall the pipeline.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.used = 0
+        self.peak = 0
+        self._condition = threading.Condition()
+
+    def acquire(self, nbytes: int, stop: Optional[threading.Event] = None) -> bool:
+        """Wait until nbytes fit; False if stop was set first"""
+        with self._condition:
+            while self.used and self.used + nbytes > self.max_bytes:
+                if stop is not None and stop.is_set():
+                    return False
+                self._condition.wait(timeout=0.1)
+            self.used += nbytes
+            self.peak = max(self.peak, self.used)
+            return True
+
+    def release(self, nbytes: int):
+        with self._condition:
+            self.used -= nbytes
+            self._condition.notify_all()
+
+
+@dataclass
+class PipelineStage:
+    """One step of a pipeline: func is called once per item and returns the next item.
+
+    Functions for process stages must be importable module-level functions,
+    and items sent to them must pickle. Stage functions are expected to turn
+    per-item failures into results; an exception raised out of one stops the
+    whole pipeline and is re-raised to the caller.
+
+    With a budget, each item is weighed before it is submitted, and its
+    weight is held until the next stage has finished with the item. Items
+    are admitted in order, so the oldest item always gets through first.
+    """
+    name: str
+    func: Callable
+    workers: int = 1
+    kind: str = THREAD
+    queue_size: int = DEFAULT_QUEUE_SIZE
+    budget: Optional[ByteBudget] = None
+    weigh: Optional[Callable] = None
+
+    def __post_init__(self):
+        if self.kind not in (THREAD, PROCESS, INLINE):
+            raise ValueError(f"Unknown kind '{self.kind}' for stage '{self.name}'")
+        if self.kind != INLINE and self.workers < 1:
+            raise ValueError(f"Stage '{self.name}' needs at least one worker")
+        if self.queue_size < 1:
+            raise ValueError(f"Stage '{self.name}' needs a queue size of at least 1")
+        if (self.budget is None) != (self.weigh is None):
+            raise ValueError(f"Stage '{self.name}' needs both a budget and a weigh function")
+
+
+def _noop():
+    pass
+
+
+def _put(q: queue.Queue, entry, stop: threading.Event) -> bool:
+    """Put entry on q, waiting while it is full; False if the pipeline was stopped"""
+    while not stop.is_set():
+        try:
+            q.put(entry, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def _get(q: queue.Queue, stop: threading.Event):
+    while True:
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            if stop.is_set():
+                return _DONE
+
+
+def _resolve(entry):
+    return entry.result() if isinstance(entry, Future) else entry
+
+
+def _release_when_done(entry, future: Future):
+    """Hand back the budget an upstream stage held for entry once future is done"""
+    held = getattr(entry, 'held', None)
+    if held is not None:
+        budget, nbytes = held
+        future.add_done_callback(lambda _: budget.release(nbytes))
+
+
+def _feed(source: Iterable, outbox: queue.Queue, stop: threading.Event):
+    try:
+        for item in source:
+            if not _put(outbox, item, stop):
+                return
+        _put(outbox, _DONE, stop)
+    except BaseException as e:
+        _put(outbox, _Failure(e), stop)
+
+
+def _dispatch(stage: PipelineStage, executor, inbox: queue.Queue, outbox: queue.Queue,
+              stop: threading.Event):
+    """Submit each item from inbox to the stage's pool, queueing the futures in order.
+
+    outbox holds at most queue_size futures, so a slow stage further down
+    holds this one back instead of letting finished items pile up.
+    """
+    try:
+        while True:
+            entry = _get(inbox, stop)
+            if entry is _DONE or isinstance(entry, _Failure):
+                _put(outbox, entry, stop)
+                return
+            item = _resolve(entry)
+            nbytes = 0
+            if stage.budget is not None:
+                nbytes = stage.weigh(item)
+                if not stage.budget.acquire(nbytes, stop):
+                    return
+            future = executor.submit(stage.func, item)
+            _release_when_done(entry, future)
+            if stage.budget is not None:
+                future.held = (stage.budget, nbytes)
+            if not _put(outbox, future, stop):
+                return
+    except BaseException as e:
+        _put(outbox, _Failure(e), stop)
+
+
+def run_pipeline(source: Iterable, stages: List[PipelineStage]) -> Iterator:
+    """Stream items from source through the stages and yield the results in source order.
+
+    Every stage works on its own items at the same time, so reading one file
+    overlaps with extracting and matching the ones before it. Each stage can
+    have at most its queue_size items waiting on top of those its workers hold,
+    so memory use does not depend on how many items the source produces.
+    Inline stages run in the consuming thread and must come last.
+    """
+    background = [stage for stage in stages if stage.kind != INLINE]
+    inline = stages[len(background):]
+    if any(stage.kind != INLINE for stage in inline):
+        raise ValueError("Inline stages must come after every thread and process stage")
+
+    stop = threading.Event()
+    executors, threads = [], []
+    inbox = queue.Queue(maxsize=stages[0].queue_size if stages else DEFAULT_QUEUE_SIZE)
+    threads.append(threading.Thread(target=_feed, args=(source, inbox, stop), daemon=True))
+    for stage in background:
+        pool = ProcessPoolExecutor if stage.kind == PROCESS else ThreadPoolExecutor
+        executor = pool(max_workers=stage.workers)
+        executors.append(executor)
+        outbox = queue.Queue(maxsize=stage.queue_size)
+        threads.append(threading.Thread(target=_dispatch, args=(stage, executor, inbox, outbox, stop),
+                                        name=f"pipeline-{stage.name}", daemon=True))
+        inbox = outbox
+
+    # A worker forked while another thread holds a lock, SQLite's included,
+    # inherits it locked and can hang on it forever. Process pools start all
+    # their workers on the first submit, so do that before any thread runs.
+    for stage, executor in zip(background, executors):
+        if stage.kind == PROCESS:
+            executor.submit(_noop)
+    for thread in threads:
+        thread.start()
+    try:
+        while True:
+            entry = inbox.get()
+            if entry is _DONE:
+                return
+            if isinstance(entry, _Failure):
+                raise entry.error
+            item = _resolve(entry)
+            for stage in inline:
+                item = stage.func(item)
+            held = getattr(entry, 'held', None)
+            if held is not None:
+                held[0].release(held[1])
+            yield item
+    finally:
+        # Also reached when the caller stops iterating early
+        stop.set()
+        for executor in executors:
+            executor.shutdown(wait=False, cancel_futures=True)
+        for thread in threads:
+            thread.join()
+        for executor in executors:
+            executor.shutdown(wait=True)
@@ -17,9 +17,9 @@ def refresh_configs():
     # Print ALLIANCE config details
     alliance_config = default_configs['ALLIANCE']
     print("\nALLIANCE Configuration:")
-    print(f"Validation Markers: {alliance_config.validation_markers}")
-    print(f"Exclusion Markers: {alliance_config.exclusion_markers}")
-    print(f"Patterns: {json.dumps(alliance_config.patterns, indent=2)}")
+    print(f"Validation Markers: {list(alliance_config.validation_markers)}")
+    print(f"Exclusion Markers: {list(alliance_config.exclusion_markers)}")
+    print(f"Patterns: {json.dumps(dict(alliance_config.patterns), indent=2)}")
     
     print("\nSaving configs...")
     manager.configs = default_configs
@@ -0,0 +1,93 @@
+# utils/results_journal.py
+import json
+import os
+from pathlib import Path
+from typing import Dict, Tuple
+
+# Results are flushed on every append; fsync this often to survive power loss too
+FSYNC_EVERY = 50
+
+
+class ResultsJournal:
+    """Append-only JSONL record of extraction results for one workbook.
+
+    Each result is written as soon as it is produced, so an interrupted run
+    can replay the journal instead of re-extracting. The journal is removed
+    once its results have been merged into the workbook.
+    """
+
+    def __init__(self, journal_path: Path):
+        self.journal_path = Path(journal_path)
+        self._file = None
+        self._unsynced = 0
+
+    @classmethod
+    def for_workbook(cls, excel_path: Path) -> "ResultsJournal":
+        excel_path = Path(excel_path)
+        return cls(excel_path.parent / f"{excel_path.stem}.journal.jsonl")
+
+    def exists(self) -> bool:
+        return self.journal_path.exists()
+
+    def load(self) -> Dict[Tuple[str, str], dict]:
+        """Return the latest entry per (sheet, file path)"""
+        entries = {}
+        if not self.journal_path.exists():
+            return entries
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash can leave a partly written last line
+                    continue
+                entries[(entry['sheet'], entry['file_path'])] = entry
+        return entries
+
+    def load_sheet(self, sheet_name: str) -> Dict[str, dict]:
+        """Return the latest entry per file path for one sheet"""
+        return {file_path: entry for (sheet, file_path), entry in self.load().items()
+                if sheet == sheet_name}
+
+    def append(self, sheet_name: str, result: dict):
+        if self._file is None:
+            self._file = open(self.journal_path, 'a', encoding='utf-8')
+        entry = dict(result, sheet=sheet_name)
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        self._unsynced += 1
+        if self._unsynced >= FSYNC_EVERY:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+
+    def close(self):
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+            self._unsynced = 0
+
+    def discard(self, sheet_names=None):
+        """Drop results once they are safely in the workbook.
+
+        With sheet_names, entries for other sheets are kept for their own
+        resume; otherwise the whole journal is removed.
+        """
+        self.close()
+        if not self.journal_path.exists():
+            return
+        if sheet_names is not None:
+            sheet_names = set(sheet_names)
+            remaining = [entry for (sheet, _), entry in self.load().items()
+                         if sheet not in sheet_names]
+            if remaining:
+                tmp_path = self.journal_path.with_suffix('.tmp')
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    for entry in remaining:
+                        f.write(json.dumps(entry) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.journal_path)
+                return
+        self.journal_path.unlink()
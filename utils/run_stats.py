@@ -0,0 +1,183 @@
+# utils/run_stats.py
+import argparse
+import json
+import os
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from statistics import median
+from typing import Dict, Iterator, List, Optional
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_STATS_PATH = PROJECT_ROOT / "logs" / "run_stats.jsonl"
+
+# Earlier runs of the same supplier, mode and worker count the baseline is the median of
+DEFAULT_WINDOW = 5
+# A run is flagged when it is this many times slower than its baseline
+DEFAULT_SLOWDOWN = 1.5
+# Runs with fewer extracted files are too noisy to judge or to use as a baseline
+MIN_FILES = 10
+# Stages faster than this per file are ignored when comparing stage times
+MIN_STAGE_SECONDS = 0.001
+
+
+class RunStatsStore:
+    """Append-only JSONL record of per-supplier run statistics.
+
+    Each run appends one line per supplier with a single O_APPEND write, so
+    runs in parallel can record stats without locking or rewriting anything,
+    and the supplier config file is never touched.
+    """
+
+    def __init__(self, stats_path: Path = DEFAULT_STATS_PATH):
+        self.stats_path = Path(stats_path)
+
+    def append(self, supplier_code: str, stats: dict):
+        self.stats_path.parent.mkdir(parents=True, exist_ok=True)
+        line = (json.dumps(dict(stats, supplier_code=supplier_code)) + "\n").encode('utf-8')
+        fd = os.open(self.stats_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+
+    def entries(self, supplier_code: Optional[str] = None) -> Iterator[dict]:
+        """Yield recorded runs oldest first, optionally for one supplier"""
+        if not self.stats_path.exists():
+            return
+        with open(self.stats_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash can leave a partly written last line
+                    continue
+                if supplier_code is None or entry.get('supplier_code') == supplier_code:
+                    yield entry
+
+    def history(self, supplier_code: str) -> List[dict]:
+        return list(self.entries(supplier_code))
+
+    def latest(self) -> Dict[str, dict]:
+        """Return the most recent run per supplier code"""
+        return {entry['supplier_code']: entry for entry in self.entries()}
+
+
+@dataclass
+class RunTrend:
+    entry: dict
+    config_changed: bool = False
+    baseline_files_per_second: Optional[float] = None
+    regressions: List[str] = field(default_factory=list)
+
+
+def _comparable(entry: dict) -> bool:
+    return entry.get('files_extracted', 0) >= MIN_FILES and entry.get('wall_seconds', 0) > 0
+
+
+def _run_setup(entry: dict) -> tuple:
+    return entry.get('mode'), entry.get('workers')
+
+
+def _per_file(entry: dict) -> Dict[str, float]:
+    files = entry['files_extracted']
+    return {stage: seconds / files for stage, seconds in (entry.get('stage_seconds') or {}).items()}
+
+
+def analyse_history(entries: List[dict], window: int = DEFAULT_WINDOW,
+                    slowdown: float = DEFAULT_SLOWDOWN) -> List[RunTrend]:
+    """Compare each run of one supplier with the median of its previous runs.
+
+    Only earlier runs in the same mode, with the same worker count and
+    enough files, form the baseline. A run is flagged if its files/second
+    or the per-file time of a stage is more than slowdown times worse than
+    the baseline. A stage's baseline is taken only over the runs that
+    recorded it, so a newly timed stage is not flagged on its first run.
+    """
+    trends = []
+    previous_hash = None
+    for position, entry in enumerate(entries):
+        trend = RunTrend(entry)
+        config_hash = entry.get('config_hash')
+        trend.config_changed = previous_hash is not None and config_hash != previous_hash
+        previous_hash = config_hash or previous_hash
+        trends.append(trend)
+        if not _comparable(entry):
+            continue
+
+        baseline = [earlier for earlier in entries[:position]
+                    if _comparable(earlier) and _run_setup(earlier) == _run_setup(entry)][-window:]
+        if not baseline:
+            continue
+        trend.baseline_files_per_second = median(run['files_per_second'] for run in baseline)
+        if entry['files_per_second'] * slowdown < trend.baseline_files_per_second:
+            trend.regressions.append(f"{trend.baseline_files_per_second / entry['files_per_second']:.1f}x "
+                                     f"fewer files/s than baseline")
+
+        stage_times = _per_file(entry)
+        baseline_stage_times = [_per_file(run) for run in baseline]
+        for stage, seconds in sorted(stage_times.items()):
+            recorded = [times[stage] for times in baseline_stage_times if stage in times]
+            if not recorded:
+                continue
+            usual = median(recorded)
+            if seconds >= MIN_STAGE_SECONDS and seconds > usual * slowdown:
+                trend.regressions.append(f"{stage} {seconds * 1000:.1f} ms/file "
+                                         f"(baseline {usual * 1000:.1f})")
+    return trends
+
+
+def print_trend_report(store: RunStatsStore, supplier_codes: Optional[List[str]] = None, last: int = 10,
+                       window: int = DEFAULT_WINDOW, slowdown: float = DEFAULT_SLOWDOWN) -> List[str]:
+    """Print recent runs per supplier; return the suppliers whose latest run regressed"""
+    history = {}
+    for entry in store.entries():
+        history.setdefault(entry['supplier_code'], []).append(entry)
+
+    regressed = []
+    for supplier_code in supplier_codes or sorted(history):
+        entries = history.get(supplier_code, [])
+        print(f"\n=== {supplier_code} ===")
+        if not entries:
+            print("No runs recorded")
+            continue
+        trends = analyse_history(entries, window, slowdown)
+        print(f"{'Run date':19s}  {'Config':11s} {'Workers':>7s} {'Files':>6s} {'Wall s':>8s} "
+              f"{'Files/s':>8s} {'Success':>8s}  Slowest stage")
+        for trend in trends[-last:]:
+            entry = trend.entry
+            stage_times = _per_file(entry) if entry.get('files_extracted') else {}
+            slowest = max(stage_times.items(), key=lambda item: item[1], default=None)
+            slowest_text = f"{slowest[0]} {slowest[1] * 1000:.1f} ms/file" if slowest else "-"
+            config_text = (entry.get('config_hash') or '-') + ('*' if trend.config_changed else '')
+            print(f"{entry['run_date']:19s}  {config_text:11s} {str(entry.get('workers', '-')):>7s} "
+                  f"{entry.get('files_extracted', 0):>6d} {entry.get('wall_seconds', 0.0):8.2f} "
+                  f"{entry.get('files_per_second', 0.0):8.1f} {entry.get('success_rate', 0.0):7.1f}%  {slowest_text}")
+            for regression in trend.regressions:
+                print(f"    REGRESSION: {regression}")
+        if trends[-1].regressions:
+            regressed.append(supplier_code)
+
+    print("\n* config changed since the previous run")
+    if regressed:
+        print(f"Latest run regressed for: {', '.join(regressed)}")
+    return regressed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show run history trends and flag throughput regressions")
+    parser.add_argument("command", choices=['report'], help="report: print recent runs per supplier")
+    parser.add_argument("--supplier", action="append", help="Supplier code to report; repeat for several")
+    parser.add_argument("--last", type=int, default=10, help="Runs shown per supplier (default 10)")
+    parser.add_argument("--window", type=int, default=DEFAULT_WINDOW,
+                        help=f"Earlier runs in the rolling baseline (default {DEFAULT_WINDOW})")
+    parser.add_argument("--slowdown", type=float, default=DEFAULT_SLOWDOWN,
+                        help=f"Flag runs this many times slower than the baseline (default {DEFAULT_SLOWDOWN})")
+    parser.add_argument("--stats-file", type=Path, default=DEFAULT_STATS_PATH, help="Run history file")
+    args = parser.parse_args()
+
+    regressed = print_trend_report(RunStatsStore(args.stats_file),
+                                   [code.upper() for code in args.supplier] if args.supplier else None,
+                                   args.last, args.window, args.slowdown)
+    # Non-zero when the latest run of any supplier regressed, for scheduled checks
+    sys.exit(1 if regressed else 0)
@@ -0,0 +1,369 @@
+# utils/scan_manifest.py
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Threads hashing PDFs off the share, and how much of a file each read takes
+DEFAULT_HASH_THREADS = 4
+HASH_CHUNK_BYTES = 1024 * 1024
+# Paths per query when looking up content hashes
+LOOKUP_BATCH = 500
+
+
+def content_hash(path) -> Optional[str]:
+    """Fingerprint of a file's bytes, or None if it cannot be read"""
+    digest = hashlib.blake2b(digest_size=16)
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b''):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+def unchanged(path, size: int, mtime_ns: int) -> bool:
+    """True if the file still has the size and mtime it was scanned with"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return False
+    return (stat.st_size, stat.st_mtime_ns) == (size, mtime_ns)
+
+
+def _hash_if_unchanged(row: tuple) -> Optional[str]:
+    path, size, mtime_ns = row
+    return content_hash(path) if unchanged(path, size, mtime_ns) else None
+
+
+@dataclass
+class FolderScan:
+    root: str
+    # path -> (size, mtime_ns), in walk order
+    files: Dict[str, Tuple[int, int]] = field(default_factory=dict)
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    first_scan: bool = False
+    rescanned_dirs: int = 0
+    skipped_dirs: int = 0
+
+    @property
+    def has_changes(self) -> bool:
+        return self.first_scan or bool(self.added or self.removed or self.changed)
+
+
+class ScanManifest:
+    """Remembers directory mtimes and PDF sizes/mtimes between folder scans.
+
+    A directory whose mtime has not changed has the same entries as last
+    time, so its cached listing is reused without listing it or stat-ing its
+    files. New, removed and renamed files always change their directory's
+    mtime. A PDF rewritten in place inside an unchanged directory is only
+    picked up with full_rescan.
+
+    Each PDF can also carry a content hash, so copies of one document in
+    different folders can be found, and a needs-OCR flag for scans with no
+    text layer. Both are kept until the file's size or mtime changes. Hashes
+    are only used while the file still has the size and mtime it was scanned
+    with, as a file rewritten in place can keep its folder's listing.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS scan_dirs (
+                path TEXT PRIMARY KEY,
+                root TEXT NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                subdirs TEXT NOT NULL
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS scan_files (
+                path TEXT PRIMARY KEY,
+                root TEXT NOT NULL,
+                dir TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                content_hash TEXT,
+                needs_ocr INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        # Manifests written before content hashes were kept
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(scan_files)")}
+        if 'content_hash' not in columns:
+            self.conn.execute("ALTER TABLE scan_files ADD COLUMN content_hash TEXT")
+        if 'needs_ocr' not in columns:
+            self.conn.execute("ALTER TABLE scan_files ADD COLUMN needs_ocr INTEGER NOT NULL DEFAULT 0")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_scan_dirs_root ON scan_dirs (root)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_scan_files_root ON scan_files (root)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_scan_files_size ON scan_files (size)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_scan_files_hash ON scan_files (content_hash)")
+        self.conn.commit()
+
+    def _load(self, root: str):
+        dirs = {path: (mtime_ns, json.loads(subdirs)) for path, mtime_ns, subdirs in self.conn.execute(
+            "SELECT path, mtime_ns, subdirs FROM scan_dirs WHERE root = ?", (root,))}
+        files_by_dir = {}
+        for path, dir_path, size, mtime_ns, file_hash, needs_ocr in self.conn.execute(
+                "SELECT path, dir, size, mtime_ns, content_hash, needs_ocr FROM scan_files "
+                "WHERE root = ? ORDER BY rowid", (root,)):
+            files_by_dir.setdefault(dir_path, []).append((path, size, mtime_ns, file_hash, needs_ocr))
+        return dirs, files_by_dir
+
+    def scan(self, root: Path, full_rescan: bool = False) -> FolderScan:
+        """Find every PDF under root, re-listing only directories that changed"""
+        root = str(root)
+        old_dirs, old_files_by_dir = self._load(root)
+        old_files = {path: (size, mtime_ns)
+                     for entries in old_files_by_dir.values() for path, size, mtime_ns, _, _ in entries}
+        old_marks = {path: (file_hash, needs_ocr)
+                     for entries in old_files_by_dir.values() for path, _, _, file_hash, needs_ocr in entries}
+        result = FolderScan(root=root, first_scan=not old_dirs)
+        new_dirs = {}
+        new_files = []
+
+        stack = [root]
+        while stack:
+            dir_path = stack.pop()
+            try:
+                mtime_ns = os.stat(dir_path).st_mtime_ns
+            except OSError:
+                continue
+            cached = old_dirs.get(dir_path)
+            if not full_rescan and cached and cached[0] == mtime_ns:
+                subdirs = cached[1]
+                for path, size, file_mtime_ns, _, _ in old_files_by_dir.get(dir_path, []):
+                    new_files.append((path, dir_path, size, file_mtime_ns))
+                result.skipped_dirs += 1
+            else:
+                subdirs = []
+                with os.scandir(dir_path) as entries:
+                    for entry in entries:
+                        if entry.is_dir():
+                            subdirs.append(entry.path)
+                        elif fnmatch(entry.name, '*.pdf'):
+                            stat = entry.stat()
+                            new_files.append((entry.path, dir_path, stat.st_size, stat.st_mtime_ns))
+                result.rescanned_dirs += 1
+            new_dirs[dir_path] = (mtime_ns, subdirs)
+            # Reversed so the walk visits subfolders in listing order
+            stack.extend(reversed(subdirs))
+
+        for path, _, size, file_mtime_ns in new_files:
+            result.files[path] = (size, file_mtime_ns)
+            if path not in old_files:
+                result.added.append(path)
+            elif old_files[path] != (size, file_mtime_ns):
+                result.changed.append(path)
+        result.removed = [path for path in old_files if path not in result.files]
+
+        self.conn.execute("DELETE FROM scan_dirs WHERE root = ?", (root,))
+        self.conn.execute("DELETE FROM scan_files WHERE root = ?", (root,))
+        self.conn.executemany(
+            "INSERT INTO scan_dirs (path, root, mtime_ns, subdirs) VALUES (?, ?, ?, ?)",
+            ((path, root, mtime_ns, json.dumps(subdirs)) for path, (mtime_ns, subdirs) in new_dirs.items())
+        )
+        # A file keeps its content hash and OCR flag only while its size and mtime are unchanged
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO scan_files (path, root, dir, size, mtime_ns, content_hash, needs_ocr) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            ((path, root, dir_path, size, file_mtime_ns,
+              *(old_marks[path] if old_files.get(path) == (size, file_mtime_ns) else (None, 0)))
+             for path, dir_path, size, file_mtime_ns in new_files)
+        )
+        self.conn.commit()
+        return result
+
+    def _forget_stale_hashes(self, rows: List[tuple], threads: int = DEFAULT_HASH_THREADS) -> List[str]:
+        """Clear the hash of every (path, size, mtime_ns) row whose file has changed; return those paths.
+
+        The size and mtime are left as scanned, so the next full rescan
+        still reports the file as changed.
+        """
+        if not rows:
+            return []
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            fresh = list(pool.map(lambda row: unchanged(*row), rows))
+        stale = [path for (path, _, _), is_fresh in zip(rows, fresh) if not is_fresh]
+        if stale:
+            self.conn.executemany("UPDATE scan_files SET content_hash = NULL WHERE path = ?",
+                                  ((path,) for path in stale))
+            self.conn.commit()
+            print(f"{len(stale)} PDFs changed in place since they were scanned; their content hashes "
+                  f"were dropped (run excel_build.py --full-rescan to update the workbook)")
+        return stale
+
+    def hash_possible_duplicates(self, threads: int = DEFAULT_HASH_THREADS) -> int:
+        """Hash every unhashed PDF that is the same size as another; return how many were hashed.
+
+        A file whose size no other file has cannot be a copy, so most of the
+        share is never read. Files hashed before are stat-ed again first, and
+        only files still matching their scanned size and mtime are hashed.
+        Reads run in threads as they mostly wait on the share.
+        """
+        shared_sizes = "size IN (SELECT size FROM scan_files GROUP BY size HAVING COUNT(*) > 1)"
+        self._forget_stale_hashes(self.conn.execute(
+            f"SELECT path, size, mtime_ns FROM scan_files WHERE content_hash IS NOT NULL AND {shared_sizes}"
+        ).fetchall(), threads)
+        rows = self.conn.execute(
+            f"SELECT path, size, mtime_ns FROM scan_files WHERE content_hash IS NULL AND {shared_sizes}"
+        ).fetchall()
+        if not rows:
+            return 0
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            hashes = list(pool.map(_hash_if_unchanged, rows))
+        self.conn.executemany(
+            "UPDATE scan_files SET content_hash = ? WHERE path = ? AND size = ? AND mtime_ns = ?",
+            ((file_hash, path, size, mtime_ns)
+             for (path, size, mtime_ns), file_hash in zip(rows, hashes) if file_hash is not None)
+        )
+        self.conn.commit()
+        return sum(file_hash is not None for file_hash in hashes)
+
+    def content_hashes(self, paths: Iterable[str]) -> Dict[str, str]:
+        """Known content hashes for paths; files of a unique size have none.
+
+        Each hashed file is stat-ed again, and one that changed since it was
+        scanned is left out, so it is never treated as a copy of another.
+        """
+        paths = list(paths)
+        hashes, rows = {}, []
+        for start in range(0, len(paths), LOOKUP_BATCH):
+            batch = paths[start:start + LOOKUP_BATCH]
+            for path, file_hash, size, mtime_ns in self.conn.execute(
+                    f"SELECT path, content_hash, size, mtime_ns FROM scan_files WHERE content_hash IS NOT NULL "
+                    f"AND path IN ({', '.join('?' * len(batch))})", batch):
+                hashes[path] = file_hash
+                rows.append((path, size, mtime_ns))
+        for path in self._forget_stale_hashes(rows):
+            del hashes[path]
+        return hashes
+
+    def mark_needs_ocr(self, paths: Iterable[str]) -> int:
+        """Flag scanned PDFs so later runs skip them; return how many were newly flagged.
+
+        The flag only sticks to files the manifest knows, and is cleared
+        when the file changes.
+        """
+        cursor = self.conn.executemany(
+            "UPDATE scan_files SET needs_ocr = 1 WHERE path = ? AND needs_ocr = 0",
+            ((path,) for path in paths)
+        )
+        self.conn.commit()
+        return cursor.rowcount
+
+    def needs_ocr_paths(self, paths: Iterable[str]) -> set:
+        """Those of paths flagged as needing OCR"""
+        paths = list(paths)
+        flagged = set()
+        for start in range(0, len(paths), LOOKUP_BATCH):
+            batch = paths[start:start + LOOKUP_BATCH]
+            flagged.update(row[0] for row in self.conn.execute(
+                f"SELECT path FROM scan_files WHERE needs_ocr = 1 "
+                f"AND path IN ({', '.join('?' * len(batch))})", batch))
+        return flagged
+
+    def ocr_queue(self) -> List[str]:
+        """Every PDF flagged as needing OCR, in scan order"""
+        return [row[0] for row in self.conn.execute(
+            "SELECT path FROM scan_files WHERE needs_ocr = 1 ORDER BY rowid")]
+
+    def duplicate_groups(self) -> List[List[str]]:
+        """Paths of every document found more than once on the share, in scan order"""
+        groups = {}
+        for file_hash, path in self.conn.execute("""
+            SELECT content_hash, path FROM scan_files
+            WHERE content_hash IN (SELECT content_hash FROM scan_files WHERE content_hash IS NOT NULL
+                                   GROUP BY content_hash HAVING COUNT(*) > 1)
+            ORDER BY rowid
+        """):
+            groups.setdefault(file_hash, []).append(path)
+        return list(groups.values())
+
+    def forget_missing_roots(self, roots: List[str]):
+        """Drop manifest entries for supplier folders that no longer exist"""
+        keep = set(roots)
+        stale = [row[0] for row in self.conn.execute("SELECT DISTINCT root FROM scan_dirs")
+                 if row[0] not in keep]
+        for root in stale:
+            self.conn.execute("DELETE FROM scan_dirs WHERE root = ?", (root,))
+            self.conn.execute("DELETE FROM scan_files WHERE root = ?", (root,))
+        self.conn.commit()
+
+
+def print_scan_report(scans: Dict[str, FolderScan], max_listed: int = 10):
+    """Print added and removed PDFs per supplier folder"""
+    print("\n=== Scan Report ===")
+    total_rescanned = sum(scan.rescanned_dirs for scan in scans.values())
+    total_skipped = sum(scan.skipped_dirs for scan in scans.values())
+    print(f"Folders re-listed: {total_rescanned}, unchanged folders skipped: {total_skipped}")
+    for supplier_name, scan in scans.items():
+        if scan.first_scan:
+            print(f"{supplier_name}: first scan, {len(scan.files)} files")
+            continue
+        if not scan.has_changes:
+            continue
+        print(f"{supplier_name}: +{len(scan.added)} added, -{len(scan.removed)} removed, "
+              f"{len(scan.changed)} changed")
+        for label, paths in (('+', scan.added), ('-', scan.removed), ('~', scan.changed)):
+            for path in paths[:max_listed]:
+                print(f"  {label} {Path(path).name}")
+            if len(paths) > max_listed:
+                print(f"  {label} ... and {len(paths) - max_listed} more")
+
+
+def print_duplicates_report(groups: List[List[str]], max_listed: int = 10):
+    """Print documents found more than once, with the path of every copy"""
+    print("\n=== Duplicate Report ===")
+    if not groups:
+        print("No duplicate PDFs found")
+        return
+    copies = sum(len(paths) - 1 for paths in groups)
+    print(f"{len(groups)} documents are on the share more than once ({copies} extra copies)")
+    for paths in groups[:max_listed]:
+        print(f"  {paths[0]}")
+        for path in paths[1:]:
+            print(f"    = {path}")
+    if len(groups) > max_listed:
+        print(f"  ... and {len(groups) - max_listed} more")
+
+
+def print_ocr_queue(paths: List[str], max_listed: int = 10):
+    """Print scanned PDFs waiting for OCR"""
+    print("\n=== Needs OCR ===")
+    if not paths:
+        print("No scanned PDFs found")
+        return
+    print(f"{len(paths)} PDFs have no text layer and are skipped until they are OCRed or replaced")
+    for path in paths[:max_listed]:
+        print(f"  {path}")
+    if len(paths) > max_listed:
+        print(f"  ... and {len(paths) - max_listed} more")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] not in ('duplicates', 'ocr'):
+        print("Usage: python utils/scan_manifest.py duplicates|ocr path/to/Invoice_Summary.xlsx")
+        sys.exit(1)
+
+    sys.path.append(str(Path(__file__).resolve().parent.parent))
+    from utils.ledger import InvoiceLedger
+
+    ledger = InvoiceLedger.for_workbook(Path(sys.argv[2]), sync=False)
+    manifest = ScanManifest(ledger.conn)
+    if sys.argv[1] == 'duplicates':
+        groups = manifest.duplicate_groups()
+        print_duplicates_report(groups, max_listed=len(groups))
+    else:
+        queue = manifest.ocr_queue()
+        print_ocr_queue(queue, max_listed=len(queue))
+    ledger.close()
@@ -0,0 +1,398 @@
+# utils/text_cache.py
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Sequence, Tuple
+
+import fitz
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_CACHE_PATH = PROJECT_ROOT / "cache" / "page_text.sqlite"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+# Overrides DEFAULT_CACHE_PATH, e.g. so benchmarks and their worker processes use a scratch cache
+CACHE_PATH_ENV = "INVOICE_TEXT_CACHE"
+
+# Bump when the table layout changes; the cache is rebuilt rather than migrated
+SCHEMA_VERSION = 4
+
+# A hit only rewrites last_access once the stored one is this many seconds old
+ACCESS_RESOLUTION = 300
+
+# Clip key for a whole page
+WHOLE_PAGE = ''
+
+
+def clip_key(rect: Optional[Sequence[float]]) -> str:
+    """Cache key for a clip rectangle (x0, y0, x1, y1); '' for the whole page"""
+    if not rect:
+        return WHOLE_PAGE
+    return ','.join(f"{float(value):g}" for value in rect)
+
+
+class PageTextCache:
+    """On-disk cache of extracted PDF page text.
+
+    Entries are keyed by path, page number and clip rectangle ('' for the
+    whole page) and are only served while the file's size and mtime still
+    match. Each entry also records how many pages the file has. When the
+    stored text grows beyond max_bytes the least recently used entries are
+    evicted. Triggers keep the total stored bytes in cache_meta, so checking
+    it does not scan the table.
+    """
+
+    def __init__(self, cache_path: Path = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_path = Path(cache_path)
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.conn = sqlite3.connect(str(self.cache_path), timeout=30)
+        self._setup()
+
+    def _setup(self):
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        # Rows that INSERT OR REPLACE overwrites only fire the delete trigger with this on
+        self.conn.execute("PRAGMA recursive_triggers=ON")
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            self.conn.execute("DROP TABLE IF EXISTS page_text")
+            self.conn.execute("DROP TABLE IF EXISTS cache_meta")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS page_text (
+                path TEXT NOT NULL,
+                page INTEGER NOT NULL,
+                clip TEXT NOT NULL DEFAULT '',
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                text TEXT NOT NULL,
+                nbytes INTEGER NOT NULL,
+                page_count INTEGER,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (path, page, clip)
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_page_text_access ON page_text (last_access)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS cache_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self.conn.execute("INSERT OR IGNORE INTO cache_meta (key, value) VALUES ('total_bytes', 0)")
+        self.conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS page_text_insert AFTER INSERT ON page_text BEGIN
+                UPDATE cache_meta SET value = value + NEW.nbytes WHERE key = 'total_bytes';
+            END
+        """)
+        self.conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS page_text_delete AFTER DELETE ON page_text BEGIN
+                UPDATE cache_meta SET value = value - OLD.nbytes WHERE key = 'total_bytes';
+            END
+        """)
+        self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.conn.commit()
+
+    @staticmethod
+    def _file_key(path) -> tuple:
+        stat = os.stat(path)
+        return stat.st_size, stat.st_mtime_ns
+
+    def _lookup(self, path, page_no: int) -> Dict[str, str]:
+        """Return every fresh cached text for a page, keyed by clip"""
+        size, mtime_ns = self._file_key(path)
+        rows = self.conn.execute(
+            "SELECT clip, text, last_access FROM page_text "
+            "WHERE path = ? AND page = ? AND size = ? AND mtime_ns = ?",
+            (str(path), page_no, size, mtime_ns)
+        ).fetchall()
+        # Eviction only needs a rough recency, so most hits write nothing
+        now = time.time()
+        if rows and min(row[2] for row in rows) < now - ACCESS_RESOLUTION:
+            self.conn.execute(
+                "UPDATE page_text SET last_access = ? WHERE path = ? AND page = ?",
+                (now, str(path), page_no)
+            )
+            self.conn.commit()
+        return {clip: text for clip, text, _ in rows}
+
+    def get(self, path, page_no: int = 0, clip: Optional[Sequence[float]] = None) -> Optional[str]:
+        """Return cached text for a page or clip, or None if missing or stale"""
+        return self._lookup(path, page_no).get(clip_key(clip))
+
+    def put(self, path, page_no: int, text: str, clip: Optional[Sequence[float]] = None):
+        """Store text for a page, replacing any stale entry"""
+        self.put_many(path, page_no, {clip_key(clip): text})
+
+    def put_many(self, path, page_no: int, texts: Dict[str, str], page_count: Optional[int] = None):
+        """Store texts for one page keyed by clip key, in one transaction"""
+        size, mtime_ns = self._file_key(path)
+        # Entries from an older version of the file are stale
+        self.conn.execute(
+            "DELETE FROM page_text WHERE path = ? AND page = ? AND (size != ? OR mtime_ns != ?)",
+            (str(path), page_no, size, mtime_ns)
+        )
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO page_text (path, page, clip, size, mtime_ns, text, nbytes, page_count, "
+            "last_access) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            ((str(path), page_no, key, size, mtime_ns, text, len(text.encode('utf-8')), page_count, now)
+             for key, text in texts.items())
+        )
+        self.conn.commit()
+        self.evict()
+
+    def page_count(self, path) -> Optional[int]:
+        """Number of pages in the file, if any of its pages are cached"""
+        size, mtime_ns = self._file_key(path)
+        return self.conn.execute(
+            "SELECT MAX(page_count) FROM page_text WHERE path = ? AND size = ? AND mtime_ns = ?",
+            (str(path), size, mtime_ns)
+        ).fetchone()[0]
+
+    def lookup_texts(self, path, page_no: int = 0,
+                     clips: Optional[Dict[str, Sequence[float]]] = None) -> Optional[Tuple[str, Dict[str, str]]]:
+        """Return (page text, clip texts) if all of them are cached, else None"""
+        clips = clips or {}
+        try:
+            cached = self._lookup(path, page_no)
+        except sqlite3.Error:
+            return None
+        if WHOLE_PAGE not in cached or any(clip_key(rect) not in cached for rect in clips.values()):
+            return None
+        return cached[WHOLE_PAGE], {name: cached[clip_key(rect)] for name, rect in clips.items()}
+
+    def cached_texts(self, paths: Iterable[str], page_no: int = 0,
+                     clips: Optional[Dict[str, Sequence[float]]] = None,
+                     batch_size: int = 500) -> Iterator[Tuple[str, str, Dict[str, str]]]:
+        """Yield (path, page text, clip texts) for each of paths with all of them cached.
+
+        Reads in batches and leaves last_access alone, so reports over the
+        whole cache are quick and do not change what gets evicted. Files
+        that are missing, changed or not fully cached are skipped.
+        """
+        clips = clips or {}
+        keys = {WHOLE_PAGE} | {clip_key(rect) for rect in clips.values()}
+        paths = [str(path) for path in paths]
+        for start in range(0, len(paths), batch_size):
+            batch = paths[start:start + batch_size]
+            rows = {}
+            for path, clip, size, mtime_ns, text in self.conn.execute(
+                    f"SELECT path, clip, size, mtime_ns, text FROM page_text WHERE page = ? "
+                    f"AND path IN ({', '.join('?' * len(batch))})", [page_no, *batch]):
+                rows.setdefault(path, {})[clip] = (size, mtime_ns, text)
+            for path in batch:
+                entries = rows.get(path, {})
+                if not keys <= entries.keys():
+                    continue
+                try:
+                    file_key = self._file_key(path)
+                except OSError:
+                    continue
+                if any(entries[key][:2] != file_key for key in keys):
+                    continue
+                yield (path, entries[WHOLE_PAGE][2],
+                       {name: entries[clip_key(rect)][2] for name, rect in clips.items()})
+
+    def get_texts(self, path, page_no: int = 0, clips: Optional[Dict[str, Sequence[float]]] = None,
+                  timings: Optional[dict] = None, data: Optional[bytes] = None) -> Tuple[str, Dict[str, str]]:
+        """Return a page's text and the text inside each named clip rectangle.
+
+        Anything not cached is extracted with PyMuPDF from a single open of
+        the file, or of data if the caller has already read its bytes. If
+        timings is given, the seconds spent on the cache lookup, PDF open,
+        text extraction and cache store are recorded in it.
+        """
+        clips = clips or {}
+        start = time.perf_counter()
+        try:
+            cached = self._lookup(path, page_no)
+        except sqlite3.Error:
+            cached = {}
+        if timings is not None:
+            timings['cache_lookup'] = time.perf_counter() - start
+
+        wanted = {WHOLE_PAGE: None}
+        wanted.update({clip_key(rect): rect for rect in clips.values()})
+        missing = {key: rect for key, rect in wanted.items() if key not in cached}
+        if missing:
+            start = time.perf_counter()
+            doc = fitz.open(stream=data, filetype='pdf') if data is not None else fitz.open(path)
+            if timings is not None:
+                timings['pdf_open'] = time.perf_counter() - start
+            try:
+                cached.update(self._read_page(doc, path, page_no, missing, timings))
+            finally:
+                doc.close()
+
+        clip_texts = {name: cached[clip_key(rect)] for name, rect in clips.items()}
+        return cached[WHOLE_PAGE], clip_texts
+
+    def _read_page(self, doc, path, page_no: int, missing: Dict[str, Optional[Sequence[float]]],
+                   timings: Optional[dict] = None) -> Dict[str, str]:
+        """Extract the missing clip keys of one page from an open document and cache them"""
+        start = time.perf_counter()
+        page = doc[page_no]
+        extracted = {key: page.get_text(clip=fitz.Rect(rect) if rect else None)
+                     for key, rect in missing.items()}
+        if timings is not None:
+            timings['text_extraction'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        try:
+            self.put_many(path, page_no, extracted, len(doc))
+        except sqlite3.Error:
+            pass
+        if timings is not None:
+            timings['cache_store'] = time.perf_counter() - start
+        return extracted
+
+    def get_page_text(self, path, page_no: int = 0, timings: Optional[dict] = None) -> str:
+        """Return page text, extracting it with PyMuPDF on a cache miss"""
+        return self.get_texts(path, page_no, None, timings)[0]
+
+    def total_bytes(self) -> int:
+        return self.conn.execute("SELECT value FROM cache_meta WHERE key = 'total_bytes'").fetchone()[0]
+
+    def evict(self):
+        """Drop least recently used pages until the cache is under max_bytes"""
+        excess = self.total_bytes() - self.max_bytes
+        if excess <= 0:
+            return
+        # Trim to 90% so we do not evict again on the very next insert
+        excess += self.max_bytes // 10
+        rows = self.conn.execute("SELECT path, page, clip, nbytes FROM page_text ORDER BY last_access")
+        victims = []
+        for path, page_no, clip, nbytes in rows:
+            victims.append((path, page_no, clip))
+            excess -= nbytes
+            if excess <= 0:
+                break
+        self.conn.executemany("DELETE FROM page_text WHERE path = ? AND page = ? AND clip = ?", victims)
+        self.conn.commit()
+
+    def clear(self):
+        self.conn.execute("DELETE FROM page_text")
+        self.conn.commit()
+
+    def stats(self) -> dict:
+        pages, regions, files, nbytes = self.conn.execute(
+            "SELECT SUM(clip = ''), SUM(clip != ''), COUNT(DISTINCT path), COALESCE(SUM(nbytes), 0) FROM page_text"
+        ).fetchone()
+        return {'pages': pages or 0, 'regions': regions or 0, 'files': files, 'bytes': nbytes,
+                'max_bytes': self.max_bytes}
+
+    def close(self):
+        self.conn.close()
+
+
+class DocumentPages:
+    """Page text of one PDF, read only when a page is asked for.
+
+    Pages come from the cache where they can; the file is opened at most
+    once, for the first page or page count that is not cached, and stays
+    open until close(). It is opened from data if the file's bytes were
+    already read, so the share is not read again. Seconds spent reading
+    pages are added to timings under 'more_pages'.
+    """
+
+    def __init__(self, cache: PageTextCache, path, clips: Optional[Dict[str, Sequence[float]]] = None,
+                 timings: Optional[dict] = None, data: Optional[bytes] = None):
+        self.cache = cache
+        self.path = path
+        self.clips = clips or {}
+        self.timings = timings
+        self.data = data
+        self._doc = None
+        self._page_count = None
+
+    def _open(self):
+        if self._doc is None:
+            self._doc = (fitz.open(stream=self.data, filetype='pdf') if self.data is not None
+                         else fitz.open(self.path))
+        return self._doc
+
+    def _timed(self, start: float):
+        if self.timings is not None:
+            self.timings['more_pages'] = self.timings.get('more_pages', 0.0) + time.perf_counter() - start
+
+    @property
+    def page_count(self) -> int:
+        if self._page_count is None:
+            start = time.perf_counter()
+            try:
+                self._page_count = self.cache.page_count(self.path)
+            except sqlite3.Error:
+                pass
+            if self._page_count is None:
+                self._page_count = len(self._open())
+            self._timed(start)
+        return self._page_count
+
+    def texts(self, page_no: int) -> Tuple[str, Dict[str, str]]:
+        """Return (page text, clip texts) for one page, as get_texts does"""
+        start = time.perf_counter()
+        cached = self.cache.lookup_texts(self.path, page_no, self.clips)
+        if cached is None:
+            wanted = {WHOLE_PAGE: None}
+            wanted.update({clip_key(rect): rect for rect in self.clips.values()})
+            extracted = self.cache._read_page(self._open(), self.path, page_no, wanted)
+            cached = extracted[WHOLE_PAGE], {name: extracted[clip_key(rect)]
+                                             for name, rect in self.clips.items()}
+        self._timed(start)
+        return cached
+
+    def close(self):
+        if self._doc is not None:
+            self._doc.close()
+            self._doc = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_default_cache = threading.local()
+
+def default_cache_path() -> Path:
+    """The cache file every stage shares: INVOICE_TEXT_CACHE if set, else DEFAULT_CACHE_PATH"""
+    return Path(os.environ.get(CACHE_PATH_ENV) or DEFAULT_CACHE_PATH)
+
+def get_default_cache() -> PageTextCache:
+    """Return this thread's shared cache, opening it on first use"""
+    cache_path = default_cache_path()
+    cache = getattr(_default_cache, 'cache', None)
+    # SQLite connections must not cross a fork or a thread, so each worker opens its own
+    if cache is None or _default_cache.pid != os.getpid() or cache.cache_path != cache_path:
+        _default_cache.cache = PageTextCache(cache_path)
+        _default_cache.pid = os.getpid()
+    return _default_cache.cache
+
+def get_page_text(path, page_no: int = 0, timings: Optional[dict] = None) -> str:
+    """Read page text through the default on-disk cache"""
+    return get_default_cache().get_page_text(path, page_no, timings)
+
+def get_page_texts(path, page_no: int = 0, clips: Optional[Dict[str, Sequence[float]]] = None,
+                   timings: Optional[dict] = None, data: Optional[bytes] = None) -> Tuple[str, Dict[str, str]]:
+    """Read page text and named clip regions through the default on-disk cache"""
+    return get_default_cache().get_texts(path, page_no, clips, timings, data)
+
+def lookup_page_texts(path, page_no: int = 0,
+                      clips: Optional[Dict[str, Sequence[float]]] = None) -> Optional[Tuple[str, Dict[str, str]]]:
+    """Cached page text and clip regions from the default cache, without opening the PDF"""
+    return get_default_cache().lookup_texts(path, page_no, clips)
+
+def open_document(path, clips: Optional[Dict[str, Sequence[float]]] = None,
+                  timings: Optional[dict] = None, data: Optional[bytes] = None) -> DocumentPages:
+    """Lazy page access to one PDF through the default on-disk cache"""
+    return DocumentPages(get_default_cache(), path, clips, timings, data)
+
+
+if __name__ == "__main__":
+    import sys
+
+    cache = get_default_cache()
+    if len(sys.argv) > 1 and sys.argv[1] == "--clear":
+        cache.clear()
+        print("Page text cache cleared")
+    stats = cache.stats()
+    print(f"Cache file: {cache.cache_path}")
+    print(f"Cached pages: {stats['pages']} ({stats['files']} files), field regions: {stats['regions']}")
+    print(f"Size: {stats['bytes'] / (1024 * 1024):.1f} MB of {stats['max_bytes'] / (1024 * 1024):.0f} MB")